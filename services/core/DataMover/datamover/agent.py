@@ -43,14 +43,19 @@ import time
 import gevent
 
 from volttron.platform.agent import utils
-from volttron.platform.agent.base_historian import BaseHistorian, add_timing_data_to_header
+from volttron.platform.agent.base_historian import BaseHistorian, add_timing_data_to_header, compress_records
 from volttron.platform.agent.known_identities import PLATFORM_HISTORIAN
 from volttron.platform.keystore import KnownHostsStore
+from volttron.platform import jsonapi
+from volttron.platform.jsonrpc import MethodNotFound
 from volttron.platform.messaging import headers as headers_mod
 from volttron.platform.messaging.health import STATUS_BAD, Status
 from volttron.platform.vip.agent.utils import build_agent
 
 DATAMOVER_TIMEOUT_KEY = 'DATAMOVER_TIMEOUT_KEY'
+TRANSFER_MODES = ('insert', 'compressed')
+# Number of records in the first chunk of a compressed transfer.
+INITIAL_CHUNK_SIZE = 100
 utils.setup_logging()
 _log = logging.getLogger(__name__)
 __version__ = '0.1'
@@ -77,7 +82,8 @@ class DataMover(BaseHistorian):
     """
 
     def __init__(self, destination_vip, destination_serverkey, destination_historian_identity=PLATFORM_HISTORIAN,
-                 remote_identity=None, **kwargs):
+                 remote_identity=None, transfer_mode='insert', max_chunk_bytes=1000000, target_rpc_latency=2.0,
+                 **kwargs):
         """
         :param destination_vip: vip address of the destination volttron 
         instance
@@ -90,6 +96,13 @@ class DataMover(BaseHistorian):
         :param destination_historian_identity: vip identity of the 
         destination historian. default is 'platform.historian'
         :param destination_instance_name: instance name of destination server
+        :param transfer_mode: 'insert' sends each batch in a single insert
+        call, 'compressed' streams it in compressed chunks through
+        insert_compressed
+        :param max_chunk_bytes: maximum size of the json encoded records of a
+        chunk before compression
+        :param target_rpc_latency: seconds a chunk should take to insert, the
+        number of records per chunk is adjusted to stay close to it
         :param kwargs: additional arguments to be passed along to parent class
         """
         kwargs["process_loop_in_greenlet"] = True
@@ -100,14 +113,22 @@ class DataMover(BaseHistorian):
         self.destination_serverkey = destination_serverkey
         self.destination_historian_identity = destination_historian_identity
         self.remote_identity = remote_identity
+        self.transfer_mode = transfer_mode
+        self.max_chunk_bytes = max_chunk_bytes
+        self.target_rpc_latency = target_rpc_latency
         self._target_platform = None
+        self._chunk_size = INITIAL_CHUNK_SIZE
+        self._insert_compressed = True
 
         self.local_message_bus = utils.get_messagebus()
         self.rmq_to_rmq_comm = False
         config = {"destination_vip":self.destination_vip,
                   "destination_serverkey": self.destination_serverkey,
                   "destination_historian_identity": self.destination_historian_identity,
-                  "remote_identity": self.remote_identity
+                  "remote_identity": self.remote_identity,
+                  "transfer_mode": self.transfer_mode,
+                  "max_chunk_bytes": self.max_chunk_bytes,
+                  "target_rpc_latency": self.target_rpc_latency
                   }
 
         self.update_default_config(config)
@@ -118,6 +139,19 @@ class DataMover(BaseHistorian):
             self.rmq_to_rmq_comm = True
 
     def configure(self, configuration):
+        transfer_mode = configuration.get('transfer_mode', 'insert')
+        if transfer_mode not in TRANSFER_MODES:
+            raise ValueError("transfer_mode must be one of {}, got {}".format(TRANSFER_MODES, transfer_mode))
+        max_chunk_bytes = int(configuration.get('max_chunk_bytes', 1000000))
+        target_rpc_latency = float(configuration.get('target_rpc_latency', 2.0))
+        if max_chunk_bytes <= 0 or target_rpc_latency <= 0:
+            raise ValueError("max_chunk_bytes and target_rpc_latency must be positive")
+        self.transfer_mode = transfer_mode
+        self.max_chunk_bytes = max_chunk_bytes
+        self.target_rpc_latency = target_rpc_latency
+        # The destination may have changed.
+        self._chunk_size = INITIAL_CHUNK_SIZE
+        self._insert_compressed = True
         self.destination_vip = str(configuration.get('destination_vip', ""))
         self.destination_serverkey = str(configuration.get('destination_serverkey', ""))
         self.destination_historian_identity = str(configuration.get('destination_historian_identity',
@@ -199,29 +233,101 @@ class DataMover(BaseHistorian):
                             'headers': headers,
                             'message': message})
 
+        if self.transfer_mode == 'compressed':
+            self._send_chunks(to_publish_list, to_send)
+            return
+
         with gevent.Timeout(30):
             try:
                 _log.debug("Sending to destination historian.")
 
                 self.report_all_handled()
-                # If local and destination platforms are using RMQ message bus,
-                # then shovel will be used to setup the connection and forwarding
-                # of data. All we need to do is perform normal RPC and specify
-                # destination instance name
-                if self.rmq_to_rmq_comm:
-                    kwargs = {"external_platform": self.destination_instance_name}
-                    self.vip.rpc.call(self.destination_historian_identity, 'insert', to_send, **kwargs).get(timeout=10)
-                else:
-                    self._target_platform.vip.rpc.call(self.destination_historian_identity, 'insert', to_send).get(
-                        timeout=10)
+                self._call_destination('insert', to_send)
             except gevent.Timeout:
-                self._last_timeout = self.timestamp()
-                if self._target_platform:
-                    self._target_platform.core.stop()
-                self._target_platform = None
-                _log.error("Timeout when attempting to publish to target.")
-                self.vip.health.set_status(
-                    STATUS_BAD, "Timeout occurred")
+                self._transfer_timed_out()
+
+    def _send_chunks(self, to_publish_list, to_send):
+        """
+        Sends the records in chunks of at most max_chunk_bytes and reports
+        every chunk handled once the destination accepted it.
+        """
+        serialized = [jsonapi.dumps(record) for record in to_send]
+        start = 0
+        try:
+            while start < len(serialized):
+                end = self._chunk_end(serialized, start)
+                if self._insert_compressed:
+                    method = 'insert_compressed'
+                    args = compress_records('[' + ','.join(serialized[start:end]) + ']')
+                else:
+                    method = 'insert'
+                    args = to_send[start:end]
+                _log.debug("Sending {} records to destination historian with {}.".format(end - start, method))
+                started = time.time()
+                try:
+                    with gevent.Timeout(30):
+                        self._call_destination(method, args)
+                except MethodNotFound:
+                    if not self._insert_compressed:
+                        raise
+                    _log.warning("Destination historian {} does not support insert_compressed, "
+                                 "sending uncompressed chunks.".format(self.destination_historian_identity))
+                    self._insert_compressed = False
+                    continue
+                except gevent.Timeout:
+                    self._transfer_timed_out()
+                    return
+                self._adapt_chunk_size(time.time() - started, end - start)
+                start = end
+        finally:
+            self.report_handled(to_publish_list[:start])
+
+    def _chunk_end(self, serialized, start):
+        """
+        Returns the end of the chunk starting at start. A chunk holds at most
+        the current chunk size of records and max_chunk_bytes of json, but
+        always at least one record.
+        """
+        end = start + 1
+        size = len(serialized[start])
+        limit = min(len(serialized), start + self._chunk_size)
+        while end < limit:
+            size += len(serialized[end]) + 1
+            if size > self.max_chunk_bytes:
+                break
+            end += 1
+        return end
+
+    def _adapt_chunk_size(self, latency, records):
+        """
+        Halves the number of records per chunk when inserting took longer
+        than target_rpc_latency and doubles it when a full chunk took less
+        than half of it.
+        """
+        if latency > self.target_rpc_latency:
+            self._chunk_size = max(1, self._chunk_size // 2)
+        elif latency < self.target_rpc_latency / 2 and records >= self._chunk_size:
+            self._chunk_size *= 2
+
+    def _call_destination(self, method, *args):
+        # If local and destination platforms are using RMQ message bus,
+        # then shovel will be used to setup the connection and forwarding
+        # of data. All we need to do is perform normal RPC and specify
+        # destination instance name
+        if self.rmq_to_rmq_comm:
+            kwargs = {"external_platform": self.destination_instance_name}
+            return self.vip.rpc.call(self.destination_historian_identity, method, *args, **kwargs).get(timeout=10)
+        return self._target_platform.vip.rpc.call(self.destination_historian_identity, method, *args).get(
+            timeout=10)
+
+    def _transfer_timed_out(self):
+        self._last_timeout = self.timestamp()
+        if self._target_platform:
+            self._target_platform.core.stop()
+        self._target_platform = None
+        _log.error("Timeout when attempting to publish to target.")
+        self.vip.health.set_status(
+            STATUS_BAD, "Timeout occurred")
 
     def historian_setup(self):
         if self.rmq_to_rmq_comm:
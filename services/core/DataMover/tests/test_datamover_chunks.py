@@ -0,0 +1,118 @@
+import gevent
+from gevent.event import AsyncResult
+from mock import MagicMock
+
+from volttron.platform.agent.base_historian import decompress_records
+from volttron.platform.jsonrpc import MethodNotFound
+from datamover import agent
+from datamover.agent import DataMover
+
+
+class FakeRPC(object):
+    """Destination historian that records the inserted chunks."""
+    def __init__(self, latency=0.0, compressed=True, hang_after=None):
+        self.latency = latency
+        self.compressed = compressed
+        self.hang_after = hang_after
+        self.chunks = []
+
+    def call(self, peer, method, records):
+        result = AsyncResult()
+        if method == 'insert_compressed':
+            if not self.compressed:
+                result.set_exception(MethodNotFound(-32601, "Method not found", None))
+                return result
+            records = decompress_records(records)
+        if self.hang_after is not None and len(self.chunks) >= self.hang_after:
+            return result
+        self.chunks.append((method, records))
+        gevent.spawn_later(self.latency, result.set, len(records))
+        return result
+
+
+def _datamover(rpc, max_chunk_bytes=1000000, target_rpc_latency=2.0):
+    datamover = DataMover.__new__(DataMover)
+    datamover.vip = MagicMock()
+    datamover.rmq_to_rmq_comm = False
+    datamover.gather_timing_data = False
+    datamover.destination_historian_identity = "platform.historian"
+    datamover.transfer_mode = 'compressed'
+    datamover.max_chunk_bytes = max_chunk_bytes
+    datamover.target_rpc_latency = target_rpc_latency
+    datamover._chunk_size = agent.INITIAL_CHUNK_SIZE
+    datamover._insert_compressed = True
+    datamover._last_timeout = 0
+    datamover._successful_published = set()
+    datamover._target_platform = MagicMock()
+    datamover._target_platform.vip.rpc = rpc
+    return datamover
+
+
+def _records(count):
+    return [{'_id': n,
+             'topic': "devices/campus/building/device{}/all".format(n),
+             'value': {'headers': {'Date': "2021-01-01T00:00:00"},
+                       'message': [{'point': n}, {'point': {'units': 'F'}}]}}
+            for n in range(count)]
+
+
+def _sent(rpc):
+    return [record['topic'] for method, records in rpc.chunks for record in records]
+
+
+def test_chunks_grow_while_fast():
+    rpc = FakeRPC()
+    datamover = _datamover(rpc)
+    records = _records(1000)
+
+    datamover.publish_to_historian(records)
+
+    assert [len(chunk) for method, chunk in rpc.chunks] == [100, 200, 400, 300]
+    assert all(method == 'insert_compressed' for method, chunk in rpc.chunks)
+    assert _sent(rpc) == [record['topic'] for record in records]
+    assert rpc.chunks[0][1][0] == {'topic': records[0]['topic'], 'headers': records[0]['value']['headers'],
+                                   'message': records[0]['value']['message']}
+    assert datamover._successful_published == set(range(1000))
+
+
+def test_chunks_shrink_when_slow():
+    rpc = FakeRPC(latency=0.05)
+    datamover = _datamover(rpc, target_rpc_latency=0.01)
+
+    datamover.publish_to_historian(_records(200))
+
+    assert [len(chunk) for method, chunk in rpc.chunks][:3] == [100, 50, 25]
+    assert datamover._successful_published == set(range(200))
+
+
+def test_chunks_limited_by_bytes():
+    rpc = FakeRPC()
+    datamover = _datamover(rpc, max_chunk_bytes=1000)
+
+    datamover.publish_to_historian(_records(50))
+
+    assert max(len(chunk) for method, chunk in rpc.chunks) < 50
+    assert _sent(rpc) == [record['topic'] for record in _records(50)]
+
+
+def test_fall_back_to_insert():
+    rpc = FakeRPC(compressed=False)
+    datamover = _datamover(rpc)
+
+    datamover.publish_to_historian(_records(150))
+
+    assert [(method, len(chunk)) for method, chunk in rpc.chunks] == [('insert', 100), ('insert', 50)]
+    assert datamover._successful_published == set(range(150))
+
+
+def test_timeout_reports_sent_chunks(monkeypatch):
+    rpc = FakeRPC(hang_after=1)
+    datamover = _datamover(rpc)
+    monkeypatch.setattr(datamover, "_call_destination",
+                        lambda method, *args: rpc.call("platform.historian", method, *args).get(timeout=0.1))
+
+    datamover.publish_to_historian(_records(300))
+
+    assert datamover._successful_published == set(range(100))
+    assert datamover._target_platform is None
+    assert datamover._last_timeout
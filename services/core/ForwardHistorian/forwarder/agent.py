@@ -56,6 +56,10 @@ from volttron.utils.docs import doc_inherit
 from zmq.green import ZMQError, ENOTSOCK
 
 FORWARD_TIMEOUT_KEY = 'FORWARD_TIMEOUT_KEY'
+# Topic of the messages that carry a batch of forwarded publishes.
+FORWARD_BATCH_TOPIC = 'forwarded/batch'
+# Seconds to wait for the destination to acknowledge a publish.
+PUBLISH_TIMEOUT = 30
 utils.setup_logging()
 _log = logging.getLogger(__name__)
 __version__ = '5.1'
@@ -121,6 +125,9 @@ class ForwardHistorian(BaseHistorian):
                  required_target_agents=[],
                  cache_only=False,
                  destination_address=None,
+                 publish_window=1,
+                 batch_publish=False,
+                 expand_batches=False,
                  **kwargs):
         kwargs["process_loop_in_greenlet"] = True
         super(ForwardHistorian, self).__init__(**kwargs)
@@ -137,6 +144,10 @@ class ForwardHistorian(BaseHistorian):
         self.required_target_agents = required_target_agents
         self.cache_only = cache_only
         self.destination_address = destination_address
+        self.publish_window = publish_window
+        self.batch_publish = batch_publish
+        self.expand_batches = expand_batches
+        self._expanding_batches = False
         config = {
             "custom_topic_list": custom_topic_list,
             "topic_replace_list": self.topic_replace_list,
@@ -144,7 +155,10 @@ class ForwardHistorian(BaseHistorian):
             "destination_vip": self.destination_vip,
             "destination_serverkey": self.destination_serverkey,
             "cache_only": self.cache_only,
-            "destination_address": self.destination_address
+            "destination_address": self.destination_address,
+            "publish_window": self.publish_window,
+            "batch_publish": self.batch_publish,
+            "expand_batches": self.expand_batches
         }
 
         self.update_default_config(config)
@@ -155,6 +169,12 @@ class ForwardHistorian(BaseHistorian):
         self.no_query = True
 
     def configure(self, configuration):
+        publish_window = int(configuration.get('publish_window', 1))
+        if publish_window < 1:
+            raise ValueError("publish_window must be at least 1, got {}".format(publish_window))
+        self.publish_window = publish_window
+        self.batch_publish = bool(configuration.get('batch_publish', False))
+        self.expand_batches = bool(configuration.get('expand_batches', False))
         custom_topic_set = set(configuration.get('custom_topic_list', []))
         self.destination_vip = str(configuration.get('destination_vip', ""))
         self.destination_serverkey = str(configuration.get('destination_serverkey', ""))
@@ -190,6 +210,16 @@ class ForwardHistorian(BaseHistorian):
             except (gevent.Timeout, Exception) as e:
                 _log.error("Failed to unsubscribe from {}: {}".format(prefix, repr(e)))
 
+        if self.expand_batches != self._expanding_batches:
+            method = self.vip.pubsub.subscribe if self.expand_batches else self.vip.pubsub.unsubscribe
+            try:
+                method(peer='pubsub',
+                       prefix=FORWARD_BATCH_TOPIC,
+                       callback=self.expand_batch).get(timeout=5.0)
+                self._expanding_batches = self.expand_batches
+            except (gevent.Timeout, Exception) as e:
+                _log.error("Failed to update subscription to {}: {}".format(FORWARD_BATCH_TOPIC, repr(e)))
+
     # Stop the BaseHistorian from setting the health status
     def _update_status(self, *args, **kwargs):
         pass
@@ -201,31 +231,11 @@ class ForwardHistorian(BaseHistorian):
     def _capture_device_data(self, peer, sender, bus, topic, headers, message):
         parts = topic.split('/')
         device = '/'.join(parts[1:-1])
-        # msg = [{data},{meta}] format
-        msg = [{}, {}]
         try:
             # If the filter is empty pass all data.
             if self._device_data_filter:
-                for _filter, point_list in self._device_data_filter.items():
-                    # If filter is not empty only topics that contain the key
-                    # will be kept.
-                    if _filter in device:
-                        for point in point_list:
-                            # devices all publish
-                            if isinstance(message, list):
-                                # Only points in the point list will be added to the message payload
-                                if point in message[0]:
-                                    msg[0][point] = message[0][point]
-                                    msg[1][point] = message[1][point]
-                            else:
-                                # other devices publish (devices/campus/building/device/point)
-                                msg = None
-                                if point in device:
-                                    msg = message
-                                    # if the point in in the parsed topic then exit for loop
-                                    break
-                if (isinstance(msg, list) and not msg[0]) or \
-                        (isinstance(msg, (float, int, str)) and msg is None):
+                msg = self._filter_device_data(device, message)
+                if msg is None:
                     _log.debug("Topic: {} - is not in configured to be forwarded".format(topic))
                     return
             else:
@@ -324,7 +334,6 @@ class ForwardHistorian(BaseHistorian):
         last_time = self._last_timeout
         _log.debug('Lasttime: {} currenttime: {}'.format(last_time,
                                                          current_time))
-        timeout_occurred = False
         if self._last_timeout:
             # if we failed we need to wait 60 seconds before we go on.
             if self.timestamp() < self._last_timeout + 60:
@@ -357,11 +366,7 @@ class ForwardHistorian(BaseHistorian):
                 return
 
         for x in to_publish_list:
-            topic = x['topic']
-            value = x['value']
-            # payload = jsonapi.loads(value)
-            payload = value
-            headers = payload['headers']
+            headers = x['value']['headers']
             headers['X-Forwarded'] = True
             if 'X-Forwarded-From' in headers:
                 if not isinstance(headers['X-Forwarded-From'], list):
@@ -384,64 +389,148 @@ class ForwardHistorian(BaseHistorian):
                                           self.core.agent_uuid or self.core.identity,
                                           "forwarded")
 
-            if timeout_occurred:
-                _log.error(
-                    'A timeout has occurred so breaking out of publishing')
+        # Up to publish_window publishes are outstanding at the same time,
+        # records are reported handled in the order they are acknowledged.
+        pending = {}
+        state = None
+        for records, topic, headers, message in self._publish_messages(to_publish_list):
+            state = self._wait_for_publishes(pending, handled_records, self.publish_window - 1)
+            if state is not None:
                 break
-            with gevent.Timeout(30):
-                try:
-                    self._target_platform.vip.pubsub.publish(
-                        peer='pubsub',
-                        topic=topic,
-                        headers=headers,
-                        message=payload['message']).get()
-                except gevent.Timeout:
-                    _log.debug("Timeout occurred email should send!")
-                    timeout_occurred = True
-                    self._last_timeout = self.timestamp()
-                    self._num_failures += 1
-                    # Stop the current platform from attempting to
-                    # connect
-                    self.historian_teardown()
-                    self.vip.health.set_status(
-                        STATUS_BAD, "Timeout occured")
-                except Unreachable:
-                    _log.error("Target not reachable. Wait till it's ready!")
-                except ZMQError as exc:
-                    if exc.errno == ENOTSOCK:
-                        # Stop the current platform from attempting to
-                        # connect
-                        _log.error("Target disconnected. Stopping target platform agent")
-                        self.historian_teardown()
-                        self.vip.health.set_status(
-                            STATUS_BAD, "Target platform disconnected")
-                except Exception as e:
-                    err = "Unhandled error publishing to target platfom."
-                    _log.error(err)
-                    _log.error(traceback.format_exc())
-                    self.vip.health.set_status(
-                        STATUS_BAD, err)
-                    # Before returning lets mark any that weren't errors
-                    # as sent.
-                    self.report_handled(handled_records)
-                    return
-                else:
-                    handled_records.append(x)
+            try:
+                result = self._target_platform.vip.pubsub.publish(
+                    peer='pubsub',
+                    topic=topic,
+                    headers=headers,
+                    message=message)
+            except (Unreachable, ZMQError) as exc:
+                state = self._publish_error(exc)
+                if state is not None:
+                    break
+                continue
+            except Exception:
+                state = self._publish_failed()
+                break
+            pending[result] = records
+        if state is None:
+            state = self._wait_for_publishes(pending, handled_records)
 
         _log.debug("handled: {} number of items".format(
-            len(to_publish_list)))
+            len(handled_records)))
         self.report_handled(handled_records)
 
-        if timeout_occurred:
+        if state == 'timeout':
+            _log.error('A timeout has occurred so breaking out of publishing')
             _log.debug('Sending alert from the ForwardHistorian')
             status = Status.from_json(self.vip.health.get_status_json())
             self.vip.health.send_alert(FORWARD_TIMEOUT_KEY,
                                        status)
-        else:
+        elif state is None:
             self.vip.health.set_status(
                 STATUS_GOOD,"published {} items".format(
                     len(to_publish_list)))
 
+    def _publish_messages(self, to_publish_list):
+        """
+        Returns the messages to publish to the destination as
+        (records, topic, headers, message) tuples.
+
+        With batch_publish every group of records with the same Date header is
+        sent as a single message on FORWARD_BATCH_TOPIC. The destination has to
+        run a forwarder with expand_batches enabled to publish the records of a
+        batch again.
+        """
+        if not self.batch_publish:
+            return [([x], x['topic'], x['value']['headers'], x['value']['message'])
+                    for x in to_publish_list]
+
+        groups = {}
+        for x in to_publish_list:
+            groups.setdefault(x['value']['headers'].get(headers_mod.DATE), []).append(x)
+
+        messages = []
+        for timestamp, records in groups.items():
+            headers = {'X-Forwarded': True, 'X-Forwarded-From': self.instance_name}
+            if timestamp is not None:
+                headers[headers_mod.DATE] = timestamp
+            message = [[x['topic'], x['value']['headers'], x['value']['message']] for x in records]
+            messages.append((records, FORWARD_BATCH_TOPIC, headers, message))
+        return messages
+
+    def _wait_for_publishes(self, pending, handled_records, remaining=0):
+        """
+        Waits until at most remaining publishes are outstanding and adds the
+        records of the acknowledged ones to handled_records.
+
+        Returns None, or 'timeout' or 'error' when forwarding has to stop.
+        """
+        while len(pending) > remaining:
+            done = gevent.wait(list(pending), timeout=PUBLISH_TIMEOUT, count=1)
+            if not done:
+                _log.debug("Timeout occurred email should send!")
+                self._last_timeout = self.timestamp()
+                self._num_failures += 1
+                # Stop the current platform from attempting to
+                # connect
+                self.historian_teardown()
+                self.vip.health.set_status(
+                    STATUS_BAD, "Timeout occured")
+                return 'timeout'
+            for result in done:
+                records = pending.pop(result)
+                try:
+                    result.get()
+                except (Unreachable, ZMQError) as exc:
+                    state = self._publish_error(exc)
+                    if state is not None:
+                        return state
+                except Exception:
+                    return self._publish_failed()
+                else:
+                    handled_records.extend(records)
+        return None
+
+    def _publish_error(self, exc):
+        """
+        Handles a publish that failed with Unreachable or ZMQError. The
+        records of the publish are not reported handled.
+
+        Returns None to go on with the next publish, or 'error' when the
+        target disconnected.
+        """
+        if isinstance(exc, Unreachable):
+            _log.error("Target not reachable. Wait till it's ready!")
+            return None
+        if exc.errno != ENOTSOCK:
+            _log.error("Error publishing to target platform: {}".format(exc))
+            return None
+        # Stop the current platform from attempting to
+        # connect
+        _log.error("Target disconnected. Stopping target platform agent")
+        self.historian_teardown()
+        self.vip.health.set_status(
+            STATUS_BAD, "Target platform disconnected")
+        return 'error'
+
+    def _publish_failed(self):
+        err = "Unhandled error publishing to target platfom."
+        _log.error(err)
+        _log.error(traceback.format_exc())
+        self.vip.health.set_status(
+            STATUS_BAD, err)
+        return 'error'
+
+    def expand_batch(self, peer, sender, bus, topic, headers, message):
+        """
+        Publishes the records of a batch received from a forwarder with
+        batch_publish enabled on the local message bus.
+        """
+        for record_topic, record_headers, record_message in message:
+            self.vip.pubsub.publish(peer='pubsub',
+                                    topic=record_topic,
+                                    headers=record_headers,
+                                    message=record_message)
+
     @doc_inherit
     def historian_setup(self):
         _log.debug("Setting up to forward to {}".format(self.destination_vip))
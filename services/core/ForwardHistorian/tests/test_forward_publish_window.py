@@ -0,0 +1,159 @@
+from errno import EAGAIN, EHOSTUNREACH, ENOTSOCK
+
+import gevent
+import pytest
+from gevent.event import AsyncResult
+from mock import MagicMock
+from zmq import ZMQError
+
+from volttron.platform.messaging.health import STATUS_BAD, Status
+from volttron.platform.vip.agent import Unreachable
+from forwarder import agent
+from forwarder.agent import FORWARD_BATCH_TOPIC, FORWARD_TIMEOUT_KEY, ForwardHistorian
+
+
+class FakePubSub(object):
+    """Acknowledges publishes after a delay, later publishes first."""
+    def __init__(self, ack=True, errors=None):
+        self.ack = ack
+        # Publish number -> exception raised by the publish call.
+        self.errors = errors or {}
+        self.published = []
+        self.outstanding = 0
+        self.max_outstanding = 0
+
+    def publish(self, peer, topic, headers=None, message=None):
+        error = self.errors.get(len(self.published))
+        self.published.append((topic, headers, message))
+        if error is not None:
+            raise error
+        result = AsyncResult()
+        self.outstanding += 1
+        self.max_outstanding = max(self.max_outstanding, self.outstanding)
+        if self.ack:
+            gevent.spawn_later(0.05 / len(self.published), self._acknowledge, result)
+        return result
+
+    def _acknowledge(self, result):
+        self.outstanding -= 1
+        result.set(1)
+
+
+def _forwarder(pubsub, publish_window=1, batch_publish=False):
+    forwarder = ForwardHistorian.__new__(ForwardHistorian)
+    forwarder.cache_only = False
+    forwarder.core = MagicMock(address="tcp://127.0.0.1:22916")
+    forwarder.vip = MagicMock()
+    forwarder.destination_vip = "tcp://127.0.0.1:22917"
+    forwarder.required_target_agents = []
+    forwarder.instance_name = "source"
+    forwarder.gather_timing_data = False
+    forwarder.publish_window = publish_window
+    forwarder.batch_publish = batch_publish
+    forwarder._last_timeout = 0
+    forwarder._num_failures = 0
+    forwarder._successful_published = set()
+    forwarder._target_platform = MagicMock()
+    forwarder._target_platform.vip.pubsub = pubsub
+    return forwarder
+
+
+def _records(count, devices=1):
+    return [{'_id': n,
+             'topic': "devices/campus/device{}/all".format(n % devices),
+             'value': {'headers': {'Date': "2021-01-01T00:00:{:02d}".format(n // devices)},
+                       'message': [{'point': n}, {'point': {'units': 'F'}}]}}
+            for n in range(count)]
+
+
+def test_publish_window_limits_outstanding_publishes():
+    pubsub = FakePubSub()
+    forwarder = _forwarder(pubsub, publish_window=4)
+
+    forwarder.publish_to_historian(_records(10))
+
+    assert pubsub.max_outstanding == 4
+    assert len(pubsub.published) == 10
+    assert forwarder._successful_published == set(range(10))
+    topic, headers, message = pubsub.published[0]
+    assert headers['X-Forwarded'] and headers['X-Forwarded-From'] == "source"
+
+
+def test_default_window_publishes_one_at_a_time():
+    pubsub = FakePubSub()
+    forwarder = _forwarder(pubsub)
+
+    forwarder.publish_to_historian(_records(3))
+
+    assert pubsub.max_outstanding == 1
+    assert forwarder._successful_published == {0, 1, 2}
+
+
+def test_batch_publish_groups_records_by_timestamp():
+    pubsub = FakePubSub()
+    forwarder = _forwarder(pubsub, publish_window=2, batch_publish=True)
+    records = _records(6, devices=3)
+
+    forwarder.publish_to_historian(records)
+
+    assert [topic for topic, headers, message in pubsub.published] == [FORWARD_BATCH_TOPIC] * 2
+    topic, headers, message = pubsub.published[0]
+    assert headers['Date'] == "2021-01-01T00:00:00"
+    assert [record_topic for record_topic, record_headers, record_message in message] == \
+        ["devices/campus/device0/all", "devices/campus/device1/all", "devices/campus/device2/all"]
+    assert forwarder._successful_published == set(range(6))
+
+    receiver = _forwarder(FakePubSub())
+    receiver.expand_batch("pubsub", "forwarder", "", topic, headers, message)
+    assert receiver.vip.pubsub.publish.call_count == 3
+    assert receiver.vip.pubsub.publish.call_args_list[0][1] == {
+        'peer': 'pubsub', 'topic': "devices/campus/device0/all",
+        'headers': records[0]['value']['headers'], 'message': records[0]['value']['message']}
+
+
+def test_timeout_stops_publishing(monkeypatch):
+    monkeypatch.setattr(agent, "PUBLISH_TIMEOUT", 0.1)
+    pubsub = FakePubSub(ack=False)
+    forwarder = _forwarder(pubsub, publish_window=3)
+    forwarder.vip.health.get_status_json.return_value = Status.build(STATUS_BAD, "Timeout occured").as_json()
+    target = forwarder._target_platform
+
+    forwarder.publish_to_historian(_records(10))
+
+    assert len(pubsub.published) == 3
+    assert forwarder._successful_published == set()
+    assert forwarder._target_platform is None
+    target.core.stop.assert_called_once()
+    assert forwarder.vip.health.send_alert.call_args[0][0] == FORWARD_TIMEOUT_KEY
+
+
+@pytest.mark.parametrize("error", [Unreachable(EHOSTUNREACH, "Unreachable", "pubsub", "pubsub"), ZMQError(EAGAIN)])
+def test_publish_error_skips_record(error):
+    pubsub = FakePubSub(errors={1: error})
+    forwarder = _forwarder(pubsub, publish_window=2)
+    target = forwarder._target_platform
+
+    forwarder.publish_to_historian(_records(4))
+
+    assert len(pubsub.published) == 4
+    assert forwarder._successful_published == {0, 2, 3}
+    assert forwarder._target_platform is target
+
+
+def test_publish_on_closed_socket_tears_down_target():
+    pubsub = FakePubSub(errors={1: ZMQError(ENOTSOCK)})
+    forwarder = _forwarder(pubsub, publish_window=2)
+    target = forwarder._target_platform
+
+    forwarder.publish_to_historian(_records(4))
+
+    assert len(pubsub.published) == 2
+    assert forwarder._target_platform is None
+    target.core.stop.assert_called_once()
+    forwarder.vip.health.set_status.assert_called_with(STATUS_BAD, "Target platform disconnected")
+
+
+def test_publish_window_must_be_positive():
+    forwarder = _forwarder(FakePubSub())
+    with pytest.raises(ValueError):
+        forwarder.configure({"publish_window": 0})
@@ -45,9 +45,10 @@ from collections import OrderedDict
 import pymongo
 import re
 from pkg_resources import resource_string, resource_exists
+from pymongo import UpdateOne
 from pymongo.errors import BulkWriteError
 from volttron.platform.agent import utils
-from volttron.platform.agent.base_tagging import BaseTaggingService
+from volttron.platform.agent.base_tagging import BaseTaggingService, TagIndex
 from volttron.platform.dbutils import mongoutils
 from volttron.platform.messaging.health import (STATUS_BAD, Status)
 from volttron.utils.docs import doc_inherit
@@ -88,6 +89,15 @@ def tagging_service(config_path, **kwargs):
     return MongodbTaggingService(**kwargs)
 
 
+class MongodbTagIndex(TagIndex):
+    """
+    Tag index that matches tag values like the queries of
+    :py:meth:`MongodbTaggingService.query_topics_by_tags`: != also matches
+    topic prefixes without the tag and LIKE is case sensitive.
+    """
+    ne_matches_missing = True
+
+
 class MongodbTaggingService(BaseTaggingService):
     """This is a tagging service agent that writes data to a Mongo database.
     For instance with large amount of tags and frequent tag queries, a NOSQL 
@@ -201,6 +211,24 @@ class MongodbTaggingService(BaseTaggingService):
             self.tag_refs[record['_id']] = record['parent']
         _log.debug("After load tag_refs is {}".format(self.tag_refs))
 
+    @doc_inherit
+    def load_tag_index(self):
+        tag_index = MongodbTagIndex(self.tag_refs)
+        self._read_topic_tags(tag_index, {})
+        _log.info("Loaded tags of {} topic prefixes into the tag "
+                  "index".format(len(tag_index)))
+        return tag_index
+
+    def _read_topic_tags(self, tag_index, query):
+        db = self._client.get_default_database()
+        cursor = db[self.topic_tags_collection].find(query)
+        try:
+            for record in cursor:
+                topic_prefix = record.pop('_id')
+                tag_index.set_tags(topic_prefix, record)
+        finally:
+            cursor.close()
+
     def _init_tags(self, db):
         file_path = self.resource_sub_dir+'/tags.csv'
         _log.debug("Loading file :" + file_path)
@@ -370,11 +398,11 @@ class MongodbTaggingService(BaseTaggingService):
     @doc_inherit
     def insert_topic_tags(self, tags, update_version=False):
         db = self._client.get_default_database()
-        bulk = db[self.topic_tags_collection].initialize_unordered_bulk_op()
+        requests = []
+        written = []
         result = dict()
         result['info'] = dict()
         result['error'] = dict()
-        execute = False
         for topic_pattern, topic_tags in tags.items():
             for tag_name, tag_value in topic_tags.items():
                 if tag_name not in self.valid_tags:
@@ -399,9 +427,9 @@ class MongodbTaggingService(BaseTaggingService):
                 temp = topic_tags.copy()
                 temp['_id'] = prefix
                 temp['id'] = prefix
-                execute = True
-                bulk.find({'_id': prefix}).upsert().update_one(
-                    {'$set': temp})
+                requests.append(UpdateOne({'_id': prefix}, {'$set': temp},
+                                          upsert=True))
+                written.append(prefix)
                 result['info'][topic_pattern].append(prefix)
             if len(result['info'][topic_pattern]) == 1 and \
                 topic_pattern == result['info'][topic_pattern][0]:
@@ -411,15 +439,19 @@ class MongodbTaggingService(BaseTaggingService):
                 _log.debug("topic passed is exact name. Not pattern. Removing"
                            " from result info: {}".format(topic_pattern))
                 result['info'].pop(topic_pattern)
-        if execute:
+        if requests:
             try:
-                bulk.execute()
+                db[self.topic_tags_collection].bulk_write(requests,
+                                                          ordered=False)
             except BulkWriteError as bwe:
                 errors = bwe.details['writeErrors']
                 _log.error("bwe error count {}".format(len(errors)))
                 for e in errors:
                     _log.error(e['op'])
                     result['error'][e['op']['q']['_id']] = e['errmsg']
+            if self.tag_index is not None:
+                self._read_topic_tags(self.tag_index, {
+                    '_id': {'$in': written}})
 
         return result
 
@@ -488,6 +520,8 @@ class MongodbTaggingService(BaseTaggingService):
         order_by = 1
         if order == 'LAST_TO_FIRST':
             order_by = -1
+        if self.tag_index is not None:
+            return self.tag_index.query(ast, skip_count, count, order)
         sub_queries = list()
         find_cond = mongoutils.get_tagging_queries_from_ast(ast,
                                                             self.tag_refs,
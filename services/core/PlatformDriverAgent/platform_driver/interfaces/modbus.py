@@ -36,28 +36,112 @@
 # under Contract DE-AC05-76RL01830
 # }}}
 
+import math
 import struct
 import logging
+import select
+import time
 
 from gevent import monkey
 monkey.patch_socket()
 
 from pymodbus.client.sync import ModbusTcpClient as SyncModbusClient  
 from pymodbus.exceptions import ConnectionException, ModbusIOException, ModbusException
-from pymodbus.pdu import ExceptionResponse
+from pymodbus.pdu import ExceptionResponse, ModbusExceptions
 from pymodbus.constants import Defaults
 
-from contextlib import contextmanager, closing
+from contextlib import contextmanager
+from gevent.lock import Semaphore
 
 from platform_driver.driver_locks import socket_lock
 from platform_driver.interfaces import BaseInterface, BaseRegister, BasicRevert, DriverInterfaceError
 from volttron.platform.agent import utils
 
-@contextmanager
+
+# Pooled connections unused for this many seconds are closed.
+CONNECTION_IDLE_TIMEOUT = 60.0
+
+
+class PooledConnection(object):
+    """A SyncModbusClient kept open between requests to the same gateway."""
+    def __init__(self, address, port):
+        self.client = SyncModbusClient(address, port)
+        # pymodbus clients are not safe to share between concurrent requests.
+        self.lock = Semaphore()
+        self.last_used = time.monotonic()
+
+    def is_healthy(self):
+        """
+        Health check done before a pooled connection is reused. A connection with nothing to read is healthy, a
+        readable socket means the gateway closed it or left unsolicited data behind.
+        """
+        sock = self.client.socket
+        if sock is None:
+            return True
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def close(self):
+        self.client.close()
+
+
+class ModbusConnectionPool(object):
+    """
+    Keeps one connection per (address, port) so all Interface instances talking to the same gateway share a single
+    TCP connection instead of opening one per request. Requests on a connection are serialized and hold the
+    platform driver socket_lock while in use.
+    """
+    def __init__(self, idle_timeout=CONNECTION_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._connections = {}
+
+    @contextmanager
+    def connection(self, address, port):
+        key = (address, port)
+        pooled = self._connections.get(key)
+        if pooled is None:
+            pooled = self._connections[key] = PooledConnection(address, port)
+
+        with pooled.lock:
+            with socket_lock():
+                if time.monotonic() - pooled.last_used > self.idle_timeout or not pooled.is_healthy():
+                    # The client reconnects on its next request.
+                    pooled.close()
+                try:
+                    yield pooled.client
+                except ModbusExceptionResponseError:
+                    # The device answered, the connection is fine.
+                    raise
+                except (ConnectionException, ModbusIOException, ModbusInterfaceException, OSError):
+                    # Reconnect on the next request instead of reusing a broken connection.
+                    pooled.close()
+                    raise
+                finally:
+                    pooled.last_used = time.monotonic()
+
+        self.close_idle()
+
+    def close_idle(self):
+        """Close connections that have not been used within the idle timeout."""
+        now = time.monotonic()
+        for pooled in self._connections.values():
+            if now - pooled.last_used > self.idle_timeout and not pooled.lock.locked():
+                pooled.close()
+
+    def close(self):
+        for pooled in self._connections.values():
+            pooled.close()
+        self._connections.clear()
+
+
+_connection_pool = ModbusConnectionPool()
+
+
 def modbus_client(address, port):
-    with socket_lock():
-        with closing(SyncModbusClient(address, port)) as client:
-            yield client
+    return _connection_pool.connection(address, port)
 
 
 modbus_logger = logging.getLogger("pymodbus")
@@ -75,6 +159,13 @@ class ModbusInterfaceException(ModbusException):
     pass
 
 
+class ModbusExceptionResponseError(ModbusInterfaceException):
+    """Raised when the device answers a read with an exception response."""
+    def __init__(self, exception_code):
+        super(ModbusExceptionResponseError, self).__init__("Exception response code {}".format(exception_code))
+        self.exception_code = exception_code
+
+
 class ModbusRegisterBase(BaseRegister):
     def __init__(self, address, register_type, read_only, pointName, units, description='', slave_id=0):
         super(ModbusRegisterBase, self).__init__(register_type, read_only, pointName, units, description=description)
@@ -111,7 +202,7 @@ class ModbusBitRegister(ModbusRegisterBase):
             if response is None:
                 raise ModbusInterfaceException("pymodbus returned None")
             if isinstance(response, ExceptionResponse):
-                raise ModbusInterfaceException(str(response))
+                raise ModbusExceptionResponseError(response.exception_code)
             return response.value
         return None
 
@@ -198,6 +289,8 @@ class Interface(BasicRevert, BaseInterface):
         self.slave_id = config_dict.get("slave_id", 0)
         self.ip_address = config_dict["device_address"]
         self.port = config_dict.get("port", Defaults.Port)
+        # Largest number of unused addresses read through to combine registers into one request.
+        self.max_register_gap = int(config_dict.get("max_register_gap", 0))
         self.parse_config(registry_config_str) 
         
     def build_ranges_map(self):
@@ -205,49 +298,84 @@ class Interface(BasicRevert, BaseInterface):
                                 ('byte', False): [],
                                 ('bit', True): [],
                                 ('bit', False): []}
+        # (start, end, register) of every inserted register, used to plan register_ranges.
+        self.point_ranges = {key: [] for key in self.register_ranges}
+        # Addresses inside gaps that the device refused to read. Gaps containing them are never read through.
+        self.unreadable_addresses = {key: set() for key in self.register_ranges}
+        self.max_register_gap = 0
         
     def insert_register(self, register):
         super(Interface, self).insert_register(register)
 
         # MODBUS requires extra bookkeeping.
         register_type = register.get_register_type()
-        register_range = self.register_ranges[register_type]
         register_count = register.get_register_count()
 
         # Store the range of registers for each point.
         start, end = register.address, register.address + register_count - 1
-        register_range.append([start, end, [register]])
+        self.point_ranges[register_type].append((start, end, register))
 
     def merge_register_ranges(self):
         """
-        Merges any adjacent registers for more efficient scraping. May only be called after all registers have been
-        inserted."""
-        for key, register_ranges in self.register_ranges.items():
-            if not register_ranges:
-                continue
-            register_ranges.sort()
-            result = []
-            current = register_ranges[0]
-            for register_range in register_ranges[1:]:
-                if register_range[0] > current[1] + 1:
-                    result.append(current)
-                    current = register_range
+        Merges adjacent registers, and registers separated by at most max_register_gap unused addresses, for more
+        efficient scraping. May only be called after all registers have been inserted."""
+        for key, point_ranges in self.point_ranges.items():
+            self.register_ranges[key] = self.plan_register_ranges(point_ranges, self.unreadable_addresses[key])
+
+    def plan_register_ranges(self, point_ranges, unreadable_addresses):
+        """
+        Combines point ranges into [start, end, registers] ranges to read. A gap between two ranges is read through
+        when it is no larger than max_register_gap, contains no unreadable address and does not add a request
+        after splitting into MODBUS_READ_MAX sized reads.
+        """
+        # Contiguous blocks first so a gap is judged against the full size of the blocks on both sides.
+        blocks = []
+        for start, end, register in sorted(point_ranges, key=lambda point_range: point_range[:2]):
+            if blocks and start <= blocks[-1][1] + 1:
+                blocks[-1][1] = max(blocks[-1][1], end)
+                blocks[-1][2].append(register)
+            else:
+                blocks.append([start, end, [register]])
+
+        result = []
+        for block in blocks:
+            if result:
+                current = result[-1]
+                if block[0] - current[1] - 1 <= self.max_register_gap and \
+                        self._can_bridge(current, block[0], block[1], unreadable_addresses):
+                    current[1] = block[1]
+                    current[2].extend(block[2])
                     continue
+            result.append(block)
+        return result
 
-                current[1] = register_range[1]
-                current[2].extend(register_range[2])
+    @staticmethod
+    def _can_bridge(current, start, end, unreadable_addresses):
+        if any(address in unreadable_addresses for address in range(current[1] + 1, start)):
+            return False
 
-            result.append(current)
+        def requests(count):
+            return math.ceil(count / MODBUS_READ_MAX)
 
-            self.register_ranges[key] = result
+        merged = requests(max(current[1], end) - current[0] + 1)
+        return merged <= requests(current[1] - current[0] + 1) + requests(end - start + 1)
+
+    @staticmethod
+    def _range_gaps(register_range):
+        """Addresses in a register range that are not part of any of its registers."""
+        start, end, registers = register_range
+        covered = set()
+        for register in registers:
+            covered.update(range(register.address, register.address + register.get_register_count()))
+        return [address for address in range(start, end + 1) if address not in covered]
 
     def get_point(self, point_name):
         register = self.get_register_by_name(point_name)
-        with modbus_client(self.ip_address, self.port) as client:
-            try:
+        try:
+            with modbus_client(self.ip_address, self.port) as client:
                 result = register.get_state(client)
-            except (ConnectionException, ModbusIOException, ModbusInterfaceException):
-                result = None
+        except (ConnectionException, ModbusIOException, ModbusInterfaceException):
+            result = None
         return result
     
     def _set_point(self, point_name, value):    
@@ -255,82 +383,99 @@ class Interface(BasicRevert, BaseInterface):
         if register.read_only:
             raise  IOError("Trying to write to a point configured read only: "+point_name)
 
-        with modbus_client(self.ip_address, self.port) as client:
-            try:
+        try:
+            with modbus_client(self.ip_address, self.port) as client:
                 result = register.set_state(client, value)
-            except (ConnectionException, ModbusIOException, ModbusInterfaceException) as ex:
-                raise IOError("Error encountered trying to write to point {}: {}".format(point_name, ex))
+        except (ConnectionException, ModbusIOException, ModbusInterfaceException) as ex:
+            raise IOError("Error encountered trying to write to point {}: {}".format(point_name, ex))
         return result
     
     def scrape_byte_registers(self, client, read_only):
-        result_dict = {}
-        register_ranges = self.register_ranges[('byte', read_only)]
-
         read_func = client.read_input_registers if read_only else client.read_holding_registers
 
-        for register_range in register_ranges:
-            start, end, registers = register_range
-            result = b''
-
-            for group in range(start, end + 1, MODBUS_READ_MAX):
-                count = min(end - group + 1, MODBUS_READ_MAX)
-                response = read_func(group, count, unit=self.slave_id)
-                if response is None:
-                    raise ModbusInterfaceException("pymodbus returned None")
-                if isinstance(response, ModbusException):
-                    raise response
-                response_bytes = response.encode()
-                # Trim off length byte.
-                result += response_bytes[1:]
-
-            for register in registers:
-                point = register.point_name
-                value = register.parse_value(start, result)
-                result_dict[point] = value
+        def read(address, count):
+            response = self._check_response(read_func(address, count, unit=self.slave_id))
+            # Trim off length byte.
+            return response.encode()[1:]
 
-        return result_dict
+        return self.scrape_ranges(('byte', read_only), read)
     
     def scrape_bit_registers(self, client, read_only):
+        read_func = client.read_discrete_inputs if read_only else client.read_coils
+
+        def read(address, count):
+            response = self._check_response(read_func(address, count, unit=self.slave_id))
+            # Bits are padded to a whole byte.
+            return response.bits[:count]
+
+        return self.scrape_ranges(('bit', read_only), read)
+
+    @staticmethod
+    def _check_response(response):
+        if response is None:
+            raise ModbusInterfaceException("pymodbus returned None")
+        if isinstance(response, ModbusException):
+            raise response
+        if isinstance(response, ExceptionResponse):
+            raise ModbusExceptionResponseError(response.exception_code)
+        return response
+
+    @staticmethod
+    def read_range(read, start, end):
+        """Reads a register range in MODBUS_READ_MAX sized requests and returns the combined result."""
+        result = None
+        for group in range(start, end + 1, MODBUS_READ_MAX):
+            count = min(end - group + 1, MODBUS_READ_MAX)
+            data = read(group, count)
+            result = data if result is None else result + data
+        return result
+
+    def scrape_ranges(self, key, read):
+        """
+        Reads every range of register_ranges[key]. A range that reads through gaps and is refused with an illegal
+        address exception response has its gap addresses marked unreadable and its registers are read again
+        without the gaps. The ranges are planned again afterwards so later scrapes skip those gaps.
+        """
         result_dict = {}
-        register_ranges = self.register_ranges[('bit', read_only)]
-
-        for register_range in register_ranges:
-            start, end, registers = register_range
-            if not registers:
-                return result_dict
-
-            result = []
-
-            for group in range(start, end + 1, MODBUS_READ_MAX):
-                count = min(end - group + 1, MODBUS_READ_MAX)
-                response = client.read_discrete_inputs(group, count, unit=self.slave_id) if read_only else \
-                    client.read_coils(group, count, unit=self.slave_id)
-                if response is None:
-                    raise ModbusInterfaceException("pymodbus returned None")
-                if isinstance(response, ModbusException):
-                    raise response
-                result += response.bits
-
-            for register in registers:
-                point = register.point_name
-                value = register.parse_value(start, result)
-                result_dict[point] = value
-            
+        replan = False
+
+        for register_range in self.register_ranges[key]:
+            try:
+                ranges = [(register_range, self.read_range(read, register_range[0], register_range[1]))]
+            except ModbusExceptionResponseError as e:
+                gaps = self._range_gaps(register_range)
+                if e.exception_code != ModbusExceptions.IllegalAddress or not gaps:
+                    raise
+                _log.info("Device at {}:{} ID: {} refused to read addresses {}. No longer reading through them."
+                          .format(self.ip_address, self.port, self.slave_id, gaps))
+                self.unreadable_addresses[key].update(gaps)
+                replan = True
+                point_ranges = [(register.address, register.address + register.get_register_count() - 1, register)
+                                for register in register_range[2]]
+                ranges = [(split_range, self.read_range(read, split_range[0], split_range[1]))
+                          for split_range in self.plan_register_ranges(point_ranges, self.unreadable_addresses[key])]
+
+            for (start, end, registers), result in ranges:
+                for register in registers:
+                    result_dict[register.point_name] = register.parse_value(start, result)
+
+        if replan:
+            self.merge_register_ranges()
+
         return result_dict
         
     def _scrape_all(self):
         result_dict = {}
-        with modbus_client(self.ip_address, self.port) as client:
-            try:
-                
+        try:
+            with modbus_client(self.ip_address, self.port) as client:
                 result_dict.update(self.scrape_byte_registers(client, True))
                 result_dict.update(self.scrape_byte_registers(client, False))
-                
+
                 result_dict.update(self.scrape_bit_registers(client, True))
                 result_dict.update(self.scrape_bit_registers(client, False))
-            except (ConnectionException, ModbusIOException, ModbusInterfaceException) as e:
-                raise DriverInterfaceError("Failed to scrape device at " + self.ip_address + ":" + str(self.port) +
-                                           " ID: " + str(self.slave_id) + str(e))
+        except (ConnectionException, ModbusIOException, ModbusInterfaceException) as e:
+            raise DriverInterfaceError("Failed to scrape device at " + self.ip_address + ":" + str(self.port) +
+                                       " ID: " + str(self.slave_id) + str(e))
                 
         return result_dict
     
@@ -64,7 +64,8 @@ parity_map = dict(
 )
 
 config_keys = ["name", "device_type", "device_address", "port", "slave_id", "baudrate", "bytesize", "parity",
-               "stopbits", "xonxoff", "addressing", "endian", "write_multiple_registers", "register_map"]
+               "stopbits", "xonxoff", "addressing", "endian", "write_multiple_registers", "register_map",
+               "max_register_gap"]
 
 register_map_columns = ["register name", "address", "type", "units", "writable", "default value", "transform", "table",
                         "mixed endian", "description"]
@@ -265,6 +266,7 @@ class Interface(BasicRevert, BaseInterface):
         addressing = config_dict.get('addressing', helpers.OFFSET).lower()
         endian = config_dict.get('endian', 'big')
         write_single_values = not helpers.str2bool(str(config_dict.get('write_multiple_registers', "True")))
+        max_register_gap = int(config_dict.get('max_register_gap', 0))
 
         # Convert original modbus csv config format to the new modbus_tk registry_config_lst
         if registry_config_lst and 'point address' in registry_config_lst[0]:
@@ -315,7 +317,8 @@ class Interface(BasicRevert, BaseInterface):
         self.modbus_client = modbus_client_class(device_address=device_address,
                                                  port=port,
                                                  slave_address=slave_address,
-                                                 write_single_values=write_single_values)
+                                                 write_single_values=write_single_values,
+                                                 max_register_gap=max_register_gap)
 
         # Set modbus client transport based on device configure
         if port:
@@ -346,6 +346,8 @@ class Request:
         self._count = 0
         self._data_format = first_field.byte_order or data_format
         self._fields = list()
+        # Unused addresses read through between fields.
+        self._gaps = list()
 
         self.add_field(first_field)
 
@@ -392,6 +394,10 @@ class Request:
     def table(self):
         return self._table
 
+    @property
+    def gaps(self):
+        return self._gaps
+
     @property
     def read_function_code(self):
         """Returns a modbus read function code appropriate for the table."""
@@ -435,10 +441,19 @@ class Request:
         else:
             return None
 
-    def able_to_add(self, field):
+    def able_to_add(self, field, max_gap=0, unreadable_addresses=()):
+        """
+        Returns True if field can be read by this request. Register fields up to max_gap addresses after the end of
+        the request are accepted unless an address in between is known to be unreadable. Coil results are
+        positional so coils are only combined when contiguous.
+        """
+        gap = field.address - self._next_address
+        if gap and self._table not in (helpers.REGISTER_READ_WRITE, helpers.REGISTER_READ_ONLY):
+            return False
         return self._table == field.table and \
-           self._next_address == field.address and \
-           self._count + math.ceil(struct.calcsize(field.format_string) / 2.0) < 124 and \
+           0 <= gap <= max_gap and \
+           not any(address in unreadable_addresses for address in range(self._next_address, field.address)) and \
+           self._count + gap + math.ceil(struct.calcsize(field.format_string) / 2.0) < 124 and \
            field.length == 1 and not field.byte_order and \
            not field.is_struct_format
 
@@ -448,6 +463,13 @@ class Request:
 
         :return:
         """
+        gap = field.address - self._next_address
+        if gap > 0:
+            # Skip the unused registers with struct pad bytes.
+            self._data_format += '{}x'.format(gap * 2)
+            self._count += gap
+            self._gaps.extend(range(self._next_address, field.address))
+            self._next_address = field.address
         struct_format = field.format_string
         struct_size = struct.calcsize(struct_format)
         if struct_size % 2 == 1:
@@ -488,7 +510,7 @@ class Request:
         return field_values
 
     @classmethod
-    def compile_requests(cls, fields, byte_order):
+    def compile_requests(cls, fields, byte_order, max_gap=0, unreadable_addresses=()):
         """
 
         Creates a set of Modbus requests for the fields provided.  The fields
@@ -499,6 +521,8 @@ class Request:
 
         :param fields: List of fields sorted by address.
         :param byte_order: Byte order of the modbus slave.
+        :param max_gap: Largest number of unused registers read through to combine fields. Only for reads.
+        :param unreadable_addresses: Addresses that must not be read through.
         :return: List of Requests
         """
         requests = list()
@@ -514,7 +538,7 @@ class Request:
         for f in fields:
             # Decide if we need to start a new request
 
-            if current_request is None or not current_request.able_to_add(f):
+            if current_request is None or not current_request.able_to_add(f, max_gap, unreadable_addresses):
                 current_request = Request(f, data_format=byte_order)
                 requests.append(current_request)
                 if f.is_struct_format or f.is_array_field:
@@ -576,6 +600,7 @@ class Client:
         :param timeout_in_sec: Time to wait for a response from the slave.
         :param verbose:
         :param write_single_values: Write registers or coils one value at a time (WRITE_SINGLE_REGISTER, etc.).
+        :param max_register_gap: Largest number of unused registers read through to combine fields into one request.
         :return:
         """
         # Build up metadata dictionaries from the Fields defined on the class
@@ -595,6 +620,11 @@ class Client:
         # Some modbus clients do not support the WRITE_MULTIPLE_REGISTERS function call.
         self._write_single_values = kwargs.pop('write_single_values', False)
 
+        self.max_register_gap = int(kwargs.pop('max_register_gap', 0))
+        # Register addresses refused by the slave. Read requests never read through them.
+        self._unreadable_addresses = set()
+        self._plan_requests()
+
         baud = kwargs.pop('baudrate', 19200)
         bytesize = kwargs.pop('bytesize', 8)
         parity = kwargs.pop('parity', 'N')
@@ -647,8 +677,18 @@ class Client:
     def has_pending_writes(self):
         return bool(self._pending_writes)
 
+    def _plan_requests(self):
+        """Compile the read requests of this client, reading through gaps if max_register_gap is set."""
+        if self.max_register_gap:
+            self._requests = Request.compile_requests(list(self.__meta[helpers.META_FIELDS]), self.byte_order,
+                                                      self.max_register_gap, self._unreadable_addresses)
+            self._request_map = {field: request for request in self._requests for field in request.fields}
+        else:
+            self._requests = self.__meta[helpers.META_REQUESTS]
+            self._request_map = self.__meta[helpers.META_REQUEST_MAP]
+
     def requests(self):
-        return self.__meta[helpers.META_REQUESTS]
+        return self._requests
 
     def fields(self):
         return self.__meta[helpers.META_FIELDS]
@@ -668,7 +708,7 @@ class Client:
         return self._write_single_values
 
     def get_request(self, field):
-        return self.__meta[helpers.META_REQUEST_MAP].get(field, None)
+        return self._request_map.get(field, None)
 
     def read_request(self, request):
         logger.debug("Requesting: %s", request)
@@ -683,13 +723,23 @@ class Client:
             )
             self._data.update(request.parse_values(results))
         except (AttributeError, ModbusError) as err:
+            if isinstance(err, ModbusError) and request.gaps and \
+                    err.get_exception_code() == modbus_constants.ILLEGAL_DATA_ADDRESS:
+                # Stop reading through the gaps of this request and read its fields again.
+                logger.info("Slave refused to read addresses %s. No longer reading through them.", request.gaps)
+                self._unreadable_addresses.update(request.gaps)
+                self._plan_requests()
+                for retry in sorted({self.get_request(field) for field in request.fields}, key=lambda r: r.address):
+                    self.read_request(retry)
+                return
             if "Exception code" in err.message:
                 raise Exception("{0}: {1}".format(err.message,
                                                   helpers.TABLE_EXCEPTION_CODE.get(err.message[-1], "UNDEFINED")))
             logger.warning("modbus read_all() failure on request: %s\tError: %s", request, err)
 
     def read_all(self):
-        requests = self.__meta[helpers.META_REQUESTS]
+        # read_request may plan new requests, iterate over the current ones.
+        requests = list(self._requests)
         self._data.clear()
         for r in requests:
             self.read_request(r)
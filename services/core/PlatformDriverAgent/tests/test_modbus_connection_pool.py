@@ -0,0 +1,114 @@
+import gevent
+import pytest
+from gevent.event import Event
+from gevent.lock import DummySemaphore
+from gevent.server import StreamServer
+from pymodbus.exceptions import ConnectionException
+
+from platform_driver import driver_locks
+from platform_driver.interfaces.modbus import ModbusConnectionPool, ModbusExceptionResponseError
+
+
+class GatewayServer(object):
+    """TCP server that accepts connections and keeps them open until dropped."""
+    def __init__(self):
+        self.accepted = []
+        self._drop = Event()
+        self.server = StreamServer(('127.0.0.1', 0), self._handle)
+        self.server.start()
+        self.port = self.server.server_port
+
+    def _handle(self, sock, address):
+        self.accepted.append(sock)
+        self._drop.wait()
+        sock.close()
+
+    def drop_connections(self):
+        self._drop.set()
+        gevent.sleep(0.1)
+        self._drop.clear()
+
+    def stop(self):
+        self._drop.set()
+        self.server.stop()
+
+
+@pytest.fixture()
+def gateway(monkeypatch):
+    monkeypatch.setattr(driver_locks, "_socket_lock", DummySemaphore())
+    server = GatewayServer()
+    yield server
+    server.stop()
+
+
+def _use(pool, port):
+    with pool.connection('127.0.0.1', port) as client:
+        assert client.connect()
+        return client
+
+
+def test_connection_should_be_reused(gateway):
+    pool = ModbusConnectionPool()
+
+    first = _use(pool, gateway.port)
+    second = _use(pool, gateway.port)
+    gevent.sleep(0.1)
+
+    assert first is second
+    assert first.is_socket_open()
+    assert len(gateway.accepted) == 1
+    pool.close()
+
+
+def test_connection_should_reconnect_when_closed_by_gateway(gateway):
+    pool = ModbusConnectionPool()
+
+    _use(pool, gateway.port)
+    gevent.sleep(0.1)
+    gateway.drop_connections()
+    _use(pool, gateway.port)
+    gevent.sleep(0.1)
+
+    assert len(gateway.accepted) == 2
+    pool.close()
+
+
+def test_connection_should_reconnect_after_error(gateway):
+    pool = ModbusConnectionPool()
+
+    with pytest.raises(ConnectionException):
+        with pool.connection('127.0.0.1', gateway.port) as client:
+            assert client.connect()
+            raise ConnectionException("request failed")
+    assert not client.is_socket_open()
+
+    _use(pool, gateway.port)
+    gevent.sleep(0.1)
+    assert len(gateway.accepted) == 2
+    pool.close()
+
+
+def test_connection_should_be_kept_after_exception_response(gateway):
+    pool = ModbusConnectionPool()
+
+    with pytest.raises(ModbusExceptionResponseError):
+        with pool.connection('127.0.0.1', gateway.port) as client:
+            assert client.connect()
+            raise ModbusExceptionResponseError(2)
+    assert client.is_socket_open()
+
+    _use(pool, gateway.port)
+    gevent.sleep(0.1)
+    assert len(gateway.accepted) == 1
+    pool.close()
+
+
+def test_idle_connection_should_be_closed(gateway):
+    pool = ModbusConnectionPool(idle_timeout=0.1)
+
+    client = _use(pool, gateway.port)
+    gevent.sleep(0.2)
+    pool.close_idle()
+
+    assert not client.is_socket_open()
+    pool.close()
@@ -0,0 +1,135 @@
+import struct
+
+import pytest
+from modbus_tk.exceptions import ModbusError
+from pymodbus.pdu import ExceptionResponse, ModbusExceptions
+from pymodbus.register_read_message import ReadHoldingRegistersResponse
+
+from platform_driver.interfaces import modbus
+from platform_driver.interfaces.modbus_tk import helpers
+from platform_driver.interfaces.modbus_tk.client import Client, Field
+
+# Holding register addresses of the test device. 3 and 4 are gaps, reading 4 is refused by the device.
+ADDRESSES = [0, 1, 2, 5, 6, 20]
+UNREADABLE = {4}
+
+
+def _registry(addresses):
+    return [{'Volttron Point Name': 'point{}'.format(address),
+             'Modbus Register': '>H',
+             'Writable': 'TRUE',
+             'Point Address': str(address),
+             'Units': 'count'} for address in addresses]
+
+
+class FakePymodbusClient(object):
+    def __init__(self, unreadable=()):
+        self.requests = []
+        self.unreadable = set(unreadable)
+
+    def read_holding_registers(self, address, count, unit=0):
+        self.requests.append((address, count))
+        if self.unreadable.intersection(range(address, address + count)):
+            return ExceptionResponse(0x03, ModbusExceptions.IllegalAddress)
+        return ReadHoldingRegistersResponse(list(range(address, address + count)))
+
+
+def _interface(max_register_gap):
+    interface = modbus.Interface()
+    interface.configure({"device_address": "127.0.0.1", "max_register_gap": max_register_gap},
+                        _registry(ADDRESSES))
+    return interface
+
+
+def _ranges(interface):
+    return [(start, end) for start, end, registers in interface.register_ranges[('byte', False)]]
+
+
+def test_merge_register_ranges_should_only_merge_adjacent_without_gap():
+    interface = _interface(0)
+    assert _ranges(interface) == [(0, 2), (5, 6), (20, 20)]
+
+
+def test_merge_register_ranges_should_read_through_small_gaps():
+    interface = _interface(2)
+    assert _ranges(interface) == [(0, 6), (20, 20)]
+
+    interface = _interface(13)
+    assert _ranges(interface) == [(0, 20)]
+
+
+def test_merge_register_ranges_should_not_add_requests(monkeypatch):
+    monkeypatch.setattr(modbus, "MODBUS_READ_MAX", 3)
+    interface = _interface(2)
+    # Merging 0-2 with 5-6 would need 3 reads of at most 3 registers instead of 2 separate reads.
+    assert _ranges(interface) == [(0, 2), (5, 6), (20, 20)]
+
+
+def test_scrape_should_learn_unreadable_gaps():
+    interface = _interface(2)
+    client = FakePymodbusClient(UNREADABLE)
+
+    values = interface.scrape_byte_registers(client, False)
+
+    assert values == {'point{}'.format(address): address for address in ADDRESSES}
+    assert client.requests == [(0, 7), (0, 3), (5, 2), (20, 1)]
+    assert interface.unreadable_addresses[('byte', False)] == {3, 4}
+    assert _ranges(interface) == [(0, 2), (5, 6), (20, 20)]
+
+    client.requests = []
+    interface.scrape_byte_registers(client, False)
+    assert client.requests == [(0, 3), (5, 2), (20, 1)]
+
+
+class GapMap(Client):
+    byte_order = helpers.BIG_ENDIAN
+    addressing = helpers.ADDRESS_OFFSET
+
+
+for _address in ADDRESSES:
+    setattr(GapMap, 'field{}'.format(_address),
+            Field('field{}'.format(_address), _address, helpers.USHORT, 'count', 0, helpers.no_op,
+                  helpers.REGISTER_READ_WRITE, helpers.OP_MODE_READ_WRITE))
+
+
+class FakeModbusTkMaster(object):
+    def __init__(self, unreadable=()):
+        self.requests = []
+        self.unreadable = set(unreadable)
+
+    def execute(self, slave, function_code, address, quantity_of_x=0, data_format="", threadsafe=True, **kwargs):
+        self.requests.append((address, quantity_of_x))
+        if self.unreadable.intersection(range(address, address + quantity_of_x)):
+            raise ModbusError(2)
+        data = struct.pack('>{}H'.format(quantity_of_x), *range(address, address + quantity_of_x))
+        return struct.unpack(data_format, data)
+
+
+def _modbus_tk_client(max_register_gap, unreadable=()):
+    client = GapMap(max_register_gap=max_register_gap)
+    client.client = FakeModbusTkMaster(unreadable)
+    return client
+
+
+@pytest.mark.parametrize("max_register_gap, expected_blocks", [
+    (0, [(0, 3), (5, 2), (20, 1)]),
+    (2, [(0, 7), (20, 1)]),
+    (13, [(0, 21)]),
+])
+def test_modbus_tk_requests_should_read_through_gaps(max_register_gap, expected_blocks):
+    client = _modbus_tk_client(max_register_gap)
+    assert [(r.address, r.count) for r in client.requests()] == expected_blocks
+
+    values = {field.name: value for field, value, timestamp in client.dump_all()}
+    assert values == {'field{}'.format(address): address for address in ADDRESSES}
+    assert client.client.requests == expected_blocks
+
+
+def test_modbus_tk_should_learn_unreadable_gaps():
+    client = _modbus_tk_client(2, UNREADABLE)
+
+    values = {field.name: value for field, value, timestamp in client.dump_all()}
+
+    assert values == {'field{}'.format(address): address for address in ADDRESSES}
+    assert client.client.requests == [(0, 7), (0, 3), (5, 2), (20, 1)]
+    assert [(r.address, r.count) for r in client.requests()] == [(0, 3), (5, 2), (20, 1)]
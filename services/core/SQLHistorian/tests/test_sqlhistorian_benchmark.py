@@ -0,0 +1,79 @@
+"""
+Bulk insert benchmark for the SQLHistorian database drivers.
+
+Every backend is fed the same synthetic workload through
+SQLHistorian.publish_to_historian and the throughput is printed in
+records/sec. Run with::
+
+    pytest -s -m benchmark services/core/SQLHistorian/tests/test_sqlhistorian_benchmark.py
+
+The sqlite backend always runs. The mysql backend runs when the
+MYSQL_BENCHMARK_PARAMS environment variable contains the json encoded
+connection params of a test database, for example
+'{"host": "localhost", "port": 3306, "database": "test_historian", "user": "historian", "passwd": "historian"}'
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from pytz import UTC
+
+from services.core.SQLHistorian.sqlhistorian import historian
+from volttron.platform.dbutils.basedb import DbDriver
+
+TOPIC_COUNT = 200
+RECORD_COUNT = 20000
+# Same as the default max_batch_size of the historian publish loop
+BATCH_SIZE = 1000
+
+
+def _workload():
+    start = datetime(2021, 1, 1, tzinfo=UTC)
+    meta = {"type": "float", "tz": "UTC", "units": "F"}
+    return [{"timestamp": start + timedelta(seconds=n // TOPIC_COUNT),
+             "topic": "campus/building/device{}/point".format(n % TOPIC_COUNT),
+             "value": float(n),
+             "meta": meta}
+            for n in range(RECORD_COUNT)]
+
+
+def _backends(tmp_path):
+    backends = [("sqlite", {"database": str(tmp_path / "historian.sqlite")})]
+    mysql_params = os.environ.get("MYSQL_BENCHMARK_PARAMS")
+    if mysql_params:
+        backends.append(("mysql", json.loads(mysql_params)))
+    return backends
+
+
+def _run(backend, params, table_prefix, bulk):
+    config = {"connection": {"type": backend, "params": dict(params)},
+              "tables_def": {"table_prefix": table_prefix, "data_table": "data",
+                             "topics_table": "topics", "meta_table": "meta"}}
+    sql_historian = historian.historian(config)
+    sql_historian.historian_setup()
+    dbutils = sql_historian.bg_thread_dbutils
+    if not bulk:
+        # One statement per record, the behaviour of the generic DbDriver implementation.
+        dbutils.bulk_insert = DbDriver.bulk_insert.__get__(dbutils)
+
+    records = _workload()
+    start = time.perf_counter()
+    for n in range(0, len(records), BATCH_SIZE):
+        sql_historian.publish_to_historian(records[n:n + BATCH_SIZE])
+    elapsed = time.perf_counter() - start
+
+    dbutils.close()
+    sql_historian.main_thread_dbutils.close()
+    return len(records) / elapsed
+
+
+@pytest.mark.benchmark
+def test_benchmark_bulk_insert(tmp_path):
+    print()
+    for backend, params in _backends(tmp_path):
+        for bulk in (False, True):
+            mode = "bulk" if bulk else "row"
+            rate = _run(backend, params, "bench_{}".format(mode), bulk)
+            print("backend: {:<7} insert: {:<5} records/sec: {:10.0f}".format(backend, mode, rate))
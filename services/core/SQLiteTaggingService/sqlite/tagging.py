@@ -39,15 +39,16 @@
 
 import csv
 import logging
+import operator
 import sys
 from volttron.platform.agent.utils import fix_sqlite3_datetime
 
 import re
 from pkg_resources import resource_string, resource_exists
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 
 from volttron.platform.agent import utils
-from volttron.platform.agent.base_tagging import BaseTaggingService
+from volttron.platform.agent.base_tagging import BaseTaggingService, TagIndex
 from volttron.platform.dbutils.sqlitefuncts import SqlLiteFuncts
 from volttron.utils.docs import doc_inherit
 
@@ -59,6 +60,11 @@ utils.setup_logging()
 _log = logging.getLogger(__name__)
 
 TAGGING_SERVICE_SETUP_FAILED = 'TAGGING_SERVICE_SETUP_FAILED'
+# Text that sqlite converts to a number when it is stored in or compared with
+# a column of NUMERIC affinity, like the value column of the topic tags table.
+NUMERIC_TEXT = re.compile(r'^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$')
+# Maximum number of parameters in a sqlite statement.
+MAX_SQL_PARAMS = 999
 
 
 # Register a better datetime parser in sqlite3.
@@ -96,6 +102,34 @@ def tagging_service(config_path, **kwargs):
     return SQLiteTaggingService(**kwargs)
 
 
+class SQLiteTagIndex(TagIndex):
+    """
+    Tag index that compares tag values like the queries of
+    :py:meth:`SQLiteTaggingService.query_topics_by_tags`: numeric text is a
+    number, numbers sort before text and LIKE ignores case.
+    """
+    like_flags = re.IGNORECASE
+    comparisons = {'=': operator.eq, '!=': operator.ne, '>': operator.gt,
+                   '>=': operator.ge, '<': operator.lt, '<=': operator.le}
+
+    def normalize(self, value):
+        if isinstance(value, bool):
+            return int(value)
+        if isinstance(value, str) and NUMERIC_TEXT.match(value):
+            try:
+                return int(value)
+            except ValueError:
+                number = float(value)
+                return int(number) if number.is_integer() else number
+        return value
+
+    def compare(self, op, stored, value):
+        if stored is None or value is None:
+            return False
+        return self.comparisons[op]((isinstance(stored, str), stored),
+                                    (isinstance(value, str), value))
+
+
 class SQLiteTaggingService(BaseTaggingService):
     """This is a tagging service agent that writes data to a SQLite database.
     """
@@ -213,6 +247,43 @@ class SQLiteTaggingService(BaseTaggingService):
         for record in cursor:
             self.tag_refs[record[0]] = record[1]
 
+    @doc_inherit
+    def load_tag_index(self):
+        tag_index = SQLiteTagIndex(self.tag_refs)
+        for topic_prefix, tags in self._read_topic_tags().items():
+            tag_index.set_tags(topic_prefix, tags)
+        _log.info("Loaded tags of {} topic prefixes into the tag "
+                  "index".format(len(tag_index)))
+        return tag_index
+
+    def _read_topic_tags(self, topic_prefixes=None):
+        """
+        Returns the tags of the given topic prefixes, or of all topic
+        prefixes, as a dictionary of topic prefix and dictionary of tag and
+        value.
+        """
+        query = "SELECT topic_prefix, tag, value FROM " + self.topic_tags_table
+        if topic_prefixes is None:
+            batches = [None]
+        else:
+            topic_prefixes = list(topic_prefixes)
+            batches = [topic_prefixes[i:i + MAX_SQL_PARAMS]
+                       for i in range(0, len(topic_prefixes), MAX_SQL_PARAMS)]
+        topic_tags = defaultdict(dict)
+        for batch in batches:
+            if batch is None:
+                cursor = self.sqlite_utils.select(query, fetch_all=False)
+            else:
+                cursor = self.sqlite_utils.select(
+                    query + " WHERE topic_prefix IN ({})".format(
+                        ",".join("?" * len(batch))), batch, fetch_all=False)
+            try:
+                for topic_prefix, tag, value in cursor:
+                    topic_tags[topic_prefix][tag] = value
+            finally:
+                cursor.close()
+        return topic_tags
+
     def _init_tags(self):
         file_path = self.resource_sub_dir + '/tags.csv'
         _log.debug("Loading file :" + file_path)
@@ -538,10 +609,17 @@ class SQLiteTaggingService(BaseTaggingService):
                     "VALUES (?, ?, ?);".format(self.topic_tags_table),
                 to_db)
             self.sqlite_utils.commit()
+            if self.tag_index is not None:
+                # Read back the values as sqlite stored them.
+                updated = self._read_topic_tags({row[0] for row in to_db})
+                for topic_prefix, tags in updated.items():
+                    self.tag_index.set_tags(topic_prefix, tags)
         return result
 
     @doc_inherit
     def query_topics_by_tags(self, ast, skip=0, count=None, order=None):
+        if self.tag_index is not None:
+            return self.tag_index.query(ast, skip, count, order)
 
         query = self.sqlite_utils.get_tagging_query_from_ast(
             self.topic_tags_table, ast, self.tag_refs)
@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+from volttron.platform.agent.base_tagging import TopicPrefixTree, parse_query
+from sqlite.tagging import SQLiteTaggingService
+
+TOPICS = ["campus{}/d{}/p{}".format(campus, device, point)
+          for campus in (1, 2) for device in (1, 2) for point in range(1, 6)]
+
+TAGS = {
+    'campus1': {'campus': True, 'dis': "Test campus description", 'geoCountry': "US"},
+    'campus2': {'campus': True, 'geoCountry': "UK", 'dis': "United Kingdom"},
+    'campus*/d*/p1': {'point': True, 'maxVal': 15, 'minVal': -1},
+    'campus*/d*/p2': {'point': True, 'maxVal': 10, 'minVal': 0, 'dis': "Test description"},
+    'campus*/d*/p3': {'point': True, 'maxVal': 5, 'minVal': 1, 'dis': "Test description"},
+    'campus*/d*/p4': {'point': True, 'maxVal': "5", 'minVal': 2.5, 'dis': "test Description"},
+    'campus*/d1': {'equip': True, 'elec': True, 'phase': 'p1_1', 'dis': "Test description"},
+    'campus*/d2': {'equip': True, 'elec': True, 'phase': 'p2'},
+    'campus1/d*': {'campusRef': 'campus1'},
+    'campus2/d*': {'campusRef': 'campus2'},
+}
+
+CONDITIONS = [
+    "campus AND geoCountry='US'",
+    "equip AND elec",
+    "geoCountry='UK' OR campus",
+    'minVal<0 OR maxVal>=5 AND maxVal<10',
+    '(minVal<0 OR maxVal>=5) AND maxVal<10',
+    'maxVal = "5"',
+    'maxVal != 5',
+    'maxVal > "abc"',
+    'minVal >= 1.5',
+    'NOT campus AND NOT point AND dis="Test description"',
+    'point AND NOT(maxVal>=5 AND minVal=1)',
+    'minVal=-1',
+    'equip AND phase LIKE "p1.*"',
+    'equip AND NOT (phase LIKE "p1.*")',
+    'point AND dis LIKE "test.*"',
+    'equip AND elec AND campusRef.geoCountry="UK"',
+    'equip AND elec AND campusRef.geoCountry LIKE "UK.*"',
+    'equip AND elec AND campusRef.geoCountry="UK" AND campusRef.dis="United Kingdom"',
+    'equip AND elec AND NOT(campusRef.geoCountry="UK" AND campusRef.dis="United Kingdom")',
+    'NOT (campus OR point)',
+]
+
+
+def _service(tmp_path, **kwargs):
+    service = SQLiteTaggingService(
+        connection={'type': 'sqlite', 'params': {'database': str(tmp_path / 'tagging.sqlite')}}, **kwargs)
+    service.setup()
+    service.load_valid_tags()
+    service.load_tag_refs()
+    service._topic_tree = TopicPrefixTree(TOPICS)
+    service._topic_tree_loaded = time.time()
+    return service
+
+
+def _query(service, condition, **kwargs):
+    ast = parse_query(condition, service.valid_tags, service.tag_refs)
+    return service.query_topics_by_tags(ast, **kwargs)
+
+
+@pytest.fixture()
+def service(tmp_path):
+    service = _service(tmp_path)
+    # Tags of campus2 are indexed when they are inserted.
+    service.add_tags({pattern: tags for pattern, tags in TAGS.items() if not pattern.startswith('campus2')})
+    service.tag_index = service.load_tag_index()
+    service.add_tags({pattern: tags for pattern, tags in TAGS.items() if pattern.startswith('campus2')})
+    service.add_tags({'campus2/d1': {'phase': "p1_2"}})
+    yield service
+
+
+@pytest.mark.parametrize("condition", CONDITIONS)
+def test_index_same_as_sql(service, condition):
+    tag_index = service.tag_index
+    service.tag_index = None
+    expected = _query(service, condition)
+    service.tag_index = tag_index
+
+    assert _query(service, condition) == expected
+
+
+def test_index_order_skip_count(service):
+    tag_index = service.tag_index
+    for kwargs in [{'order': 'LAST_TO_FIRST'}, {'skip': 2}, {'skip': 1, 'count': 3, 'order': 'LAST_TO_FIRST'}]:
+        service.tag_index = None
+        expected = _query(service, 'point', **kwargs)
+        service.tag_index = tag_index
+        assert _query(service, 'point', **kwargs) == expected
+
+
+def test_query_cache_invalidated_by_add_tags(service, monkeypatch):
+    calls = []
+    query_topics_by_tags = service.query_topics_by_tags
+    monkeypatch.setattr(service, "query_topics_by_tags",
+                        lambda **kwargs: calls.append(kwargs) or query_topics_by_tags(**kwargs))
+
+    assert service.get_topics_by_tags(condition="phase='p2'") == ['campus1/d2', 'campus2/d2']
+    assert service.get_topics_by_tags(condition="phase='p2'") == ['campus1/d2', 'campus2/d2']
+    assert len(calls) == 1
+
+    service.add_tags({'campus1/d1': {'phase': 'p2'}})
+    assert service.get_topics_by_tags(condition="phase='p2'") == ['campus1/d1', 'campus1/d2', 'campus2/d2']
+    assert len(calls) == 2
+
+
+@pytest.mark.benchmark
+def test_benchmark_query_topics_by_tags(tmp_path):
+    service = _service(tmp_path, query_cache_size=0)
+    topics = ["campus{}/building{}/device{}".format(c, b, d) for c in range(4) for b in range(25) for d in range(20)]
+    service._topic_tree = TopicPrefixTree(topics)
+    service.add_tags({topic: {'equip': True, 'ahu': d % 3 == 0, 'maxVal': d, 'phase': 'p{}'.format(d % 4),
+                              'campusRef': 'campus{}'.format(c)}
+                      for topic in topics
+                      for c, d in [(int(topic[6]), int(topic.rsplit('device', 1)[1]))]})
+    service.add_tags({'campus{}'.format(c): {'campus': True, 'geoCountry': 'US' if c % 2 else 'UK'} for c in range(4)})
+    tag_index = service.load_tag_index()
+    conditions = ['equip AND ahu AND maxVal > 10',
+                  'equip AND NOT (phase LIKE "p1.*") OR maxVal < 3',
+                  'equip AND campusRef.geoCountry="UK"']
+    print()
+    for name, index in (("sql", None), ("index", tag_index)):
+        service.tag_index = index
+        start = time.perf_counter()
+        runs = 20
+        for _ in range(runs):
+            for condition in conditions:
+                service.get_topics_by_tags(condition=condition)
+        elapsed = time.perf_counter() - start
+        print("{:<5} {} topic prefixes queries/sec: {:10.0f}".format(name, len(topics),
+                                                                   runs * len(conditions) / elapsed))
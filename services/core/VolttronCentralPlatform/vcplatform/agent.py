@@ -955,6 +955,10 @@ class VolttronCentralPlatform(Agent):
         for platform_driver_id in self._platform_driver_ids:
             fname = os.path.join(os.environ['VOLTTRON_HOME'], "configuration_store/{}.store".format(platform_driver_id))
             stat_time = os.stat(fname).st_mtime if os.path.exists(fname) else None
+            # Changes are appended to the journal of the store until it is compacted.
+            journal = fname + '.journal'
+            if stat_time is not None and os.path.exists(journal):
+                stat_time = max(stat_time, os.stat(journal).st_mtime)
             if self._platform_driver_stat_times.get(platform_driver_id, None) != stat_time:
                 config_changed = True
             found_a_platform_driver = found_a_platform_driver or stat_time
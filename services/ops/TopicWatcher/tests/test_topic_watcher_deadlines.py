@@ -0,0 +1,160 @@
+import sqlite3
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from topic_watcher import agent as agent_module
+from topic_watcher.agent import AlertAgent, AlertGroup, DeadlineQueue
+from volttron.platform.agent.utils import get_aware_utc_now
+
+DEVICE = "devices/campus/building/device/all"
+
+
+def _group(config):
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE topic_log( "
+                       "topic TEXT, "
+                       "last_seen_before_timeout TIMESTAMP, "
+                       "first_seen_after_timeout TIMESTAMP)")
+    group = AlertGroup("group1", config, connection, main_agent=MagicMock())
+    group.send_alert = MagicMock()
+    return group
+
+
+def _logged(group):
+    return [row[0] for row in group.connection.execute("SELECT topic FROM topic_log ORDER BY rowid")]
+
+
+def _publish(group, topic, points=()):
+    group.reset_time("pubsub", "driver", "", topic, {}, [{p: 1 for p in points}, {}])
+
+
+def test_deadline_queue_should_only_return_expired():
+    start = get_aware_utc_now()
+    queue = DeadlineQueue()
+    queue.set("a", start + timedelta(seconds=5))
+    queue.set(("b/all", "point"), start + timedelta(seconds=5))
+    queue.set("c", start + timedelta(seconds=10))
+    assert queue.next_deadline() == start + timedelta(seconds=5)
+
+    # Moving a deadline later does not add heap entries.
+    queue.set("a", start + timedelta(seconds=8))
+    assert len(queue._heap) == 3
+
+    assert queue.pop_expired(start + timedelta(seconds=6)) == [("b/all", "point")]
+    assert queue.pop_expired(start + timedelta(seconds=7)) == []
+    assert sorted(queue.pop_expired(start + timedelta(seconds=10))) == ["a", "c"]
+    assert queue.next_deadline() is None
+    assert len(queue) == 3
+
+
+def test_deadline_queue_should_skip_superseded_entries():
+    start = get_aware_utc_now()
+    queue = DeadlineQueue()
+    queue.set("a", start + timedelta(seconds=10))
+    queue.set("a", start + timedelta(seconds=2))
+    queue.set("b", start + timedelta(seconds=1))
+    queue.remove("b")
+
+    assert queue.next_deadline() == start + timedelta(seconds=2)
+    assert queue.pop_expired(start + timedelta(seconds=20)) == ["a"]
+    assert queue.pop_expired(start + timedelta(seconds=30)) == []
+
+
+def test_find_watched_topic_should_use_longest_prefix():
+    group = _group({"devices/campus": 10, "devices/campus/building": 10, "devices/other": 10})
+
+    assert group.find_watched_topic("devices/campus/building/device/all") == "devices/campus/building"
+    assert group.find_watched_topic("devices/campus/building") == "devices/campus/building"
+    assert group.find_watched_topic("devices/campus/other/all") == "devices/campus"
+    assert group.find_watched_topic("devices/unknown") is None
+
+    group.ignore_topic("devices/campus/building")
+    assert group.find_watched_topic("devices/campus/building/device/all") == "devices/campus"
+
+
+def test_check_timeouts_should_alert_and_log_once(monkeypatch):
+    start = get_aware_utc_now()
+    clock = [start]
+    monkeypatch.setattr(agent_module, "get_aware_utc_now", lambda: clock[0])
+    group = _group({"fakedevice": 5, DEVICE: {"seconds": 5, "points": ["point1", "point2"]}})
+
+    group.check_timeouts(start)
+    assert not group.send_alert.called
+
+    clock[0] = start + timedelta(seconds=3)
+    _publish(group, DEVICE, ["point1"])
+    group.check_timeouts(start + timedelta(seconds=5))
+    alerted = group.send_alert.call_args[0][0]
+    assert sorted(alerted, key=str) == sorted(["fakedevice", (DEVICE, "point2")], key=str)
+    assert sorted(_logged(group)) == ["devices/campus/building/device/point2", "fakedevice"]
+
+    # Unpublished topics are reported again after their time limit without logging a new timeout.
+    group.send_alert.reset_mock()
+    group.check_timeouts(start + timedelta(seconds=11))
+    assert len(group.send_alert.call_args[0][0]) == 4
+    assert len(_logged(group)) == 4
+
+    clock[0] = start + timedelta(seconds=12)
+    _publish(group, "fakedevice")
+    assert "fakedevice" not in group.unseen_topics
+    group.send_alert.reset_mock()
+    group.check_timeouts(start + timedelta(seconds=13))
+    assert not group.send_alert.called
+
+
+def test_ignore_topic_should_stop_alerts():
+    group = _group({"fakedevice": 5, DEVICE: {"seconds": 5, "points": ["point1"]}})
+    group.ignore_topic(DEVICE)
+    group.ignore_topic("fakedevice")
+
+    assert group.next_deadline() is None
+    group.check_timeouts(get_aware_utc_now() + timedelta(seconds=10))
+    assert not group.send_alert.called
+
+
+def test_schedule_check_should_wake_at_earliest_deadline():
+    agent = AlertAgent.__new__(AlertAgent)
+    agent.core = MagicMock()
+    agent._next_check = None
+    agent._next_check_time = None
+    agent.group_instances = {"group1": _group({"slow": 60})}
+
+    agent.schedule_check()
+    deadline = agent.group_instances["group1"].next_deadline()
+    agent.core.schedule.assert_called_once_with(deadline, agent.check_deadlines)
+    scheduled = agent._next_check
+
+    agent.group_instances["group2"] = _group({"fast": 5})
+    agent.schedule_check()
+    assert scheduled.cancel.called
+    assert agent._next_check_time == agent.group_instances["group2"].next_deadline()
+
+    agent.core.schedule.reset_mock()
+    agent.group_instances["group3"] = _group({"slower": 120})
+    agent.schedule_check()
+    assert not agent.core.schedule.called
+
+
+@pytest.mark.benchmark
+def test_benchmark_watched_points():
+    points = ["point{}".format(n) for n in range(50)]
+    group = _group({"devices/campus/building/device{}/all".format(n): {"seconds": 300, "points": points}
+                    for n in range(100)})
+    now = get_aware_utc_now()
+
+    start = time.perf_counter()
+    for _ in range(100):
+        group.check_timeouts(now)
+    elapsed = time.perf_counter() - start
+    print()
+    print("watched points: {} checks/sec: {:10.0f}".format(len(group.deadlines), 100 / elapsed))
+
+    start = time.perf_counter()
+    for n in range(1000):
+        _publish(group, "devices/campus/building/device{}/all".format(n % 100), points)
+    elapsed = time.perf_counter() - start
+    print("watched points: {} device publishes/sec: {:10.0f}".format(len(group.deadlines), 1000 / elapsed))
+    assert len(group.deadlines._heap) == 5100
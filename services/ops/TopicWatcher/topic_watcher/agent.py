@@ -36,6 +36,8 @@
 # under Contract DE-AC05-76RL01830
 # }}}
 
+import heapq
+import itertools
 import logging
 import os
 
@@ -52,13 +54,16 @@ from volttron.platform.messaging.health import Status, STATUS_BAD, STATUS_GOOD
 from volttron.platform.vip.agent import Agent, Core, RPC
 from volttron.platform.vip.agent.utils import build_agent
 from volttron.platform.agent.utils import get_aware_utc_now
-from volttron.platform.scheduling import periodic
 
 utils.setup_logging()
 _log = logging.getLogger(__name__)
 
 __version__ = '2.1'
 
+# Timeouts that expire within this many seconds of each other are reported in
+# the same alert.
+EXPIRY_RESOLUTION = datetime.timedelta(seconds=1)
+
 
 class AlertAgent(Agent):
     def __init__(self, config_path, **kwargs):
@@ -72,6 +77,8 @@ class AlertAgent(Agent):
         self._resetting_remote_agent = False
         self.publish_remote = False
         self.publish_local = True
+        self._next_check = None
+        self._next_check_time = None
 
         if self.publish_settings:
             self.publish_local = self.publish_settings.get('publish-local', True)
@@ -183,6 +190,7 @@ class AlertAgent(Agent):
         for group_name, config in self.config.items():
             if group_name != 'publish-settings':
                 self.group_instances[group_name] = self.create_alert_group(group_name, config)
+        self.schedule_check()
 
     def create_alert_group(self, group_name, config):
         group = AlertGroup(group_name, config, self._connection,
@@ -226,6 +234,7 @@ class AlertAgent(Agent):
         else:
             self.group_instances[group].watch_topic(topic, timeout)
             self.group_instances[group].restart_timer()
+        self.schedule_check()
 
     @RPC.export
     def watch_device(self, group, topic, timeout, points):
@@ -251,6 +260,7 @@ class AlertAgent(Agent):
         else:
             self.group_instances[group].watch_device(topic, timeout, points)
             self.group_instances[group].restart_timer()
+        self.schedule_check()
 
     @RPC.export
     def ignore_topic(self, group, topic):
@@ -267,54 +277,114 @@ class AlertAgent(Agent):
         group = self.group_instances[group]
         group.ignore_topic(topic)
 
-    @Core.schedule(periodic(1))
-    def decrement_ttl(self):
-        """Periodic call
-
-        Used to maintain the time since each topic's last publish.
-        Sends an alert if any topics are missing.
+    def schedule_check(self):
         """
+        Schedule check_deadlines for the earliest timeout of all alert
+        groups. Should be called after topics are added to a group or its
+        timer is restarted, later timeouts are picked up by check_deadlines.
+        """
+        deadlines = [deadline for deadline in
+                     (group.next_deadline() for group in self.group_instances.values())
+                     if deadline is not None]
+        if not deadlines:
+            return
+        deadline = min(deadlines)
+        if self._next_check is not None:
+            if self._next_check_time <= deadline:
+                return
+            self._next_check.cancel()
+        self._next_check_time = deadline
+        self._next_check = self.core.schedule(deadline, self.check_deadlines)
 
-        # Loop through each alert group
-        for name in self.group_instances:
-
-            topics_timedout = set()
-            alert_topics = set()
-
-            # Loop through topics in alert group
-            for topic in self.group_instances[name].wait_time.keys():
+    def check_deadlines(self):
+        """Scheduled call
 
-                # Send an alert if a topic hasn't been
-                self.group_instances[name].topic_ttl[topic] -= 1
-                if self.group_instances[name].topic_ttl[topic] <= 0:
-                    alert_topics.add(topic)
-                    self.group_instances[name].topic_ttl[topic] = self.group_instances[name].wait_time[topic]
-                    if topic not in self.group_instances[name].unseen_topics:
-                        topics_timedout.add(topic)
-                        self.group_instances[name].unseen_topics.add(topic)
+        Sends alerts for the topics and points that were not published
+        within their time limit and schedules the next check. The agent is
+        only woken up when a timeout expires instead of counting down every
+        watched topic each second.
+        """
+        self._next_check = None
+        now = get_aware_utc_now()
+        try:
+            for group in list(self.group_instances.values()):
+                group.check_timeouts(now)
+        finally:
+            self.schedule_check()
+
+
+class DeadlineQueue(object):
+    """
+    Expiry deadlines of watched topics kept in a min-heap.
+
+    The heap holds at most one live entry per key. Moving a deadline later,
+    which is what every publish does, only updates a dictionary and the
+    heap entry is moved forward when it comes up. Moving a deadline earlier
+    pushes a new entry and the old one is skipped when it is popped.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._deadlines = {}
+        self._queued = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def __contains__(self, key):
+        return key in self._deadlines
+
+    def __iter__(self):
+        return iter(list(self._deadlines))
+
+    def get(self, key):
+        return self._deadlines.get(key)
+
+    def set(self, key, deadline):
+        self._deadlines[key] = deadline
+        queued = self._queued.get(key)
+        if queued is None or deadline < queued:
+            self._push(key, deadline)
+
+    def remove(self, key):
+        self._deadlines.pop(key, None)
+        self._queued.pop(key, None)
+
+    def next_deadline(self):
+        """
+        Return the deadline of the first heap entry, or None if nothing is
+        watched. This can be earlier than the key's current deadline.
+        """
+        heap = self._heap
+        while heap and self._queued.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
 
-                # Send an alert if a point hasn't been seen
-                try:
-                    points = self.group_instances[name].point_ttl[topic].keys()
-                    for p in points:
-                        self.group_instances[name].point_ttl[topic][p] -= 1
-                        if self.group_instances[name].point_ttl[topic][p] <= 0:
-                            self.group_instances[name].point_ttl[topic][p] = self.group_instances[name].wait_time[topic]
-                            alert_topics.add((topic, p))
-                            if (topic, p) not in self.group_instances[name].unseen_topics:
-                                topics_timedout.add((topic, p))
-                                self.group_instances[name].unseen_topics.add((topic, p))
-                except KeyError:
-                    pass
-
-            if alert_topics:
-                try:
-                    self.group_instances[name].send_alert(list(alert_topics))
-                except ZMQError:
-                    self.group_instances[name].main_agent.reset_remote_agent()
+    def pop_expired(self, now):
+        """
+        Return the keys whose deadline is not later than now. They stay in
+        the queue without a heap entry until their deadline is set again.
+        """
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            deadline, _, key = heapq.heappop(heap)
+            if self._queued.get(key) != deadline:
+                continue
+            current = self._deadlines[key]
+            if current > now:
+                self._push(key, current)
+            else:
+                del self._queued[key]
+                expired.append(key)
+        return expired
 
-            if topics_timedout:
-                self.group_instances[name].log_timeout(list(topics_timedout))
+    def _push(self, key, deadline):
+        # The counter breaks ties between topic and (topic, point) keys,
+        # which do not compare.
+        self._queued[key] = deadline
+        heapq.heappush(self._heap, (deadline, next(self._counter), key))
 
 
 class AlertGroup():
@@ -326,8 +396,9 @@ class AlertGroup():
         self.main_agent = main_agent
 
         self.wait_time = {}
-        self.topic_ttl = {}
-        self.point_ttl = {}
+        self.watched_points = {}
+        self.deadlines = DeadlineQueue()
+        self._prefix_lengths = []
         self.unseen_topics = set()
         self.last_seen = {}
         self.publish_local = publish_local
@@ -362,7 +433,8 @@ class AlertGroup():
         :type timeout: int
         """
         self.wait_time[topic] = timeout
-        self.topic_ttl[topic] = timeout
+        self.deadlines.set(topic, get_aware_utc_now() + datetime.timedelta(seconds=timeout))
+        self._update_prefix_lengths()
         self.main_agent.vip.pubsub.subscribe(peer='pubsub', prefix=topic, callback=self.reset_time)
 
     def watch_device(self, topic, timeout, points):
@@ -377,10 +449,15 @@ class AlertGroup():
         :param points: Points to expect in the publish message.
         :type points: [str]
         """
-        self.point_ttl[topic] = {}
+        deadline = get_aware_utc_now() + datetime.timedelta(seconds=timeout)
+        for p in self.watched_points.get(topic, ()):
+            if p not in points:
+                self.deadlines.remove((topic, p))
+                self.unseen_topics.discard((topic, p))
+        self.watched_points[topic] = list(points)
 
         for p in points:
-            self.point_ttl[topic][p] = timeout
+            self.deadlines.set((topic, p), deadline)
 
         self.watch_topic(topic, timeout)
 
@@ -393,24 +470,80 @@ class AlertGroup():
         _log.info("Removing topic {} from watchlist".format(topic))
 
         self.main_agent.vip.pubsub.unsubscribe(peer='pubsub', prefix=topic, callback=self.reset_time)
-        points = self.point_ttl.pop(topic, None)
-        self.topic_ttl.pop(topic, None)
+        points = self.watched_points.pop(topic, ())
         self.wait_time.pop(topic, None)
-        self.unseen_topics.remove(topic)
+        self.deadlines.remove(topic)
+        self.unseen_topics.discard(topic)
         for p in points:
-            self.unseen_topics.remove((topic, p))
+            self.deadlines.remove((topic, p))
+            self.unseen_topics.discard((topic, p))
+        self._update_prefix_lengths()
 
     def restart_timer(self):
         """
         Reset timer for all topics in this alert group. Should be called
         when a new topic is added to a currently active alert group
         """
+        now = get_aware_utc_now()
+        for key in self.deadlines:
+            self.deadlines.set(key, now + self._timeout(key))
 
-        for t in self.topic_ttl:
-            self.topic_ttl[t] = self.wait_time[t]
-        for topic in self.point_ttl:
-            for point in self.point_ttl[topic]:
-                self.point_ttl[topic][point] = self.wait_time[topic]
+    def next_deadline(self):
+        """Return the earliest time a topic of this group can time out."""
+        return self.deadlines.next_deadline()
+
+    def check_timeouts(self, now):
+        """
+        Send an alert for the topics and points whose time limit expired
+        and log the ones that were seen since their last timeout. Their
+        timers are restarted so the alert is repeated while they stay
+        unpublished.
+
+        :param now: Current time.
+        :type now: datetime
+        """
+        alert_topics = self.deadlines.pop_expired(now + EXPIRY_RESOLUTION)
+        if not alert_topics:
+            return
+
+        topics_timedout = []
+        for key in alert_topics:
+            self.deadlines.set(key, now + self._timeout(key))
+            if key not in self.unseen_topics:
+                topics_timedout.append(key)
+                self.unseen_topics.add(key)
+
+        try:
+            self.send_alert(alert_topics)
+        except ZMQError:
+            self.main_agent.reset_remote_agent()
+
+        if topics_timedout:
+            self.log_timeout(topics_timedout)
+
+    def find_watched_topic(self, topic):
+        """
+        Return the longest watched topic that topic starts with, or None.
+
+        Only the distinct lengths of the watched topics are tried, so a
+        lookup does not depend on the number of watched topics.
+
+        :param topic: Topic of a received publish.
+        :type topic: str
+        """
+        if topic in self.wait_time:
+            return topic
+        for length in self._prefix_lengths:
+            if length < len(topic) and topic[:length] in self.wait_time:
+                return topic[:length]
+        return None
+
+    def _update_prefix_lengths(self):
+        self._prefix_lengths = sorted({len(t) for t in self.wait_time}, reverse=True)
+
+    def _timeout(self, key):
+        topic = key if isinstance(key, str) else key[0]
+        return datetime.timedelta(seconds=self.wait_time[topic])
 
     def reset_time(self, peer, sender, bus, topic, headers, message):
         """Callback for topic subscriptions
@@ -418,40 +551,30 @@ class AlertGroup():
         Resets the timeout for topics and devices when publishes are received.
         """
         up_time = get_aware_utc_now()
-        # TODO: What is the use case for this IF STMT
-        # topic should always be there?? Ask Craig
-        if topic not in self.wait_time:
-            found = False
-            # if topic isn't in wait time we need to figure out the
-            # prefix topic so that we can determine the wait time
-            for x in self.wait_time:
-                # TODO: order the wait_time topics so furthest down the tree wins.
-                if topic.startswith(x):
-                    topic = x
-                    found = True
-                    break
-            if not found:
-                _log.debug("No configured topic prefix for topic {}".format(
-                    topic))
-                return
+        watched = self.find_watched_topic(topic)
+        if watched is None:
+            _log.debug("No configured topic prefix for topic {}".format(
+                topic))
+            return
+        topic = watched
 
         log_topics = set()
+        deadline = up_time + datetime.timedelta(seconds=self.wait_time[topic])
         # Reset the standard topic timeout
-        self.topic_ttl[topic] = self.wait_time[topic]
-        self.last_seen[topic] = get_aware_utc_now()
+        self.deadlines.set(topic, deadline)
+        self.last_seen[topic] = up_time
         if topic in self.unseen_topics:
             self.unseen_topics.remove(topic)
             # log time we saw topic only if we had earlier recorded a timeout
             log_topics.add(topic)
 
         # Reset timeouts on volatile points
-        if topic in self.point_ttl:
+        if topic in self.watched_points:
             received_points = message[0].keys()
-            expected_points = self.point_ttl[topic].keys()
-            for point in expected_points:
+            for point in self.watched_points[topic]:
                 if point in received_points:
-                    self.point_ttl[topic][point] = self.wait_time[topic]
-                    self.last_seen[(topic, point)] = get_aware_utc_now()
+                    self.deadlines.set((topic, point), deadline)
+                    self.last_seen[(topic, point)] = up_time
                     if (topic, point) in self.unseen_topics:
                         self.unseen_topics.remove((topic, point))
                         log_topics.add((topic, point))
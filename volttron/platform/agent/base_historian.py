@@ -215,6 +215,7 @@ the same date over again.
 
 
 from abc import abstractmethod
+import base64
 from collections import defaultdict
 from datetime import datetime, timedelta
 from functools import wraps
@@ -226,6 +227,7 @@ import sqlite3
 import threading
 from threading import Thread
 import weakref
+import zlib
 
 from dateutil.parser import parse
 import gevent
@@ -281,6 +283,29 @@ ALL_REX = re.compile('.*/all$')
 fix_sqlite3_datetime()
 
 
+def compress_records(serialized_records):
+    """
+    Compresses a json encoded list of records for
+    :py:meth:`BaseHistorianAgent.insert_compressed`.
+
+    :param serialized_records: json encoded list of records
+    :type serialized_records: str
+    :return: base64 encoded zlib compressed records
+    :rtype: str
+    """
+    return base64.b64encode(zlib.compress(serialized_records.encode('utf-8'))).decode('ascii')
+
+
+def decompress_records(data):
+    """
+    Inverse of :py:func:`compress_records`.
+
+    :return: list of records
+    :rtype: list
+    """
+    return loads(zlib.decompress(base64.b64decode(data)).decode('utf-8'))
+
+
 def add_timing_data_to_header(headers, agent_id, phase):
     if "timing_data" not in headers:
         headers["timing_data"] = timing_data = {}
@@ -315,6 +340,45 @@ STATUS_KEY_CACHE_ONLY = "cache_only_enabled"
 STATUS_KEY_ERROR_MANAGE_DB_SIZE = "error_managing_db_size"
 
 
+class DeviceBatch:
+    """
+    All the points of a single device (or analysis) publish queued as one
+    record.
+
+    Points share the topic prefix, timestamp, headers and metadata of the
+    publish so they are kept in columns instead of one dictionary per point.
+    :py:meth:`BackupDatabase.backup_new_data` writes one cache row per point,
+    so publish_to_historian still receives one record per point.
+    :py:meth:`DeviceBatch.records` yields the per point records for code
+    that expects the one record per point format.
+    """
+    __slots__ = ('source', 'device', 'timestamp', 'headers', 'points', 'values', 'meta')
+
+    def __init__(self, source, device, timestamp, headers, points, values, meta):
+        self.source = source
+        self.device = device
+        self.timestamp = timestamp
+        self.headers = headers
+        self.points = points
+        self.values = values
+        # Point name -> metadata dictionary of the publish (may be missing points).
+        self.meta = meta
+
+    def __len__(self):
+        return len(self.points)
+
+    def records(self):
+        """
+        Yield a per point record for each point in the batch.
+        """
+        for point, value in zip(self.points, self.values):
+            yield {'source': self.source,
+                   'topic': self.device + '/' + point,
+                   'readings': [(self.timestamp, value)],
+                   'meta': self.meta.get(point, {}),
+                   'headers': self.headers}
+
+
 class BaseHistorianAgent(Agent):
     """
     This is the base agent for historian Agents.
@@ -350,10 +414,12 @@ class BaseHistorianAgent(Agent):
                  max_time_publishing=30.0,
                  backup_storage_limit_gb=None,
                  backup_storage_report=0.9,
+                 backup_storage_wal=False,
                  topic_replace_list=[],
                  gather_timing_data=False,
                  readonly=False,
                  process_loop_in_greenlet=False,
+                 raw_cache_values=False,
                  capture_device_data=True,
                  capture_log_data=True,
                  capture_analysis_data=True,
@@ -375,6 +441,8 @@ class BaseHistorianAgent(Agent):
         # will be replaced within the topics before it's stored in the
         # cache database
         self._process_loop_in_greenlet = process_loop_in_greenlet
+        # Pass cached values and headers to publish_to_historian as JSON strings.
+        self._raw_cache_values = bool(raw_cache_values)
         self._topic_replace_list = topic_replace_list
 
         self._async_call = AsyncCall()
@@ -386,6 +454,7 @@ class BaseHistorianAgent(Agent):
 
         self._backup_storage_limit_gb = backup_storage_limit_gb
         self._backup_storage_report = backup_storage_report
+        self._backup_storage_wal = bool(backup_storage_wal)
         self._retry_period = float(retry_period)
         self._submit_size_limit = int(submit_size_limit)
         self._max_time_publishing = float(max_time_publishing)
@@ -426,6 +495,7 @@ class BaseHistorianAgent(Agent):
                 raise ValueError(f"time_tolerance_topic should a list of topics. Got value({time_tolerance_topics}) of "
                                  f"type {type(time_tolerance_topics)}")
         self._time_tolerance_topics = time_tolerance_topics
+        self._set_device_data_filter(device_data_filter)
         if str(cache_only_enabled) in ('True', 'False'):
             self._cache_only_enabled = cache_only_enabled
             self._current_status_context[STATUS_KEY_CACHE_ONLY] = cache_only_enabled
@@ -438,6 +508,8 @@ class BaseHistorianAgent(Agent):
                                 "max_time_publishing": self._max_time_publishing,
                                 "backup_storage_limit_gb": self._backup_storage_limit_gb,
                                 "backup_storage_report": self._backup_storage_report,
+                                "backup_storage_wal": self._backup_storage_wal,
+                                "raw_cache_values": self._raw_cache_values,
                                 "topic_replace_list": self._topic_replace_list,
                                 "gather_timing_data": self.gather_timing_data,
                                 "readonly": self._readonly,
@@ -533,6 +605,10 @@ class BaseHistorianAgent(Agent):
             else:
                 backup_storage_report = 0.9
 
+            backup_storage_wal = bool(config.get("backup_storage_wal", False))
+
+            raw_cache_values = bool(config.get("raw_cache_values", False))
+
             retry_period = float(config.get("retry_period", 300.0))
 
             storage_limit_gb = config.get("storage_limit_gb")
@@ -591,6 +667,8 @@ class BaseHistorianAgent(Agent):
         self.gather_timing_data = gather_timing_data
         self._backup_storage_limit_gb = backup_storage_limit_gb
         self._backup_storage_report = backup_storage_report
+        self._backup_storage_wal = backup_storage_wal
+        self._raw_cache_values = raw_cache_values
         self._retry_period = retry_period
         self._submit_size_limit = submit_size_limit
         self._max_time_publishing = max_time_publishing
@@ -624,7 +702,7 @@ class BaseHistorianAgent(Agent):
                                    custom_topics_list)
 
         self.stop_process_thread()
-        self._device_data_filter = config.get("device_data_filter")
+        self._set_device_data_filter(config.get("device_data_filter"))
         try:
             self.configure(config)
         except Exception as e:
@@ -690,7 +768,33 @@ class BaseHistorianAgent(Agent):
 
         rpc_peer = self.vip.rpc.context.vip_message.peer
         _log.debug("insert called by {} with {} records".format(rpc_peer, len(records)))
+        self._insert_records(records)
+
+    @RPC.export
+    def insert_compressed(self, data):
+        """RPC method to allow remote inserts of a compressed list of
+        records to the local cache
+
+        Used by the DataMover to transfer large backlogs in fewer and smaller
+        messages than :py:meth:`insert`.
+
+        :param data: List of records as returned by
+                     :py:func:`compress_records`
+        :type data: str
+        :return: number of records inserted
+        :rtype: int
+        """
+        if self.no_insert:
+            raise RuntimeError("Insert not supported by this historian.")
+
+        records = decompress_records(data)
+        rpc_peer = self.vip.rpc.context.vip_message.peer
+        _log.debug("insert_compressed called by {} with {} records ({} bytes)".format(
+            rpc_peer, len(records), len(data)))
+        self._insert_records(records)
+        return len(records)
 
+    def _insert_records(self, records):
         for r in records:
             topic = r['topic']
             headers = r['headers']
@@ -900,31 +1004,11 @@ class BaseHistorianAgent(Agent):
         # we strip it off to get the base device
         parts = topic.split('/')
         device = '/'.join(parts[1:-1])
-        # msg = [{data},{meta}] format
-        msg = [{}, {}]
         try:
             # If the filter is empty pass all data.
             if self._device_data_filter:
-                for _filter, point_list in self._device_data_filter.items():
-                    # If filter is not empty only topics that contain the key
-                    # will be kept.
-                    if _filter in device:
-                        for point in point_list:
-                            # devices all publish
-                            if isinstance(message, list):
-                                # Only points in the point list will be added to the message payload
-                                if point in message[0]:
-                                    msg[0][point] = message[0][point]
-                                    msg[1][point] = message[1][point]
-                            else:
-                                # other devices publish (devices/campus/building/device/point)
-                                msg = None
-                                if point in device:
-                                    msg = message
-                                    # if the point in in the parsed topic then exit for loop
-                                    break
-                if (isinstance(msg, list) and not msg[0]) or \
-                        (isinstance(msg, (float, int, str)) and msg is None):
+                msg = self._filter_device_data(device, message)
+                if msg is None:
                     _log.debug("Topic: {} - is not in configured to be stored".format(topic))
                     return
             else:
@@ -934,6 +1018,56 @@ class BaseHistorianAgent(Agent):
             msg = message
         self._capture_data(peer, sender, bus, topic, headers, msg, device)
 
+    def _set_device_data_filter(self, device_data_filter):
+        """
+        Precompile the device_data_filter configuration into a list of
+        (device filter, point set) pairs and reset the per device cache.
+        """
+        self._device_data_filter = device_data_filter
+        self._device_filter_list = [(device_filter, frozenset(point_list))
+                                    for device_filter, point_list in (device_data_filter or {}).items()]
+        # device -> frozenset of points to keep, None if no filter matches the device.
+        self._device_filter_cache = {}
+
+    def _get_device_filter_points(self, device):
+        try:
+            return self._device_filter_cache[device]
+        except KeyError:
+            pass
+        points = None
+        for device_filter, filter_points in self._device_filter_list:
+            # Only devices that contain the filter key are kept.
+            if device_filter in device:
+                points = filter_points if points is None else points | filter_points
+        self._device_filter_cache[device] = points
+        return points
+
+    def _filter_device_data(self, device, message):
+        """
+        Apply the device_data_filter to a device publish.
+
+        :param device: device path without the leading 'devices' and trailing 'all'
+        :param message: published message
+        :returns: message containing only the configured points or None if
+                  nothing from the publish should be kept.
+        """
+        points = self._get_device_filter_points(device)
+        if not points:
+            return None
+        if isinstance(message, list):
+            # devices all publish, only points in the point list will be added to the message payload
+            values = message[0]
+            meta = message[1] if len(message) > 1 else {}
+            filtered = {point: value for point, value in values.items() if point in points}
+            if not filtered:
+                return None
+            return [filtered, {point: meta[point] for point in filtered if point in meta}]
+        # other devices publish (devices/campus/building/device/point)
+        for point in points:
+            if point in device:
+                return message
+        return None
+
     def _capture_analysis_data(self, peer, sender, bus, topic, headers,
                                message):
         """Capture analaysis data and submit it to be published by a historian.
@@ -1007,13 +1141,8 @@ class BaseHistorianAgent(Agent):
         if self.gather_timing_data:
             add_timing_data_to_header(headers, self.core.agent_uuid or self.core.identity, "collected")
 
-        for key, value in values.items():
-            point_topic = device + '/' + key
-            self._event_queue.put({'source': source,
-                                   'topic': point_topic,
-                                   'readings': [(timestamp, value)],
-                                   'meta': meta.get(key, {}),
-                                   'headers': headers})
+        self._event_queue.put(DeviceBatch(source, device, timestamp, headers,
+                                          list(values.keys()), list(values.values()), meta))
 
     def _capture_actuator_data(self, topic, headers, message, match):
         """Capture actuation data and submit it to be published by a historian.
@@ -1125,7 +1254,8 @@ class BaseHistorianAgent(Agent):
                 return
 
             backupdb = BackupDatabase(self, self._backup_storage_limit_gb,
-                                      self._backup_storage_report)
+                                      self._backup_storage_report,
+                                      wal_mode=self._backup_storage_wal)
             self._update_status({STATUS_KEY_CACHE_COUNT: backupdb.get_backlog_count()})
 
             # now that everything is setup we need to make sure that the topics
@@ -1192,20 +1322,24 @@ class BaseHistorianAgent(Agent):
                 if not self._setup_failed:
                     wait_for_input = True
                     start_time = datetime.utcnow()
+                    # Start each publishing pass with the oldest cached records.
+                    backupdb.reset_outstanding_position()
 
                     while True:
                         # use local variable that will be written only one time during this loop
                         cache_only_enabled = self.is_cache_only_enabled()
                         to_publish_list = backupdb.get_outstanding_to_publish(
-                            self._submit_size_limit)
+                            self._submit_size_limit, raw=self._raw_cache_values)
 
                         # Check to see if we are caught up.
                         if not to_publish_list:
                             if self._message_publish_count > 0 and next_report_count < current_published_count:
                                 _log.info("Historian processed {} total records.".format(current_published_count))
                                 next_report_count = current_published_count + self._message_publish_count
-                            self._update_status({STATUS_KEY_BACKLOGGED: False,
-                                                 STATUS_KEY_CACHE_COUNT: backupdb.get_backlog_count()})
+                            backlog_count = backupdb.get_backlog_count()
+                            old_backlog_state = self._current_status_context[STATUS_KEY_BACKLOGGED]
+                            self._update_status({STATUS_KEY_BACKLOGGED: old_backlog_state and backlog_count > 0,
+                                                 STATUS_KEY_CACHE_COUNT: backlog_count})
                             break
 
                         # Check for a stop for reconfiguration.
@@ -1360,6 +1494,11 @@ class BaseHistorianAgent(Agent):
                 ...
             ]
 
+        If the historian is configured with ``raw_cache_values`` each record
+        has 'value_string' and 'header_string' keys holding the cached JSON
+        text instead of 'value' and 'headers', which saves decoding values
+        that are written to the data store as JSON anyway.
+
         The contents of `meta` is not consistent. The keys in the meta data
         values can be different and can
         change along with the values of the meta data. It is safe to assume
@@ -1461,7 +1600,7 @@ class BackupDatabase:
     """
 
     def __init__(self, owner, backup_storage_limit_gb, backup_storage_report,
-                 check_same_thread=True):
+                 check_same_thread=True, wal_mode=False):
         # The topic cache is only meant as a local lookup and should not be
         # accessed via the implemented historians.
         self._backup_cache = {}
@@ -1472,14 +1611,21 @@ class BackupDatabase:
         self._owner = weakref.ref(owner)
         self._backup_storage_limit_gb = backup_storage_limit_gb
         self._backup_storage_report = backup_storage_report
+        self._wal_mode = wal_mode
         self._connection = None
         self._setupdb(check_same_thread)
         self._dupe_ids = []
         self._unique_ids = []
+        # (ts, id) keys of the rows in _unique_ids, used to read failed publishes again.
+        self._unique_keys = []
+        # (ts, id) keyset position the next get_outstanding_to_publish continues after.
+        self._next_key = None
+        # (ts, id) keys of the first and last rows read by the last get_outstanding_to_publish.
+        self._fetched_range = None
 
     def backup_new_data(self, new_publish_list, time_tolerance_check=False):
         """
-        :param new_publish_list: An iterable of records to cache to disk.
+        :param new_publish_list: An iterable of records or :py:class:`DeviceBatch` objects to cache to disk.
         :type new_publish_list: iterable
         :param time_tolerance_check: Boolean to know if time tolerance check is enabled.default =False
         :returns: True if records the cache has reached a full state.
@@ -1488,76 +1634,81 @@ class BackupDatabase:
         #_log.debug("Backing up unpublished values.")
         c = self._connection.cursor()
         self.time_error_records = False # will update at the end of the method
+        outstanding_rows = []
+        time_error_rows = []
+        # All the points of a device publish share the same headers object so
+        # only serialize it once per batch.
+        header_strings = {}
         for item in new_publish_list:
             if item is None:
                 continue
+
+            if isinstance(item, DeviceBatch):
+                source = item.source
+                headers = item.headers
+                header_string = dumps(headers)
+                timestamp = item.timestamp
+                rows = outstanding_rows
+                if timestamp is None:
+                    timestamp = get_aware_utc_now()
+                elif time_tolerance_check and headers.get("time_error"):
+                    # Records outside the configured time tolerance go to the time_error table.
+                    _log.warning(f"Found data with timestamp {timestamp} that is out of configured tolerance ")
+                    rows = time_error_rows
+                prefix = item.device + '/'
+                for point, value in zip(item.points, item.values):
+                    topic_id = self._get_topic_id(c, prefix + point)
+                    meta = item.meta.get(point)
+                    if meta:
+                        self._update_meta(c, source, topic_id, meta)
+                    rows.append((timestamp, source, topic_id, dumps(value), header_string))
+                continue
+
             source = item['source']
             topic = item['topic']
             meta = item.get('meta', {})
             readings = item['readings']
             headers = item.get('headers', {})
 
-            topic_id = self._backup_cache.get(topic)
-
-            if topic_id is None:
-                c.execute('''INSERT INTO topics values (?,?)''',
-                          (None, topic))
-                c.execute('''SELECT last_insert_rowid()''')
-                row = c.fetchone()
-                topic_id = row[0]
-                self._backup_cache[topic_id] = topic
-                self._backup_cache[topic] = topic_id
-
-            meta_dict = self._meta_data[(source, topic_id)]
-            for name, value in meta.items():
-                current_meta_value = meta_dict.get(name)
-                if current_meta_value != value:
-                    c.execute('''INSERT OR REPLACE INTO metadata
-                                 values(?, ?, ?, ?)''',
-                              (source, topic_id, name, value))
-                    meta_dict[name] = value
-
-            # Check outside loop so that we do the check inside loop only if necessary
-            if time_tolerance_check:
-                for timestamp, value in readings:
-                    if timestamp is None:
-                        timestamp = get_aware_utc_now()
-                    elif headers["time_error"]:
-                        _log.warning(f"Found data with timestamp {timestamp} that is out of configured tolerance ")
-                        c.execute(
-                            '''INSERT INTO time_error
-                            values(NULL, ?, ?, ?, ?, ?)''',
-                            (timestamp, source, topic_id, dumps(value), dumps(headers)))
-                        self.time_error_records = True
-                        continue  # continue to the next record. don't record in outstanding
-                    try:
-                        c.execute(
-                            '''INSERT INTO outstanding
-                            values(NULL, ?, ?, ?, ?, ?)''',
-                            (timestamp, source, topic_id, dumps(value), dumps(headers)))
-                        self._record_count += 1
-                    except sqlite3.IntegrityError as e:
-                        # In the case where we are upgrading an existing installed historian the
-                        # unique constraint may still exist on the outstanding database.
-                        # Ignore this case.
-                        _log.warning(f"sqlite3.Integrity error -- {e}")
-                        pass
-            else:
-                for timestamp, value in readings:
-                    if timestamp is None:
-                        timestamp = get_aware_utc_now()
-                    try:
-                        c.execute(
-                            '''INSERT INTO outstanding
-                            values(NULL, ?, ?, ?, ?, ?)''',
-                            (timestamp, source, topic_id, dumps(value), dumps(headers)))
-                        self._record_count += 1
-                    except sqlite3.IntegrityError as e:
-                        # In the case where we are upgrading an existing installed historian the
-                        # unique constraint may still exist on the outstanding database.
-                        # Ignore this case.
-                        _log.warning(f"sqlite3.Integrity error -- {e}")
-                        pass
+            # Keep a reference to headers with its string so the id is not reused within the batch.
+            cached_header = header_strings.get(id(headers))
+            if cached_header is None or cached_header[0] is not headers:
+                cached_header = header_strings[id(headers)] = (headers, dumps(headers))
+            header_string = cached_header[1]
+
+            topic_id = self._get_topic_id(c, topic)
+            self._update_meta(c, source, topic_id, meta)
+
+            # Records outside the configured time tolerance go to the time_error table.
+            time_error = time_tolerance_check and headers.get("time_error")
+            for timestamp, value in readings:
+                if timestamp is None:
+                    timestamp = get_aware_utc_now()
+                elif time_error:
+                    _log.warning(f"Found data with timestamp {timestamp} that is out of configured tolerance ")
+                    # don't record in outstanding
+                    time_error_rows.append((timestamp, source, topic_id, dumps(value), header_string))
+                    continue
+                outstanding_rows.append((timestamp, source, topic_id, dumps(value), header_string))
+
+        if time_error_rows:
+            c.executemany(
+                '''INSERT INTO time_error
+                values(NULL, ?, ?, ?, ?, ?)''',
+                time_error_rows)
+            self.time_error_records = True
+
+        if outstanding_rows:
+            # In the case where we are upgrading an existing installed historian the
+            # unique constraint may still exist on the outstanding database.
+            # Ignore those rows.
+            c.executemany(
+                '''INSERT OR IGNORE INTO outstanding
+                values(NULL, ?, ?, ?, ?, ?)''',
+                outstanding_rows)
+            self._record_count += c.rowcount
+            if c.rowcount < len(outstanding_rows):
+                _log.warning(f"Ignored {len(outstanding_rows) - c.rowcount} records that violate cache constraints")
 
         cache_full = False
         if self._backup_storage_limit_gb is not None:
@@ -1643,6 +1794,29 @@ class BackupDatabase:
                 self.time_error_records = True
         return cache_full
 
+    def _get_topic_id(self, c, topic):
+        topic_id = self._backup_cache.get(topic)
+
+        if topic_id is None:
+            c.execute('''INSERT INTO topics values (?,?)''',
+                      (None, topic))
+            c.execute('''SELECT last_insert_rowid()''')
+            row = c.fetchone()
+            topic_id = row[0]
+            self._backup_cache[topic_id] = topic
+            self._backup_cache[topic] = topic_id
+        return topic_id
+
+    def _update_meta(self, c, source, topic_id, meta):
+        meta_dict = self._meta_data[(source, topic_id)]
+        for name, value in meta.items():
+            current_meta_value = meta_dict.get(name)
+            if current_meta_value != value:
+                c.execute('''INSERT OR REPLACE INTO metadata
+                             values(?, ?, ?, ?)''',
+                          (source, topic_id, name, value))
+                meta_dict[name] = value
+
     def remove_successfully_published(self, successful_publishes,
                                       submit_size):
         """
@@ -1662,9 +1836,19 @@ class BackupDatabase:
         c = self._connection.cursor()
         try:
             if None in successful_publishes:
-                c.executemany('''DELETE FROM outstanding
-                                          WHERE id = ?''',
-                              ((_id,) for _id in self._unique_ids))
+                if self._fetched_range is not None and not self._dupe_ids:
+                    # Every row in the fetched key range was published, so
+                    # remove the whole range in a single statement.
+                    (first_ts, first_id), (last_ts, last_id) = self._fetched_range
+                    c.execute('''DELETE FROM outstanding
+                                 WHERE ts >= ? AND ts <= ?
+                                 AND (ts > ? OR id >= ?)
+                                 AND (ts < ? OR id <= ?)''',
+                              (first_ts, last_ts, first_ts, first_id, last_ts, last_id))
+                else:
+                    c.executemany('''DELETE FROM outstanding
+                                              WHERE id = ?''',
+                                  ((_id,) for _id in self._unique_ids))
                 if self._record_count < c.rowcount:
                     self._record_count = 0
                 else:
@@ -1677,65 +1861,135 @@ class BackupDatabase:
                               ((_id,) for _id in
                                successful_publishes))
                 self._record_count -= len(temp)
+                self._retry_unpublished(successful_publishes)
         finally:
             # if we don't clear these attributes on every publish,
             # we could possibly delete a non-existing record on the next publish
             self._unique_ids.clear()
+            self._unique_keys.clear()
             self._dupe_ids.clear()
+            self._fetched_range = None
 
         self._connection.commit()
 
-    def get_outstanding_to_publish(self, size_limit):
+    def _retry_unpublished(self, successful_publishes):
+        """
+        Move the keyset position back to the first record of the last batch
+        that was not published so the next call to
+        :py:meth:`get_outstanding_to_publish` reads it again.
+        """
+        for _id, (key_ts, key_id) in zip(self._unique_ids, self._unique_keys):
+            if _id not in successful_publishes:
+                retry_key = (key_ts, key_id - 1)
+                if self._next_key is None or retry_key < self._next_key:
+                    self._next_key = retry_key
+                return
+
+    def reset_outstanding_position(self):
+        """
+        Make the next call to :py:meth:`get_outstanding_to_publish` start
+        from the oldest record in the cache again.
+        """
+        self._next_key = None
+
+    def get_outstanding_to_publish(self, size_limit, raw=False):
         """
         Retrieve up to `size_limit` records from the cache. Guarantees a unique list of records,
         where unique is defined as (topic, timestamp).
 
+        Records are read in (timestamp, id) order using keyset pagination.
+        Each call continues after the records returned by the previous call,
+        at the first duplicate it skipped or at the first record
+        :py:meth:`remove_successfully_published` was not told about, so
+        records that failed to publish are read again by the next call.
+
         :param size_limit: Max number of records to retrieve.
         :type size_limit: int
+        :param raw: If True return the cached JSON strings as 'value_string'
+                    and 'header_string' instead of decoding them into
+                    'value' and 'headers'.
+        :type raw: bool
         :returns: List of records for publication.
         :rtype: list
         """
         # _log.debug("Getting oldest outstanding to publish.")
         c = self._connection.cursor()
-        c.execute('select * from outstanding order by ts limit ?', (size_limit,))
+        # ts is cast to text for the keyset so it compares exactly as stored.
+        # The ts index includes the rowid (id) so it serves the (ts, id) ordering.
+        from_start = self._next_key is None
+        if from_start:
+            c.execute('''SELECT id, ts, source, topic_id, value_string, header_string, CAST(ts AS TEXT)
+                         FROM outstanding
+                         ORDER BY ts, id LIMIT ?''', (size_limit,))
+        else:
+            key_ts, key_id = self._next_key
+            c.execute('''SELECT id, ts, source, topic_id, value_string, header_string, CAST(ts AS TEXT)
+                         FROM outstanding
+                         WHERE ts >= ? AND (ts > ? OR id > ?)
+                         ORDER BY ts, id LIMIT ?''', (key_ts, key_ts, key_id, size_limit))
         results = []
         unique_records = set()
+        # Records of the same topic in a batch share one copy of its metadata.
+        meta_copies = {}
+        first_key = last_key = first_dupe_key = None
         for row in c:
             _id = row[0]
             timestamp = row[1]
             source = row[2]
             topic_id = row[3]
-            value = loads(row[4])
-            headers = {} if row[5] is None else loads(row[5])
-            meta = self._meta_data[(source, topic_id)].copy()
-            topic = self._backup_cache[topic_id]
+            last_key = (row[6], _id)
+            if first_key is None:
+                first_key = last_key
 
             # check for duplicates before appending row to results
             if (topic_id, timestamp) in unique_records:
                 _log.debug(f"Found duplicate from cache: {row}")
                 self._dupe_ids.append(_id)
+                if first_dupe_key is None:
+                    first_dupe_key = (row[6], _id - 1)
                 continue
             unique_records.add((topic_id, timestamp))
             self._unique_ids.append(_id)
-
-            results.append({'_id': _id,
-                            'timestamp': timestamp.replace(tzinfo=pytz.UTC),
-                            'source': source,
-                            'topic': topic,
-                            'value': value,
-                            'headers': headers,
-                            'meta': meta})
+            self._unique_keys.append(last_key)
+
+            meta = meta_copies.get((source, topic_id))
+            if meta is None:
+                meta = self._meta_data[(source, topic_id)].copy()
+                meta_copies[(source, topic_id)] = meta
+
+            record = {'_id': _id,
+                      'timestamp': timestamp.replace(tzinfo=pytz.UTC),
+                      'source': source,
+                      'topic': self._backup_cache[topic_id]}
+            if raw:
+                record['value_string'] = row[4]
+                record['header_string'] = row[5]
+            else:
+                record['value'] = loads(row[4])
+                record['headers'] = {} if row[5] is None else loads(row[5])
+            record['meta'] = meta
+            results.append(record)
 
         c.close()
+
+        if last_key is None:
+            # Read through to the end of the cache, start over next time.
+            self._next_key = None
+            self._fetched_range = None
+        else:
+            # Duplicates skipped in this batch must be read by the next call.
+            self._next_key = first_dupe_key if first_dupe_key is not None else last_key
+            self._fetched_range = (first_key, last_key)
+
         # If we were backlogged at startup and our initial estimate was
         # off this will correct it.
-        if len(results) < size_limit:
+        if from_start and len(results) < size_limit:
             self._record_count = len(results)
 
-        # if we have duplicates, we must count them as part of the "real" total of _record_count
-        if self._dupe_ids:
-            _log.debug(f"Adding duplicates to the total record count: {self._dupe_ids}")
-            self._record_count += len(self._dupe_ids)
+            # if we have duplicates, we must count them as part of the "real" total of _record_count
+            if self._dupe_ids:
+                _log.debug(f"Adding duplicates to the total record count: {self._dupe_ids}")
+                self._record_count += len(self._dupe_ids)
 
         return results
 
@@ -1769,6 +2023,15 @@ class BackupDatabase:
             check_same_thread=check_same_thread)
 
         c = self._connection.cursor()
+        if self._wal_mode:
+            # Write ahead logging with NORMAL sync only fsyncs on checkpoints which makes cache
+            # inserts much cheaper on slow storage. A power loss may lose the last few commits.
+            c.execute('''PRAGMA journal_mode = WAL''')
+            c.execute('''PRAGMA synchronous = NORMAL''')
+        else:
+            # WAL mode is persistent in the database file so switch back if it was turned off.
+            c.execute('''PRAGMA journal_mode = DELETE''')
+
         if self._backup_storage_limit_gb is not None:
             c.execute('''PRAGMA page_size''')
             page_size = c.fetchone()[0]
@@ -69,11 +69,15 @@ condition for querying topics based on tags. Please see documentation of
 
 
 import logging
+import operator
 import os
 import re
+import time
 
 from abc import abstractmethod
+from collections import OrderedDict
 
+from volttron.platform import jsonapi
 from volttron.platform.agent.known_identities import (PLATFORM_HISTORIAN)
 from volttron.platform.vip.agent import Agent, Core, RPC
 from volttron.platform.vip.agent.errors import Unreachable
@@ -81,6 +85,281 @@ from volttron.platform.vip.agent.errors import Unreachable
 
 _log = logging.getLogger(__name__)
 
+# Regular expression characters that stop a topic name part from being looked
+# up as plain text.
+_REGEX_CHARS = re.compile(r'[.^$*+?{}\[\]\\|()]')
+# Regular expression constructs that can make the parts of a pattern match
+# across the / separator.
+_REGEX_GROUPING = re.compile(r'[|(){}\[\]\\]')
+# Patterns that match no topic reload the topic list at most once in this many
+# seconds, so a request with many unknown patterns does not reload it for each.
+MISS_REFRESH_INTERVAL = 10
+
+
+class TopicPrefixTree(object):
+    """
+    Topic names stored as a tree of their / separated parts. Used by
+    :py:meth:`BaseTaggingService.get_matching_topic_prefixes` to find the
+    topic prefixes that match a pattern without asking the historian.
+    """
+
+    def __init__(self, topics=()):
+        self._root = {}
+        self._topics = set()
+        self.update(topics)
+
+    def __len__(self):
+        return len(self._topics)
+
+    def __contains__(self, topic):
+        return topic in self._topics
+
+    def add(self, topic):
+        if topic in self._topics:
+            return
+        self._topics.add(topic)
+        node = self._root
+        for part in topic.split('/'):
+            node = node.setdefault(part, {})
+
+    def update(self, topics):
+        """
+        Make the tree hold exactly the given topics. Only new topics are added
+        unless topics were removed, in which case the tree is rebuilt.
+
+        :return: number of topics that were not in the tree before
+        :rtype: int
+        """
+        topics = set(topics)
+        added = len(topics - self._topics)
+        if self._topics - topics:
+            self._root = {}
+            self._topics = set()
+        for topic in topics - self._topics:
+            self.add(topic)
+        return added
+
+    def match(self, topic_pattern):
+        """
+        Returns the topic prefixes that match topic_pattern. See
+        :py:meth:`BaseTaggingService.get_matching_topic_prefixes` for the
+        pattern syntax.
+
+        :param topic_pattern: pattern to match against
+        :type topic_pattern: str
+        :return: set of topic prefixes with as many parts as the pattern
+        :rtype: set
+        """
+        # replace * with .* so regex would match correctly
+        topic_pattern = topic_pattern.replace("*", ".*")
+        pattern_regex = re.compile(topic_pattern + "$")
+        pattern_parts = topic_pattern.split("/")
+        if _REGEX_GROUPING.search(topic_pattern):
+            # Parts may not line up with the topic parts, only the
+            # complete pattern is checked.
+            part_matchers = [None] * len(pattern_parts)
+        else:
+            part_matchers = [part if not _REGEX_CHARS.search(part)
+                             else re.compile(part + "$")
+                             for part in pattern_parts]
+
+        nodes = [(None, self._root)]
+        for matcher in part_matchers:
+            next_nodes = []
+            for prefix, node in nodes:
+                if isinstance(matcher, str):
+                    children = [(matcher, node[matcher])] if matcher in node else []
+                else:
+                    children = [(part, child) for part, child in node.items()
+                                if matcher is None or matcher.match(part)]
+                for part, child in children:
+                    next_nodes.append((part if prefix is None else prefix + "/" + part, child))
+            nodes = next_nodes
+
+        return {prefix for prefix, node in nodes if pattern_regex.match(prefix)}
+
+
+_COMPARISONS = {'=': operator.eq, '!=': operator.ne, '>': operator.gt,
+                '>=': operator.ge, '<': operator.lt, '<=': operator.le}
+_ARITHMETIC = {'+': operator.add, '-': operator.sub, '*': operator.mul,
+               '/': operator.truediv, '%': operator.mod}
+
+
+class TagIndex(object):
+    """
+    In memory inverted index of the tags of topic prefixes. For every tag
+    and value it keeps the set of topic prefixes as a bitset of topic prefix
+    ids, so the abstract syntax tree returned by :py:func:`parse_query` is
+    evaluated with set operations instead of a database query.
+
+    Values are compared by type: numbers with numbers, strings with strings.
+    Tagging services whose data store compares values differently override
+    :py:meth:`TagIndex.normalize` and :py:meth:`TagIndex.compare`.
+    """
+
+    # Whether tag != value matches topic prefixes without the tag.
+    ne_matches_missing = False
+    # Flags used for LIKE conditions.
+    like_flags = 0
+
+    def __init__(self, tag_refs):
+        """
+        :param tag_refs: dictionary of reference tags and their parent tag
+        """
+        self.tag_refs = tag_refs
+        self._ids = {}
+        self._prefixes = []
+        self._tags = []
+        self._values = {}
+        self._all = 0
+
+    def __len__(self):
+        return len(self._prefixes)
+
+    def set_tags(self, topic_prefix, tags):
+        """
+        Adds or replaces tags of a topic prefix.
+
+        :param topic_prefix: topic name or topic name prefix
+        :param tags: dictionary of tag and value
+        """
+        topic_id = self._ids.get(topic_prefix)
+        if topic_id is None:
+            topic_id = self._ids[topic_prefix] = len(self._prefixes)
+            self._prefixes.append(topic_prefix)
+            self._tags.append({})
+            self._all |= 1 << topic_id
+        bit = 1 << topic_id
+        topic_tags = self._tags[topic_id]
+        for tag, value in tags.items():
+            value = self.normalize(value)
+            values = self._values.setdefault(tag, {})
+            if tag in topic_tags:
+                old_key = self._key(topic_tags[tag])
+                old_value, old_bits = values[old_key]
+                old_bits &= ~bit
+                if old_bits:
+                    values[old_key] = (old_value, old_bits)
+                else:
+                    del values[old_key]
+            topic_tags[tag] = value
+            key = self._key(value)
+            stored, bits = values.get(key, (value, 0))
+            values[key] = (stored, bits | bit)
+
+    def query(self, ast, skip=0, count=None, order=None):
+        """
+        Returns the topic prefixes matching a query condition. See
+        :py:meth:`BaseTaggingService.query_topics_by_tags` for the
+        parameters.
+
+        :return: list of topic prefixes ordered by name
+        :rtype: list
+        """
+        result = sorted(self._topic_prefixes(self.evaluate(ast)),
+                        reverse=order == 'LAST_TO_FIRST')
+        if count is None or count < 0:
+            return result[skip:]
+        return result[skip:skip + count]
+
+    def evaluate(self, ast):
+        """
+        Returns the bitset of the topic prefix ids matching a query
+        condition.
+        """
+        op = ast[0].lower()
+        if op == 'and':
+            return self.evaluate(ast[1]) & self.evaluate(ast[2])
+        if op == 'or':
+            return self.evaluate(ast[1]) | self.evaluate(ast[2])
+        if op == 'not':
+            return self._all & ~self.evaluate(ast[2])
+        value = ast[2]
+        if isinstance(value, tuple):
+            value = self._calculate(value)
+        return self._condition(op, ast[1], value)
+
+    def normalize(self, value):
+        """Returns value as the data store would store it."""
+        return value
+
+    def compare(self, op, stored, value):
+        """
+        Returns True if a stored tag value satisfies the comparison with a
+        (normalized) query value.
+        """
+        if isinstance(stored, bool) or isinstance(value, bool):
+            if not (isinstance(stored, bool) and isinstance(value, bool)):
+                return op == '!='
+        elif isinstance(stored, (int, float)) != isinstance(value, (int, float)):
+            return op == '!='
+        try:
+            return _COMPARISONS[op](stored, value)
+        except TypeError:
+            return False
+
+    def _condition(self, op, tag, value):
+        tags = tag.split('.')
+        if len(tags) == 2:
+            # Topic prefixes whose reference tag points to a topic prefix
+            # with the parent tag that satisfies the condition.
+            parents = self._condition('=', self.tag_refs[tags[0]], True) & \
+                self._condition(op, tags[1], value)
+            parent_prefixes = set(self._topic_prefixes(parents))
+            result = 0
+            for stored, bits in self._values.get(tags[0], {}).values():
+                if isinstance(stored, str) and stored in parent_prefixes:
+                    result |= bits
+            return result
+
+        values = self._values.get(tag, {})
+        if op == 'like':
+            regex = re.compile(value, self.like_flags)
+            result = 0
+            for stored, bits in values.values():
+                if self._like(regex, stored):
+                    result |= bits
+            return result
+
+        value = self.normalize(value)
+        if op == '!=' and self.ne_matches_missing:
+            return self._all & ~self._condition('=', tag, value)
+        if op == '=':
+            entry = values.get(self._key(value))
+            if entry is not None and self.compare(op, entry[0], value):
+                return entry[1]
+            return 0
+        result = 0
+        for stored, bits in values.values():
+            if self.compare(op, stored, value):
+                result |= bits
+        return result
+
+    def _like(self, regex, stored):
+        return isinstance(stored, str) and regex.search(stored) is not None
+
+    def _calculate(self, expr):
+        if not isinstance(expr, tuple):
+            return float(expr) if isinstance(expr, str) else expr
+        return _ARITHMETIC[expr[0]](self._calculate(expr[1]),
+                                    self._calculate(expr[2]))
+
+    def _topic_prefixes(self, bits):
+        return [self._prefixes[i]
+                for i, bit in enumerate(reversed(bin(bits)[2:])) if bit == '1']
+
+    @staticmethod
+    def _key(value):
+        if isinstance(value, bool):
+            return bool, value
+        if isinstance(value, (int, float)):
+            return float, value
+        try:
+            hash(value)
+        except TypeError:
+            return list, jsonapi.dumps(value)
+        return type(value), value
+
 
 class BaseTaggingService(Agent):
     """This is the base class for tagging service implementations. There can
@@ -88,10 +367,18 @@ class BaseTaggingService(Agent):
     the tag details
     """
 
-    def __init__(self, historian_vip_identity=None, **kwargs):
+    def __init__(self, historian_vip_identity=None, topic_cache_max_age=300,
+                 use_tag_index=False, query_cache_size=100, **kwargs):
         super(BaseTaggingService, self).__init__(**kwargs)
         self.valid_tags = dict()
         self.tag_refs = dict()
+        self.use_tag_index = use_tag_index
+        self.tag_index = None
+        self.query_cache_size = query_cache_size
+        self._query_cache = OrderedDict()
+        self.topic_cache_max_age = topic_cache_max_age
+        self._topic_tree = TopicPrefixTree()
+        self._topic_tree_loaded = None
         self.historian_vip_identity = historian_vip_identity
         if historian_vip_identity is None:
             self.historian_vip_identity = PLATFORM_HISTORIAN
@@ -112,6 +399,8 @@ class BaseTaggingService(Agent):
         - :py:meth:`BaseTaggingService.setup`
         - :py:meth:`BaseTaggingService.load_valid_tags`
         - :py:meth:`BaseTaggingService.load_tag_refs`
+        - :py:meth:`BaseTaggingService.load_tag_index` if use_tag_index is
+          True
 
         """
         # load resources and make it available for implementing classes
@@ -124,6 +413,8 @@ class BaseTaggingService(Agent):
         self.setup()
         self.load_valid_tags()
         self.load_tag_refs()
+        if self.use_tag_index:
+            self.tag_index = self.load_tag_index()
 
     @abstractmethod
     def setup(self):
@@ -152,6 +443,20 @@ class BaseTaggingService(Agent):
         """
         pass
 
+    def load_tag_index(self):
+        """
+        Called after load_tag_refs if use_tag_index is True. Implementing
+        classes that support it should return a :py:class:`TagIndex` loaded
+        with the tags of all topic prefixes, keep it up to date in
+        insert_topic_tags and use it in query_topics_by_tags.
+
+        :return: loaded tag index or None if not supported
+        :rtype: TagIndex
+        """
+        _log.warning("{} does not support an in memory tag index".format(
+            self.__class__.__name__))
+        return None
+
     @RPC.export
     def get_categories(self, include_description=False, skip=0, count=None,
                        order="FIRST_TO_LAST"):
@@ -434,8 +739,20 @@ class BaseTaggingService(Agent):
             condition = self._process_and_or_param(and_condition,
                                                    or_condition)
         ast = parse_query(condition, self.valid_tags, self.tag_refs)
-        return self.query_topics_by_tags(ast=ast, skip=skip, count=count,
-                                         order=order)
+        if not self.query_cache_size:
+            return self.query_topics_by_tags(ast=ast, skip=skip, count=count,
+                                             order=order)
+
+        # Results are cached until tags are added.
+        key = (ast, skip, count, order)
+        result = self._query_cache.pop(key, None)
+        if result is None:
+            result = self.query_topics_by_tags(ast=ast, skip=skip,
+                                               count=count, order=order)
+            if len(self._query_cache) >= self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        self._query_cache[key] = result
+        return list(result)
 
     @abstractmethod
     def query_topics_by_tags(self, ast, skip=0, count=None, order=None):
@@ -537,7 +854,10 @@ class BaseTaggingService(Agent):
 
         """
         _log.debug("add_tags: tags:{}".format(tags))
-        return self.insert_topic_tags(tags, update_version)
+        try:
+            return self.insert_topic_tags(tags, update_version)
+        finally:
+            self._query_cache.clear()
 
 
     @abstractmethod
@@ -566,13 +886,15 @@ class BaseTaggingService(Agent):
 
     def get_matching_topic_prefixes(self, topic_pattern):
         """
-        Queries the configured/platform historian to get the list of topics
-        that match the given topic pattern. So use of this api require's
-        the configured historian (or platform.historian if specific historian id
-        is not specified) to be running. This api makes RPC calls to
-        platform.historian's :py:meth:`BaseHistorian.get_topic_list` to get
-        the list of topics. This is used to find topic/topic prefix matching
-        any given input topic pattern.
+        Returns the list of topic prefixes that match the given topic
+        pattern. Patterns are matched against a tree of the topics known to
+        the configured/platform historian, so use of this api require's the
+        configured historian (or platform.historian if specific historian id
+        is not specified) to be running. The tree is loaded with
+        platform.historian's :py:meth:`BaseHistorian.get_topic_list` and
+        refreshed when it is older than topic_cache_max_age seconds or when a
+        pattern does not match any topic and the tree is older than
+        MISS_REFRESH_INTERVAL seconds.
 
         Pattern matching done here is not true string pattern matching.
         Matches are applied to different topic_prefix.
@@ -585,44 +907,30 @@ class BaseTaggingService(Agent):
         :type topic_pattern: str
         :return: list of topic prefixes.
         """
-        # replace * with .* so regex would match correctly
-        topic_pattern = topic_pattern.replace("*", ".*")
-        topic_prefixes = set()
+        if self._topic_tree_loaded is None or \
+                time.time() - self._topic_tree_loaded > self.topic_cache_max_age:
+            self.refresh_topics()
+        topic_prefixes = self._topic_tree.match(topic_pattern)
+        if not topic_prefixes and \
+                time.time() - self._topic_tree_loaded > MISS_REFRESH_INTERVAL:
+            # The topic may have been added to the historian since the last
+            # refresh.
+            self.refresh_topics()
+            topic_prefixes = self._topic_tree.match(topic_pattern)
+        _log.debug("topic prefixes {}".format(topic_prefixes))
+        return topic_prefixes
+
+    def refresh_topics(self):
+        """
+        Updates the topics used by
+        :py:meth:`BaseTaggingService.get_matching_topic_prefixes` with the
+        list of topics of the configured historian.
+        """
         try:
-            _log.debug("Querying {} for matching topics for pattern "
-                       "{}".format(self.historian_vip_identity, topic_pattern))
-            topic_map = self.vip.rpc.call(
-                self.historian_vip_identity,
-                "get_topics_by_pattern",
-                topic_pattern=topic_pattern).get(timeout=5)
-            point_topics = list(topic_map.keys())
-            if len(point_topics) == 1 and point_topics[0] == topic_pattern:
-                # fixed string topic name
-                topic_prefixes.add(topic_pattern)
-            else:
-                # topic name pattern
-                for topic in point_topics:
-                    # tag could be for a topic prefix and not the whole topic.
-                    # eg. pattern could be 'campus/building1/device*'
-                    # returned topic from get_matching_topics could be
-                    # campus/building1/device1/p1, but we want to return
-                    # campus/building1/device1
-                    # Works only if separator is /. Else tags are always applied
-                    # to full topic names
-                    topic_parts = topic.split("/")
-                    pattern_parts = topic_pattern.split("/")
-                    result_prefix = '/'.join(topic_parts[:len(pattern_parts)])
-
-                    # get topics_by_pattern will return based on re.match
-                    # which is anything starting with given pattern
-                    # but if the pattern is /campus1/device1 we want to
-                    # match /campus1/device1 and not /campus1/device11
-                    # if pattern is /campus1/device1.* then we match both
-                    # device1 and device11
-                    if re.match(topic_pattern+"$", result_prefix):
-                        topic_prefixes.add(result_prefix)
-
-            _log.debug("topic prefixes {}".format(topic_prefixes))
+            _log.debug("Querying {} for the list of "
+                       "topics".format(self.historian_vip_identity))
+            topics = self.vip.rpc.call(self.historian_vip_identity,
+                                       "get_topic_list").get(timeout=30)
         except Unreachable:
             _log.error("add_topic_tags and add_tags "
                        "operations need plaform.historian to be running."
@@ -630,13 +938,15 @@ class BaseTaggingService(Agent):
                        "list of valid topics queried"
                        " from {}".format(self.historian_vip_identity))
             raise
-
         except Exception as e:
-            _log.error("Unknown exception while get list of topic prefix for "
-                       "given topic/topic_pattern({}). Exception:{}".format(
-                topic_pattern, e.args))
+            _log.error("Unknown exception while getting the list of topics "
+                       "from {}. Exception:{}".format(
+                self.historian_vip_identity, e.args))
             raise
-        return topic_prefixes
+        new_topics = self._topic_tree.update(topics)
+        self._topic_tree_loaded = time.time()
+        _log.debug("Loaded {} topics, {} new".format(len(self._topic_tree),
+                                                      new_topics))
 
     @staticmethod
     def _process_and_or_param(query_and_cond, query_or_cond):
@@ -1025,13 +1335,20 @@ def pretty_print(tup):
     return "( {} {} {})".format(left, tup[0], right)
 
 
+_query_parser = None
+_query_lexer = None
+
+
 def parse_query(query, tags, refs):
-    global valid_tags, tag_refs
+    global valid_tags, tag_refs, _query_parser, _query_lexer
     valid_tags = tags
     tag_refs = refs
-    query_parser = yacc.yacc()
-    lexer = lex.lex()
-    ast = query_parser.parse(query)
+    if _query_parser is None:
+        # Build the parser once, in memory only. Writing parsetab.py and
+        # parser.out would litter the agent's working directory.
+        _query_parser = yacc.yacc(debug=False, write_tables=False)
+        _query_lexer = lex.lex()
+    ast = _query_parser.parse(query, lexer=_query_lexer)
     return ast
 
 
@@ -125,7 +125,7 @@ class ControlService(BaseAgent):
         self.vip.rpc.export(lambda: self._tracker.enabled, "stats.enabled")
         self.vip.rpc.export(self._tracker.enable, "stats.enable")
         self.vip.rpc.export(self._tracker.disable, "stats.disable")
-        self.vip.rpc.export(lambda: self._tracker.stats, "stats.get")
+        self.vip.rpc.export(self._tracker.get_stats, "stats.get")
 
     @Core.receiver("onstart")
     def onstart(self, sender, **kwargs):
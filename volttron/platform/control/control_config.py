@@ -36,11 +36,12 @@
 # under Contract DE-AC05-76RL01830
 # }}}
 
-import argparse
 import os
 import sys
+import tarfile
 import tempfile
 import subprocess
+import zipfile
 from volttron.platform import jsonapi
 
 from volttron.platform.agent.known_identities import CONFIGURATION_STORE
@@ -54,7 +55,16 @@ def add_config_to_store(opts):
     opts.connection.peer = CONFIGURATION_STORE
     call = opts.connection.call
 
-    file_contents = opts.infile.read()
+    if opts.infile != "-" and _is_config_collection(opts.infile):
+        configs = read_config_files(opts.infile, opts.name, opts.config_type)
+        call("manage_store_many", opts.identity, configs)
+        return
+
+    if opts.infile == "-":
+        file_contents = sys.stdin.read()
+    else:
+        with open(opts.infile) as f:
+            file_contents = f.read()
 
     call(
         "manage_store",
@@ -65,6 +75,58 @@ def add_config_to_store(opts):
     )
 
 
+def _is_config_collection(path):
+    return os.path.isdir(path) or (os.path.isfile(path) and (tarfile.is_tarfile(path) or zipfile.is_zipfile(path)))
+
+
+def _config_type(file_name, default_type):
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension == ".json":
+        return "json"
+    return default_type
+
+
+def read_config_files(path, prefix, default_type):
+    """
+    Read every file in a directory, tar or zip archive as a configuration.
+
+    Returns a list of [config_name, contents, config_type] entries as
+    accepted by manage_store_many. The configuration names are the paths of
+    the files relative to the directory or archive root, below prefix. The
+    type of .csv and .json files is taken from their extension, other files
+    are of default_type.
+    """
+    files = []
+    if os.path.isdir(path):
+        for root, dirs, file_names in os.walk(path):
+            dirs.sort()
+            for file_name in sorted(file_names):
+                file_path = os.path.join(root, file_name)
+                with open(file_path) as f:
+                    files.append((os.path.relpath(file_path, path), f.read()))
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path) as archive:
+            for member in archive.getmembers():
+                if member.isfile():
+                    files.append((member.name, archive.extractfile(member).read().decode("utf-8")))
+    else:
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                if not name.endswith("/"):
+                    files.append((name, archive.read(name).decode("utf-8")))
+
+    configs = []
+    for name, contents in files:
+        name = name.replace(os.sep, "/")
+        if name.startswith("./"):
+            name = name[2:]
+        config_name = "/".join([prefix, name]) if prefix.strip("/") else name
+        configs.append([config_name, contents, _config_type(name, default_type)])
+    return configs
+
+
 def delete_config_from_store(opts):
     opts.connection.peer = CONFIGURATION_STORE
     call = opts.connection.call
@@ -183,14 +245,16 @@ def add_config_store_parser(add_parser_fn):
     config_store_store.add_argument("identity",
                                     help="VIP IDENTITY of the store")
     config_store_store.add_argument(
-        "name", help="name used to reference the configuration by in the store"
+        "name", help="name used to reference the configuration by in the store. When storing a directory or "
+                     "archive the configurations are named by their path below this name, use \"/\" to store "
+                     "them at the top level"
     )
     config_store_store.add_argument(
         "infile",
         nargs="?",
-        type=argparse.FileType("r"),
-        default=sys.stdin,
-        help="file containing the contents of the configuration",
+        default="-",
+        help="file containing the contents of the configuration, or a directory, tar or zip archive of "
+             "configuration files to store at once",
     )
     config_store_store.add_argument(
         "--raw",
@@ -83,8 +83,15 @@ class DbDriver:
     - :py:class:`volttron.platform.dbutils.mysqlfuncts.MySqlFuncts`
     - :py:class:`volttron.platform.dbutils.sqlitefuncts.SqlLiteFuncts`
     """
+    # Number of records buffered by bulk inserts before they are sent to the database in a single executemany call.
+    # Can be overridden through the "bulk_insert_chunk_size" connection parameter.
+    DEFAULT_BULK_INSERT_CHUNK_SIZE = 1000
+
     def __init__(self, dbapimodule, **kwargs):
         thread_name = threading.currentThread().getName()
+        self.bulk_insert_chunk_size = int(kwargs.pop('bulk_insert_chunk_size', self.DEFAULT_BULK_INSERT_CHUNK_SIZE))
+        if self.bulk_insert_chunk_size < 1:
+            raise ValueError("bulk_insert_chunk_size should be a positive integer")
         if callable(dbapimodule):
             _log.debug("Constructing Driver for %s in thread: %s", dbapimodule.__name__, thread_name)
             connect = dbapimodule
@@ -117,6 +124,29 @@ class DbDriver:
         """
         yield self.insert_meta
 
+    @contextlib.contextmanager
+    def buffered_execute_many(self, stmt):
+        """
+        Helper for bulk insert implementations. Yields a function that buffers the argument tuple for stmt and
+        executes the buffered tuples with a single executemany call every bulk_insert_chunk_size records and when the
+        context exits without an error. Nothing is committed.
+        :param stmt: the statement to execute
+        :yields: function that takes the argument tuple for one execution of stmt
+        """
+        records = []
+        chunk_size = self.bulk_insert_chunk_size
+
+        def add(args):
+            records.append(args)
+            if len(records) >= chunk_size:
+                self.execute_many(stmt, records)
+                del records[:]
+
+        yield add
+
+        if records:
+            self.execute_many(stmt, records)
+
     def cursor(self):
 
         self.stash.cursor = None
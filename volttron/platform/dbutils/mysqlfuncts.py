@@ -286,70 +286,61 @@ class MySqlFuncts(DbDriver):
     def bulk_insert(self):
         """
         This function implements the bulk insert requirements for Mysql historian by overriding the
-        DbDriver::bulk_insert() in basedb.py and yields necessary data insertion method needed for bulk inserts
+        DbDriver::bulk_insert() in basedb.py and yields necessary data insertion method needed for bulk inserts.
+        Records are sent with executemany every bulk_insert_chunk_size records, which mysql connector turns into a
+        single multi-row INSERT statement.
         :yields: insert method
         """
-        records = []
-
-        def insert_data(ts, topic_id, data):
-            """
-            Inserts data records to the list
-            :param ts: time stamp
-            :type string
-            :param topic_id: topic ID
-            :type string
-            :param data: data value
-            :type any valid JSON serializable value
-            :return: Returns True after insert
-            :rtype: bool
-            """
-#            _log.info("appended record")
-            value = jsonapi.dumps(data)
-            records.append((ts, topic_id, value))
-#            records.append(SQL('({}, {}, {})').format(Literal(ts), Literal(topic_id), Literal(value)))
-            return True
-
-        yield insert_data
-
-        if records:
-            query = f"""
+        query = f"""
 INSERT INTO {self.data_table} (ts, topic_id, value_string) VALUES(%s, %s, %s)
 ON DUPLICATE KEY UPDATE value_string=VALUES(value_string);
 """
-            _log.debug(f"calling execute many with records {len(records)}")
-            self.execute_many(query, records)
+        with self.buffered_execute_many(query) as add_record:
+
+            def insert_data(ts, topic_id, data):
+                """
+                Inserts data records to the list
+                :param ts: time stamp
+                :type string
+                :param topic_id: topic ID
+                :type string
+                :param data: data value
+                :type any valid JSON serializable value
+                :return: Returns True after insert
+                :rtype: bool
+                """
+                add_record((ts, topic_id, jsonapi.dumps(data)))
+                return True
+
+            yield insert_data
 
     @contextlib.contextmanager
     def bulk_insert_meta(self):
         """
-        This function implements the bulk insert requirements for Redshift historian by overriding the
+        This function implements the bulk insert requirements for Mysql historian by overriding the
         DbDriver::bulk_insert_meta() in basedb.py and yields necessary data insertion method needed for bulk inserts
         :yields: insert method
         """
-        meta = []
-
-        def insert_meta(topic_id, metadata):
-            """
-            Inserts metadata records to the list
-            :param topic_id: topic name
-            :type int
-            :param metadata: dictionary of metadata
-            :type dict
-            :return: Returns True after insert
-            :rtype: bool
-            """
-            meta.append((topic_id, jsonapi.dumps(metadata)))
-            return True
-
-        yield insert_meta
-
-        if meta:
-            query = f"""
+        query = f"""
             INSERT INTO {self.meta_table} (topic_id, metadata) VALUES(%s, %s)
             ON DUPLICATE KEY UPDATE metadata=VALUES(metadata);
             """
-            _log.debug(f"###DEBUG calling execute many with meta len {len(meta)}")
-            self.execute_many(query, meta)
+        with self.buffered_execute_many(query) as add_record:
+
+            def insert_meta(topic_id, metadata):
+                """
+                Inserts metadata records to the list
+                :param topic_id: topic name
+                :type int
+                :param metadata: dictionary of metadata
+                :type dict
+                :return: Returns True after insert
+                :rtype: bool
+                """
+                add_record((topic_id, jsonapi.dumps(metadata)))
+                return True
+
+            yield insert_meta
 
     def insert_meta_query(self):
         return '''REPLACE INTO ''' + self.meta_table + ''' (topic_id, metadata) ''' + ''' VALUES(%s, %s)'''
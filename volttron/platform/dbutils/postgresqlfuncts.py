@@ -219,43 +219,59 @@ class PostgreSqlFuncts(DbDriver):
             table_name = self.data_table
             value_col = 'value_string'
 
-        topic_id = Literal(0)
-        query = [SQL(
-            '''SELECT to_char(ts, 'YYYY-MM-DD"T"HH24:MI:SS.USOF:00'), ''' + value_col + ' \n'
-            'FROM {}\n'
-            'WHERE topic_id = {}'
-        ).format(Identifier(table_name), topic_id)]
+        # All topics are read with one statement. skip and count apply to each
+        # topic, so with several topics they are applied with ROW_NUMBER().
+        where = [SQL('topic_id = ANY({})').format(Literal(list(topic_ids)))]
         if start and start.tzinfo != pytz.UTC:
             start = start.astimezone(pytz.UTC)
         if end and end.tzinfo != pytz.UTC:
             end = end.astimezone(pytz.UTC)
         if start and start == end:
-            query.append(SQL(' AND ts = {}').format(Literal(start)))
+            where.append(SQL('ts = {}').format(Literal(start)))
         else:
             if start:
-                query.append(SQL(' AND ts >= {}').format(Literal(start)))
+                where.append(SQL('ts >= {}').format(Literal(start)))
             if end:
-                query.append(SQL(' AND ts < {}').format(Literal(end)))
-        query.append(SQL('ORDER BY ts {}'.format(
-            'DESC' if order == 'LAST_TO_FIRST' else 'ASC')))
-        if skip or count:
-            query.append(SQL('LIMIT {} OFFSET {}').format(
-                Literal(None if not count or count < 0 else count),
-                Literal(None if not skip or skip < 0 else skip)))
-        query = SQL('\n').join(query)
-        values = {}
-        if value_col == 'agg_value':
-            for topic_id._wrapped in topic_ids:
-                name = id_name_map[topic_id.wrapped]
-                with self.select(query, fetch_all=False) as cursor:
-                    values[name] = [(ts, value)
-                                    for ts, value in cursor]
+                where.append(SQL('ts < {}').format(Literal(end)))
+        where = SQL(' AND ').join(where)
+        direction = SQL('DESC' if order == 'LAST_TO_FIRST' else 'ASC')
+        skip = skip if skip and skip > 0 else None
+        count = count if count and count > 0 else None
+        columns = SQL(
+            '''topic_id, to_char(ts, 'YYYY-MM-DD"T"HH24:MI:SS.USOF:00'), ''' + value_col)
+
+        if len(topic_ids) == 1 or not (skip or count):
+            query = SQL(
+                'SELECT {}\n'
+                'FROM {}\n'
+                'WHERE {}\n'
+                'ORDER BY topic_id, ts {}'
+            ).format(columns, Identifier(table_name), where, direction)
+            if skip or count:
+                query = SQL('{}\nLIMIT {} OFFSET {}').format(query, Literal(count), Literal(skip))
         else:
-            for topic_id._wrapped in topic_ids:
-                name = id_name_map[topic_id.wrapped]
-                with self.select(query, fetch_all=False) as cursor:
-                    values[name] = [(ts, jsonapi.loads(value))
-                                    for ts, value in cursor]
+            row_range = [SQL('row_num > {}').format(Literal(skip or 0))]
+            if count:
+                row_range.append(SQL('row_num <= {}').format(Literal((skip or 0) + count)))
+            query = SQL(
+                'SELECT {}\n'
+                'FROM (SELECT topic_id, ts, ' + value_col + ', '
+                'ROW_NUMBER() OVER (PARTITION BY topic_id ORDER BY ts {}) AS row_num\n'
+                'FROM {}\n'
+                'WHERE {}) AS numbered\n'
+                'WHERE {}\n'
+                'ORDER BY topic_id, ts {}'
+            ).format(columns, direction, Identifier(table_name), where,
+                     SQL(' AND ').join(row_range), direction)
+
+        values = {id_name_map[topic_id]: [] for topic_id in topic_ids}
+        if not topic_ids:
+            return values
+        decode = value_col == 'value_string'
+        with self.select(query, fetch_all=False) as cursor:
+            for topic_id, ts, value in cursor:
+                values[id_name_map[topic_id]].append(
+                    (ts, jsonapi.loads(value) if decode else value))
         return values
 
     def insert_topic(self, topic, **kwargs):
@@ -37,6 +37,7 @@
 # }}}
 
 import ast
+import contextlib
 import errno
 import logging
 import sqlite3
@@ -44,7 +45,7 @@ import pytz
 import threading
 import os
 import re
-from .basedb import DbDriver
+from .basedb import DbDriver, closing
 from collections import defaultdict
 from datetime import datetime
 from math import ceil
@@ -68,6 +69,12 @@ class SqlLiteFuncts(DbDriver):
     For method details please refer to base class
     :py:class:`volttron.platform.dbutils.basedb.DbDriver`
     """
+    # Maximum number of topic ids bound in a single query. Stays below the
+    # default SQLITE_MAX_VARIABLE_NUMBER (999) of sqlite versions before 3.32
+    MAX_QUERY_TOPICS = 500
+    # ROW_NUMBER() is available from sqlite 3.25
+    WINDOW_FUNCTIONS = sqlite3.sqlite_version_info >= (3, 25, 0)
+
     def __init__(self, connect_params, table_names):
         database = connect_params['database']
         thread_name = threading.currentThread().getName()
@@ -117,6 +124,57 @@ class SqlLiteFuncts(DbDriver):
         _log.debug("In sqlitefuncts connect params {}".format(connect_params))
         super(SqlLiteFuncts, self).__init__('sqlite3', **connect_params)
 
+    @contextlib.contextmanager
+    def bulk_insert(self):
+        """
+        This function implements the bulk insert requirements for SQLite historian by overriding the
+        DbDriver::bulk_insert() in basedb.py and yields necessary data insertion method needed for bulk inserts.
+        Records are sent with executemany every bulk_insert_chunk_size records.
+        :yields: insert method
+        """
+        with self.buffered_execute_many(self.insert_data_query()) as add_record:
+
+            def insert_data(ts, topic_id, data):
+                """
+                Inserts data records to the list
+                :param ts: time stamp
+                :type string
+                :param topic_id: topic ID
+                :type string
+                :param data: data value
+                :type any valid JSON serializable value
+                :return: Returns True after insert
+                :rtype: bool
+                """
+                add_record((ts, topic_id, jsonapi.dumps(data)))
+                return True
+
+            yield insert_data
+
+    @contextlib.contextmanager
+    def bulk_insert_meta(self):
+        """
+        This function implements the bulk insert requirements for SQLite historian by overriding the
+        DbDriver::bulk_insert_meta() in basedb.py and yields necessary data insertion method needed for bulk inserts
+        :yields: insert method
+        """
+        with self.buffered_execute_many(self.insert_meta_query()) as add_record:
+
+            def insert_meta(topic_id, metadata):
+                """
+                Inserts metadata records to the list
+                :param topic_id: topic ID
+                :type int
+                :param metadata: dictionary of metadata
+                :type dict
+                :return: Returns True after insert
+                :rtype: bool
+                """
+                add_record((topic_id, jsonapi.dumps(metadata)))
+                return True
+
+            yield insert_meta
+
     def setup_historian_tables(self):
 
         result = self.select('''PRAGMA auto_vacuum''')
@@ -186,6 +244,9 @@ class SqlLiteFuncts(DbDriver):
              "metadata": {"key1": value1, "key2": value2, ...}}
 
         metadata is not required (The caller will normalize this to {} for you)
+
+        All topics are read with a single topic_id IN (...) statement. When skip or count is given for more than one
+        topic, they are applied to each topic individually using a ROW_NUMBER() window.
         @param topic_ids: topic_ids to query data for
         @param id_name_map: dictionary containing topic_id:topic_name
         @param start:
@@ -202,15 +263,8 @@ class SqlLiteFuncts(DbDriver):
             table_name = agg_type + "_" + agg_period
             value_col = 'agg_value'
 
-        query = '''SELECT topic_id, ts, ''' + value_col + '''
-                   FROM ''' + table_name + '''
-                   {where}
-                   {order_by}
-                   {limit}
-                   {offset}'''
-
-        where_clauses = ["WHERE topic_id = ?"]
-        args = [topic_ids[0]]
+        where_clauses = []
+        args = []
 
         # base historian converts naive timestamps to UTC, but if the start and end had explicit timezone info then they
         # need to get converted to UTC since sqlite3 only store naive timestamp
@@ -230,51 +284,79 @@ class SqlLiteFuncts(DbDriver):
                 where_clauses.append("ts < ?")
                 args.append(end)
 
-        where_statement = ' AND '.join(where_clauses)
-
-        order_by = 'ORDER BY topic_id ASC, ts ASC'
+        direction = 'ASC'
         if order == 'LAST_TO_FIRST':
-            order_by = ' ORDER BY topic_id DESC, ts DESC'
+            direction = 'DESC'
 
         # can't have an offset without a limit
         # -1 = no limit and allows the user to provide just an offset
-        if count is None:
-            count = -1
-
-        limit_statement = 'LIMIT ?'
-        args.append(count)
-
-        offset_statement = ''
-        if skip > 0:
-            offset_statement = 'OFFSET ?'
-            args.append(skip)
-
-        real_query = query.format(where=where_statement,
-                                  limit=limit_statement,
-                                  offset=offset_statement,
-                                  order_by=order_by)
-        _log.debug("Real Query: " + real_query)
-        _log.debug("args: " + str(args))
+        count = -1 if count is None else int(count)
 
         values = defaultdict(list)
-        start_t = datetime.utcnow()
         for topic_id in topic_ids:
-            args[0] = topic_id
             values[id_name_map[topic_id]] = []
-            cursor = self.select(real_query, args, fetch_all=False)
+        decode = value_col == 'value_string'
+
+        batch_size = self.MAX_QUERY_TOPICS
+        if not self.WINDOW_FUNCTIONS and (count >= 0 or skip > 0):
+            # Per topic limit and offset need window functions. Without them query one topic at a time.
+            batch_size = 1
+
+        start_t = datetime.utcnow()
+        for n in range(0, len(topic_ids), batch_size):
+            ids = topic_ids[n:n + batch_size]
+            real_query, real_args = self._build_query(table_name, value_col, ids, where_clauses, args, direction,
+                                                      skip, count)
+            _log.debug("Real Query: " + real_query)
+            _log.debug("args: " + str(real_args))
+            cursor = self.select(real_query, real_args, fetch_all=False)
             if cursor:
-                if value_col == 'agg_value':
+                with closing(cursor):
+                    # Rows are grouped by topic so the result list is only looked up when the topic changes
+                    current_id = None
+                    result = None
                     for _id, ts, value in cursor:
-                        values[id_name_map[topic_id]].append((utils.format_timestamp(ts), value))
-                    cursor.close()
-                else:
-                    for _id, ts, value in cursor:
-                        values[id_name_map[topic_id]].append((utils.format_timestamp(ts), jsonapi.loads(value)))
-                    cursor.close()
+                        if _id != current_id:
+                            current_id = _id
+                            result = values[id_name_map[_id]]
+                        result.append((utils.format_timestamp(ts), jsonapi.loads(value) if decode else value))
 
         _log.debug("Time taken to load results from db:{}".format(datetime.utcnow()-start_t))
         return values
 
+    def _build_query(self, table_name, value_col, topic_ids, where_clauses, args, direction, skip, count):
+        """
+        Builds the select statement and its arguments for a query on the given topic ids.
+        :return: tuple of query string and list of arguments
+        """
+        where_statement = ' AND '.join(
+            ['topic_id IN ({})'.format(', '.join('?' * len(topic_ids)))] + where_clauses)
+        args = list(topic_ids) + args
+        order_by = 'ORDER BY topic_id {direction}, ts {direction}'.format(direction=direction)
+
+        if len(topic_ids) == 1 or (count < 0 and skip <= 0):
+            query = 'SELECT topic_id, ts, ' + value_col + ' FROM ' + table_name + ' WHERE ' + where_statement + \
+                    ' ' + order_by + ' LIMIT ?'
+            args.append(count)
+            if skip > 0:
+                query += ' OFFSET ?'
+                args.append(skip)
+            return query, args
+
+        row_clauses = []
+        if skip > 0:
+            row_clauses.append('row_num > ?')
+            args.append(skip)
+        if count >= 0:
+            row_clauses.append('row_num <= ?')
+            args.append(max(skip, 0) + count)
+        query = 'SELECT topic_id, ts, ' + value_col + ' FROM (' + \
+                'SELECT topic_id, ts, ' + value_col + ', ' + \
+                'ROW_NUMBER() OVER (PARTITION BY topic_id ORDER BY ts ' + direction + ') AS row_num ' + \
+                'FROM ' + table_name + ' WHERE ' + where_statement + \
+                ') WHERE ' + ' AND '.join(row_clauses) + ' ' + order_by
+        return query, args
+
     def manage_db_size(self, history_limit_timestamp, storage_limit_gb):
         """
         Manage database size.
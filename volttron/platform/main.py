@@ -73,7 +73,7 @@ import gevent
 from volttron.platform.vip.healthservice import HealthService
 from volttron.platform.vip.servicepeer import ServicePeerNotifier
 from volttron.utils import get_random_key
-from volttron.utils.frame_serialization import deserialize_frames, serialize_frames
+from volttron.utils.frame_serialization import LazyFrames
 
 import zmq
 from zmq import ZMQError
@@ -92,7 +92,7 @@ from volttron.platform import config
 
 from volttron.platform.vip.router import *
 from volttron.platform.vip.socket import decode_key, encode_key, Address
-from volttron.platform.vip.tracking import Tracker
+from volttron.platform.vip.tracking import MessageTracer, Tracker
 from volttron.platform.auth.auth import AuthService
 from volttron.platform.auth.auth_file import AuthFile
 from volttron.platform.auth.auth_entry import AuthEntry
@@ -294,7 +294,7 @@ class FramesFormatter:
         self.frames = frames
 
     def __repr__(self):
-        return str([bytes(f) for f in self.frames])
+        return str([bytes(f) if isinstance(f, zmq.Frame) else f for f in self.frames])
 
     __str__ = __repr__
 
@@ -308,7 +308,8 @@ class Router(BaseRouter):
                  volttron_central_address=None, instance_name=None,
                  bind_web_address=None, volttron_central_serverkey=None,
                  protected_topics={}, external_address_file='',
-                 msgdebug=None, agent_monitor_frequency=600,
+                 msgdebug=None, msgdebug_sample_rate=1, msgdebug_peers=None,
+                 agent_monitor_frequency=600,
                  service_notifier=Optional[ServicePeerNotifier]):
 
         super(Router, self).__init__(
@@ -339,13 +340,19 @@ class Router(BaseRouter):
         self._external_address_file = external_address_file
         self._pubsub = None
         self.ext_rpc = None
-        self._msgdebug = msgdebug
-        self._message_debugger_socket = None
+        self._tracer = None
+        if msgdebug:
+            # Sampled messages are published to MessageDebuggerAgent on this ZMQ IPC socket.
+            socket_path = os.path.expanduser(os.path.expandvars('$VOLTTRON_HOME/run/messagedebug'))
+            socket_path = 'ipc://{}'.format('@' if sys.platform.startswith('linux') else '') + socket_path
+            self._tracer = MessageTracer(socket_path, sample_rate=msgdebug_sample_rate, peers=msgdebug_peers)
         self._instance_name = instance_name
         self._agent_monitor_frequency = agent_monitor_frequency
 
     def setup(self):
         sock = self.socket
+        if self._tracer:
+            self._tracer.connect()
         identity = str(uuid.uuid4())
         sock.identity = identity.encode("utf-8")
         _log.debug("ROUTER SOCK identity: {}".format(sock.identity))
@@ -393,43 +400,31 @@ class Router(BaseRouter):
         self._poller.register(sock, zmq.POLLIN)
         _log.debug("ZMQ version: {}".format(zmq.zmq_version()))
 
+    def stop(self, linger=1):
+        if self._tracer:
+            self._tracer.close()
+        super(Router, self).stop(linger)
+
     def issue(self, topic, frames, extra=None):
-        log = self.logger.debug
-        formatter = FramesFormatter(frames)
-        if topic == ERROR:
-            errnum, errmsg = extra
-            log('%s (%s): %s', errmsg, errnum, formatter)
-        elif topic == UNROUTABLE:
-            log('unroutable: %s: %s', extra, formatter)
-        else:
-            log('%s: %s',
-                ('incoming' if topic == INCOMING else 'outgoing'), formatter)
-        if self._tracker:
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        tracking = self._tracker is not None and self._tracker.enabled
+        if not (debug or tracking or self._tracer):
+            return
+        if debug:
+            log = self.logger.debug
+            formatter = FramesFormatter(frames)
+            if topic == ERROR:
+                errnum, errmsg = extra
+                log('%s (%s): %s', errmsg, errnum, formatter)
+            elif topic == UNROUTABLE:
+                log('unroutable: %s: %s', extra, formatter)
+            else:
+                log('%s: %s',
+                    ('incoming' if topic == INCOMING else 'outgoing'), formatter)
+        if tracking:
             self._tracker.hit(topic, frames, extra)
-        if self._msgdebug:
-            if not self._message_debugger_socket:
-                # Initialize a ZMQ IPC socket on which to publish all messages to MessageDebuggerAgent.
-                socket_path = os.path.expandvars('$VOLTTRON_HOME/run/messagedebug')
-                socket_path = os.path.expanduser(socket_path)
-                socket_path = 'ipc://{}'.format('@' if sys.platform.startswith('linux') else '') + socket_path
-                self._message_debugger_socket = zmq.Context().socket(zmq.PUB)
-                self._message_debugger_socket.connect(socket_path)
-            # Publish the routed message, including the "topic" (status/direction), for use by MessageDebuggerAgent.
-            frame_bytes = [topic]
-            frame_bytes.extend(frames)  # [frame if type(frame) is bytes else frame.bytes for frame in frames])
-            frame_bytes = serialize_frames(frames)
-            # TODO we need to fix the msgdebugger socket if we need it to be connected
-            #frame_bytes = [f.bytes for f in frame_bytes]
-            #self._message_debugger_socket.send_pyobj(frame_bytes)
-    # This is currently not being used e.g once fixed we won't use it.
-    #def extract_bytes(self, frame_bytes):
-    #    result = []
-    #    for f in frame_bytes:
-    #        if isinstance(f, list):
-    #            result.extend(self.extract_bytes(f))
-    #        else:
-    #            result.append(f.bytes)
-    #    return result
+        if self._tracer:
+            self._tracer.hit(topic, frames, extra)
 
     def handle_subsystem(self, frames, user_id):
         _log.debug(f"Handling subsystem with frames: {frames} user_id: {user_id}")
@@ -525,7 +520,7 @@ class Router(BaseRouter):
             if sock == self.socket:
                 if sockets[sock] == zmq.POLLIN:
                     frames = sock.recv_multipart(copy=False)
-                    self.route(deserialize_frames(frames))
+                    self.route(LazyFrames(frames))
             elif sock in self._ext_routing._vip_sockets:
                 if sockets[sock] == zmq.POLLIN:
                     # _log.debug("From Ext Socket: ")
@@ -535,6 +530,8 @@ class Router(BaseRouter):
             else:
                 # _log.debug("External ")
                 frames = sock.recv_multipart(copy=False)
+        if self._tracer:
+            self._tracer.flush()
 
     def ext_route(self, socket):
         """
@@ -545,7 +542,7 @@ class Router(BaseRouter):
         # Expecting incoming frames to follow this VIP format:
         #   [SENDER, PROTO, USER_ID, MSG_ID, SUBSYS, ...]
         frames = socket.recv_multipart(copy=False)
-        self.route(deserialize_frames(frames))
+        self.route(LazyFrames(frames))
         # for f in frames:
         #     _log.debug("PUBSUBSERVICE Frames: {}".format(bytes(f)))
         if len(frames) < 6:
@@ -600,7 +597,8 @@ class GreenRouter(Router):
                  volttron_central_address=None, instance_name=None,
                  bind_web_address=None, volttron_central_serverkey=None,
                  protected_topics={}, external_address_file='',
-                 msgdebug=None, volttron_central_rmq_address=None,
+                 msgdebug=None, msgdebug_sample_rate=1, msgdebug_peers=None,
+                 volttron_central_rmq_address=None,
                  service_notifier=Optional[ServicePeerNotifier]):
         self._context_class = _green.Context
         self._socket_class = _green.Socket
@@ -612,7 +610,8 @@ class GreenRouter(Router):
             volttron_central_address=volttron_central_address, instance_name=instance_name,
             bind_web_address=bind_web_address, volttron_central_serverkey=volttron_central_address,
             protected_topics=protected_topics, external_address_file=external_address_file,
-            msgdebug=msgdebug, service_notifier=service_notifier)
+            msgdebug=msgdebug, msgdebug_sample_rate=msgdebug_sample_rate, msgdebug_peers=msgdebug_peers,
+            service_notifier=service_notifier)
 
     def start(self):
         '''Create the socket and call setup().
@@ -863,6 +862,8 @@ def start_volttron_process(opts):
                    protected_topics=protected_topics,
                    external_address_file=external_address_file,
                    msgdebug=opts.msgdebug,
+                   msgdebug_sample_rate=opts.msgdebug_sample_rate,
+                   msgdebug_peers=opts.msgdebug_peers,
                    service_notifier=notifier).run()
         except Exception:
             _log.exception('Unhandled exception in router loop')
@@ -977,6 +978,11 @@ def start_volttron_process(opts):
                 web_ssl_key=opts.web_ssl_key,
                 web_ssl_cert=opts.web_ssl_cert,
                 web_secret_key=opts.web_secret_key,
+                web_max_request_size=opts.web_max_request_size,
+                web_peer_concurrency=opts.web_peer_concurrency,
+                web_peer_queue_size=opts.web_peer_queue_size,
+                web_pubsub_max_rate=opts.web_pubsub_max_rate,
+                web_pubsub_queue_size=opts.web_pubsub_queue_size,
                 enable_auth=opts.allow_auth
             ))
 
@@ -1049,6 +1055,8 @@ def start_volttron_process(opts):
                                        protected_topics=protected_topics,
                                        external_address_file=external_address_file,
                                        msgdebug=opts.msgdebug,
+                                       msgdebug_sample_rate=opts.msgdebug_sample_rate,
+                                       msgdebug_peers=opts.msgdebug_peers,
                                        service_notifier=notifier)
 
             proxy_router = ZMQProxyRouter(address=address,
@@ -1275,6 +1283,26 @@ def main(argv=sys.argv):
         "--web-secret-key", default=None,
         help="Secret key to be used instead of https based authentication."
     )
+    agents.add_argument(
+        '--web-max-request-size', metavar='BYTES', type=int, default=None,
+        help='Largest request body in bytes accepted by the web server. Default is unlimited.'
+    )
+    agents.add_argument(
+        '--web-peer-concurrency', metavar='N', type=int, default=10,
+        help='Number of web requests each agent handles at the same time. Default=10'
+    )
+    agents.add_argument(
+        '--web-peer-queue-size', metavar='N', type=int, default=100,
+        help='Number of further web requests that wait for a busy agent before requests are refused. Default=100'
+    )
+    agents.add_argument(
+        '--web-pubsub-max-rate', metavar='N', type=float, default=None,
+        help='Most messages per second sent to the VUI websockets of a topic. Default is unlimited.'
+    )
+    agents.add_argument(
+        '--web-pubsub-queue-size', metavar='N', type=int, default=100,
+        help='Number of messages that wait for a slow VUI websocket before the oldest are dropped. Default=100'
+    )
     agents.add_argument(
         '--web-ssl-key', metavar='KEYFILE', default=None,
         help='ssl key file for using https with the volttron server'
@@ -1300,6 +1328,13 @@ def main(argv=sys.argv):
     agents.add_argument(
         '--msgdebug', action='store_true',
         help='Route all messages to an agent while debugging.')
+    agents.add_argument(
+        '--msgdebug-sample-rate', metavar='N', type=int,
+        help='Route only one in every N messages to the debugging agent. Default=1')
+    agents.add_argument(
+        '--msgdebug-peer', metavar='IDENTITY', action='append', dest='msgdebug_peers', default=[],
+        help='Route only messages sent from or to this peer to the debugging agent; '
+             'may be used multiple times')
     agents.add_argument(
         '--setup-mode', action='store_true',
         help='Setup mode flag for setting up authorization of external platforms.')
@@ -1400,6 +1435,7 @@ def main(argv=sys.argv):
         resource_monitor=True,
         # mobility=True,
         msgdebug=None,
+        msgdebug_sample_rate=1,
         setup_mode=False,
         # Type of underlying message bus to use - ZeroMQ or RabbitMQ
         message_bus='zmq',
@@ -88,6 +88,7 @@ PLATFORM_BASE = _('platform')
 PLATFORM_SEND_EMAIL = _('platform/send_email')
 PLATFORM = _('platform/{subtopic}')
 PLATFORM_SHUTDOWN = PLATFORM(subtopic='shutdown')
+CONFIG_STORE_CHANGED = _('platform/config_store/{identity}')
 PLATFORM_VCP_DEVICES = _('platforms/{platform_uuid}/devices/{topic}')
 
 RECORD_BASE = _('record')
@@ -56,6 +56,7 @@ from volttron.platform.vip.agent import errors
 from volttron.platform.jsonrpc import RemoteError, MethodNotFound
 from volttron.platform.agent.utils import parse_timestamp_string, format_timestamp, get_aware_utc_now
 from volttron.platform.storeutils import check_for_recursion, strip_config_name, store_ext
+from volttron.platform.messaging.topics import CONFIG_STORE_CHANGED
 from .vip.agent import Agent, Core, RPC
 
 
@@ -146,7 +147,7 @@ class ConfigStoreService(Agent):
             root, ext = os.path.splitext(store_path)
             agent_identity = os.path.basename(root)
             _log.debug("Processing store for agent {}".format(agent_identity))
-            store = PersistentDict(filename=store_path, flag='c', format='json')
+            store = PersistentDict(filename=store_path, flag='c', format='json', journal=True)
             parsed_configs, name_map = process_store(agent_identity, store)
             self.store[agent_identity] = {"configs": parsed_configs,
                                           "store": store,
@@ -191,6 +192,8 @@ class ConfigStoreService(Agent):
         # Sync will delete the file if the store is empty.
         agent_disk_store.async_sync()
 
+        self._publish_change(identity, "DELETE_ALL", None)
+
         if identity in self.vip.peerlist.peers_list:
             with agent_store_lock:
                 try:
@@ -210,6 +213,31 @@ class ConfigStoreService(Agent):
         if not agent_disk_store:
             self.store.pop(identity, None)
 
+    @RPC.export
+    @RPC.allow('edit_config_store')
+    def manage_store_many(self, identity, configs):
+        """
+        Store several configurations of an agent at once.
+
+        configs is a list of [config_name, raw_contents, config_type] entries.
+        Nothing is stored if any of them fails to parse. The store is written
+        once and the agent receives all of the changes in a single update.
+        """
+        parsed_configs = [(config_name, raw_contents, process_raw_config(raw_contents, config_type), config_type)
+                          for config_name, raw_contents, config_type in configs]
+        self._add_configs_to_store(identity, parsed_configs, trigger_callback=True)
+
+    @RPC.export
+    @RPC.allow('edit_config_store')
+    def manage_delete_many(self, identity, config_names):
+        """
+        Delete several configurations of an agent at once.
+
+        Nothing is deleted if any of the configurations does not exist. The
+        agent receives all of the changes in a single update.
+        """
+        self._delete_configs(identity, config_names, trigger_callback=True)
+
     @RPC.export
     def manage_list_configs(self, identity):
         result = list(self.store.get(identity, {}).get("store", {}).keys())
@@ -245,6 +273,40 @@ class ConfigStoreService(Agent):
 
         return agent_configs[real_config_name]
 
+    @RPC.export
+    def manage_get_many(self, identity, config_names=None, raw=True):
+        """
+        Get several configurations of an agent in one call.
+
+        Returns a dictionary of configuration name to contents, in the same
+        form manage_get returns them. All of the agent's configurations are
+        returned when config_names is None.
+        """
+        agent_store = self.store.get(identity)
+        if agent_store is None:
+            if config_names:
+                raise KeyError('No configuration file "{}" for VIP IDENTIY {}'.format(config_names[0], identity))
+            return {}
+
+        agent_configs = agent_store["configs"]
+        agent_disk_store = agent_store["store"]
+        agent_name_map = agent_store["name_map"]
+
+        if config_names is None:
+            real_config_names = list(agent_disk_store.keys())
+        else:
+            real_config_names = []
+            for config_name in config_names:
+                config_name = strip_config_name(config_name)
+                if config_name.lower() not in agent_name_map:
+                    raise KeyError('No configuration file "{}" for VIP IDENTIY {}'.format(config_name, identity))
+                real_config_names.append(agent_name_map[config_name.lower()])
+
+        if raw:
+            return {name: agent_disk_store[name]["data"] for name in real_config_names}
+
+        return {name: agent_configs[name] for name in real_config_names}
+
     @RPC.export
     def manage_get_metadata(self, identity, config_name):
         agent_store = self.store.get(identity)
@@ -291,7 +353,7 @@ class ConfigStoreService(Agent):
         if agent_store is None:
             # Initialize a new store.
             store_path = os.path.join(self.store_path, identity + store_ext)
-            store = PersistentDict(filename=store_path, flag='c', format='json')
+            store = PersistentDict(filename=store_path, flag='c', format='json', journal=True)
             agent_store = {
                 "configs": {}, "store": store, "name_map": {},
                 "lock": Semaphore()
@@ -355,6 +417,9 @@ class ConfigStoreService(Agent):
         # Sync will delete the file if the store is empty.
         agent_disk_store.async_sync()
 
+        if send_update:
+            self._publish_change(identity, "DELETE", config_name)
+
         if send_update and identity in self.vip.peerlist.peers_list:
             with agent_store_lock:
                 try:
@@ -403,7 +468,7 @@ class ConfigStoreService(Agent):
         if agent_store is None:
             #Initialize a new store.
             store_path = os.path.join(self.store_path, identity+ store_ext)
-            store = PersistentDict(filename=store_path, flag='c', format='json')
+            store = PersistentDict(filename=store_path, flag='c', format='json', journal=True)
             agent_store = {"configs": {}, "store": store, "name_map": {}, "lock": Semaphore()}
             self.store[identity] = agent_store
 
@@ -436,6 +501,9 @@ class ConfigStoreService(Agent):
 
         _log.debug("Agent {} config {} stored.".format(identity, config_name))
 
+        if send_update:
+            self._publish_change(identity, action, config_name)
+
         if send_update and identity in self.vip.peerlist.peers_list:
             with agent_store_lock:
                 try:
@@ -451,3 +519,132 @@ class ConfigStoreService(Agent):
                     _log.error("Config update to agent {} timed out after {} seconds".format(identity, UPDATE_TIMEOUT))
                 except Exception as e:
                     _log.error("Unknown error sending update to agent identity {}.: {}".format(identity, e))
+
+    def _add_configs_to_store(self, identity, configs, trigger_callback=False, send_update=True):
+        """Adds a batch of processed configurations to the store."""
+        if not configs:
+            return
+
+        agent_store = self.store.get(identity)
+
+        if agent_store is None:
+            #Initialize a new store.
+            store_path = os.path.join(self.store_path, identity+ store_ext)
+            store = PersistentDict(filename=store_path, flag='c', format='json', journal=True)
+            agent_store = {"configs": {}, "store": store, "name_map": {}, "lock": Semaphore()}
+            self.store[identity] = agent_store
+
+        agent_configs = agent_store["configs"]
+        agent_disk_store = agent_store["store"]
+        agent_store_lock = agent_store["lock"]
+        agent_name_map = agent_store["name_map"]
+
+        # Check the whole batch before anything is changed.
+        new_configs = dict(agent_configs)
+        for config_name, raw, parsed, config_type in configs:
+            config_name = strip_config_name(config_name)
+            if check_for_recursion(config_name, parsed, new_configs):
+                if not agent_disk_store:
+                    self.store.pop(identity, None)
+                raise ValueError("Recursive configuration references detected in {}.".format(config_name))
+            new_configs[config_name] = parsed
+
+        modified = format_timestamp(get_aware_utc_now())
+        updates = []
+        for config_name, raw, parsed, config_type in configs:
+            config_name = strip_config_name(config_name)
+            config_name_lower = config_name.lower()
+
+            action = "UPDATE" if config_name_lower in agent_name_map else "NEW"
+            if action == "UPDATE":
+                old_config_name = agent_name_map[config_name_lower]
+                del agent_configs[old_config_name]
+
+            agent_configs[config_name] = parsed
+            agent_name_map[config_name_lower] = config_name
+            agent_disk_store[config_name] = {"type": config_type,
+                                             "modified": modified,
+                                             "data": raw}
+            updates.append([action, config_name, parsed])
+
+        agent_disk_store.async_sync()
+
+        _log.debug("Agent {} stored {} configs.".format(identity, len(updates)))
+
+        if send_update:
+            for action, config_name, parsed in updates:
+                self._publish_change(identity, action, config_name)
+            self._send_updates(identity, agent_store_lock, updates, trigger_callback)
+
+    def _delete_configs(self, identity, config_names, trigger_callback=False, send_update=True):
+        """Deletes a batch of configurations from the store."""
+        agent_store = self.store.get(identity)
+        if agent_store is None:
+            raise KeyError('No configuration file "{}" for VIP IDENTIY {}'.format(config_names[0], identity))
+
+        agent_configs = agent_store["configs"]
+        agent_disk_store = agent_store["store"]
+        agent_store_lock = agent_store["lock"]
+        agent_name_map = agent_store["name_map"]
+
+        config_names = [strip_config_name(config_name) for config_name in config_names]
+        for config_name in config_names:
+            if config_name.lower() not in agent_name_map:
+                raise KeyError('No configuration file "{}" for VIP IDENTIY {}'.format(config_name, identity))
+
+        updates = []
+        for config_name in config_names:
+            real_config_name = agent_name_map.pop(config_name.lower(), None)
+            if real_config_name is None:
+                # Listed twice.
+                continue
+            agent_configs.pop(real_config_name)
+            agent_disk_store.pop(real_config_name)
+            updates.append(["DELETE", config_name, None])
+
+        # Sync will delete the file if the store is empty.
+        agent_disk_store.async_sync()
+
+        if send_update:
+            for action, config_name, contents in updates:
+                self._publish_change(identity, action, config_name)
+            self._send_updates(identity, agent_store_lock, updates, trigger_callback)
+
+        # If the store is empty (and nothing jumped in and added to it while we
+        # were informing the agent) then remove it from the global store.
+        if not agent_disk_store:
+            self.store.pop(identity, None)
+
+    def _send_updates(self, identity, agent_store_lock, updates, trigger_callback):
+        """Sends a batch of changes to the agent in one config.update_many call."""
+        if identity not in self.vip.peerlist.peers_list:
+            return
+        with agent_store_lock:
+            try:
+                try:
+                    self.vip.rpc.call(identity, "config.update_many", updates,
+                                      trigger_callback=trigger_callback).get(timeout=UPDATE_TIMEOUT)
+                except MethodNotFound:
+                    # Agents started before config.update_many existed take one change at a time.
+                    for action, config_name, contents in updates:
+                        self.vip.rpc.call(identity, "config.update", action, config_name, contents=contents,
+                                          trigger_callback=trigger_callback).get(timeout=UPDATE_TIMEOUT)
+            except errors.Unreachable:
+                _log.debug("Agent {} not currently running. Configuration update not sent.".format(identity))
+            except RemoteError as e:
+                _log.error("Agent {} failure when updating {} configurations: {}".format(identity, len(updates), e))
+            except MethodNotFound as e:
+                _log.error(
+                    "Agent {} failure when updating {} configurations: {}".format(identity, len(updates), e))
+            except gevent.timeout.Timeout:
+                _log.error("Config update to agent {} timed out after {} seconds".format(identity, UPDATE_TIMEOUT))
+            except Exception as e:
+                _log.error("Unknown error sending update to agent identity {}.: {}".format(identity, e))
+
+    def _publish_change(self, identity, action, config_name):
+        """Let other agents that cache configurations know the store of identity changed."""
+        try:
+            self.vip.pubsub.publish('pubsub', CONFIG_STORE_CHANGED(identity=identity),
+                                    message={"action": action, "config_name": config_name})
+        except Exception as e:
+            _log.error("Error publishing configuration change for agent {}: {}".format(identity, e))
@@ -147,6 +147,7 @@ class Auth(SubsystemBase):
         if identity == AUTH:
             self._user_to_capabilities = user_to_capabilities
             self._dirty = True
+            self._rpc().invalidate_auth_checks()
 
     def get_rpc_exports(self):
         """
@@ -51,6 +51,7 @@ from zmq import green as zmq
 from zmq import SNDMORE
 from volttron.platform import jsonapi
 from volttron.utils.frame_serialization import serialize_frames
+from volttron.utils.prefix_index import TopicPrefixIndex
 from .base import SubsystemBase
 from ..decorators import annotate, annotations, dualmethod, spawn
 from ..errors import Unreachable, VIPError, UnknownSubsystem
@@ -58,7 +59,7 @@ from .... import jsonrpc
 from volttron.platform.agent import utils
 from ..results import ResultsDictionary
 from gevent.queue import Queue, Empty
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from datetime import timedelta
 
 __all__ = ['PubSub']
@@ -66,6 +67,9 @@ __all__ = ['PubSub']
 min_compatible_version = '3.0'
 max_compatible_version = ''
 
+# Number of (bus, topic) entries kept in the matched callbacks cache.
+CALLBACK_CACHE_SIZE = 4096
+
 # utils.setup_logging()
 _log = logging.getLogger(__name__)
 
@@ -97,9 +101,13 @@ class PubSub(SubsystemBase):
             return defaultdict(subscriptions)
 
         def subscriptions():
-            return defaultdict(set)
+            return TopicPrefixIndex()
 
         self._my_subscriptions = defaultdict(platform_subscriptions)
+        # (bus, topic) -> tuple of ((platform, bus, prefix), callbacks) matching the topic
+        self._callback_cache = OrderedDict()
+        # (platform, bus, prefix) -> number of messages delivered through that subscription
+        self._subscription_hits = defaultdict(int)
         self.protected_topics = ProtectedPubSubTopics()
         core.register('pubsub', self._handle_subsystem, self._handle_error)
         self.vip_socket = None
@@ -150,21 +158,76 @@ class PubSub(SubsystemBase):
         """
         peer = 'pubsub'
 
-        handled = 0
-        for platform in self._my_subscriptions:
-            # _log.debug("SYNC: process callback subscriptions: {}".format(self._my_subscriptions[platform][bus]))
-            buses = self._my_subscriptions[platform]
-            if bus in buses:
-                subscriptions = buses[bus]
-                for prefix, callbacks in subscriptions.items():
-                    if topic.startswith(prefix):
-                        handled += 1
-                        for callback in callbacks:
-                            callback(peer, sender, bus, topic, headers, message)
-        if not handled:
+        matched = self._match_callbacks(bus, topic)
+        hits = self._subscription_hits
+        for key, callbacks in matched:
+            hits[key] += 1
+            for callback in callbacks:
+                callback(peer, sender, bus, topic, headers, message)
+        if not matched:
             # No callbacks for topic; synchronize with sender
             self.synchronize()
 
+    def _match_callbacks(self, bus, topic):
+        """Find the subscriptions matching the topic on the bus.
+
+        Results are kept in a small LRU cache which is invalidated whenever a
+        subscription is added or dropped.
+        param bus: bus
+        type bus: str
+        param topic: publishing topic
+        type topic: str
+        :returns: tuple of ((platform, bus, prefix), callbacks) pairs
+        :rtype: tuple
+        """
+        cache = self._callback_cache
+        key = bus, topic
+        try:
+            matched = cache[key]
+        except KeyError:
+            pass
+        else:
+            cache.move_to_end(key)
+            return matched
+
+        matched = []
+        for platform, buses in self._my_subscriptions.items():
+            subscriptions = buses.get(bus)
+            if subscriptions:
+                for prefix, callbacks in subscriptions.match(topic):
+                    matched.append(((platform, bus, prefix), tuple(callbacks)))
+        matched = tuple(matched)
+        cache[key] = matched
+        if len(cache) > CALLBACK_CACHE_SIZE:
+            cache.popitem(last=False)
+        return matched
+
+    def _invalidate_callback_cache(self):
+        self._callback_cache.clear()
+
+    def get_subscription_hits(self):
+        """Get the number of messages delivered through each local subscription.
+
+        Useful for profiling which subscriptions are doing most of the work in an agent.
+        :returns: Hit counts keyed by platform, bus and prefix
+        :rtype: dict
+
+        :Return Values:
+        Dictionary {platform: {bus: {prefix: count}}}
+        """
+        hits = {}
+        for platform, buses in self._my_subscriptions.items():
+            for bus, subscriptions in buses.items():
+                for prefix in subscriptions:
+                    count = self._subscription_hits.get((platform, bus, prefix), 0)
+                    hits.setdefault(platform, {}).setdefault(bus, {})[prefix] = count
+        # Forget counters of subscriptions which have since been dropped.
+        for key in list(self._subscription_hits):
+            platform, bus, prefix = key
+            if prefix not in hits.get(platform, {}).get(bus, {}):
+                del self._subscription_hits[key]
+        return hits
+
     def _viperror(self, sender, error, **kwargs):
         if isinstance(error, Unreachable):
             self._peer_drop(self, error.peer)
@@ -288,14 +351,13 @@ class PubSub(SubsystemBase):
         # _log.debug(f"Adding subscription prefix: {prefix} allplatforms: {all_platforms}")
         if not callable(callback):
             raise ValueError('callback %r is not callable' % (callback,))
+        platform = 'all' if all_platforms else 'internal'
+        subscriptions = self._my_subscriptions[platform][bus]
         try:
-            if not all_platforms:
-                self._my_subscriptions['internal'][bus][prefix].add(callback)
-            else:
-                self._my_subscriptions['all'][bus][prefix].add(callback)
-                # _log.debug("SYNC: add subscriptions: {}".format(self._my_subscriptions['internal'][bus][prefix]))
+            subscriptions[prefix].add(callback)
         except KeyError:
-            _log.error("PUBSUB something went wrong in add subscriptions")
+            subscriptions[prefix] = {callback}
+        self._invalidate_callback_cache()
 
     @dualmethod
     @spawn
@@ -361,6 +423,7 @@ class PubSub(SubsystemBase):
         """
         topics = []
         bus_subscriptions = dict()
+        self._invalidate_callback_cache()
         if prefix is None:
             if callback is None:
                 if len(self._my_subscriptions) and platform in \
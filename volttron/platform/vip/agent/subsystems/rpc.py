@@ -245,6 +245,7 @@ class RPC(SubsystemBase):
         self._message_bus = self.core().messagebus
         self.peerlist_subsystem = peerlist_subsys
         self.peer_list = {}
+        self._auth_generation = 0
 
         def export(member):  # pylint: disable=redefined-outer-name
             for name in annotations(member, set, "rpc.exports"):
@@ -298,18 +299,31 @@ class RPC(SubsystemBase):
             # if caps:
             #     self._exports[method_name] = self._add_auth_check(method, caps)
 
+    def invalidate_auth_checks(self):
+        """
+        Forget the authorization decisions cached for every user. Called when
+        the capabilities of the users change.
+        """
+        self._auth_generation += 1
+
     def _add_auth_check(self, method, required_caps):
         """
         Adds an authorization check to verify the calling agent has the
         required capabilities.
-        """
 
-        def checked_method(*args, **kwargs):
-            user = str(self.context.vip_message.user)
-            if self._message_bus == "rmq":
-                # When we address issue #2107 external platform user should
-                # have instance name also included in username.
-                user = user.split(".")[1]
+        The decision for each user is worked out on the first call and kept
+        until invalidate_auth_checks is called. Calls by a user without
+        argument restrictions then only cost a dictionary lookup.
+        """
+        checks = {}
+        signature = []
+
+        def compile_check(user):
+            """
+            Returns the reason the user may not call the method, or the
+            argument restrictions of the user as a list of
+            (parameter, regex, value) entries.
+            """
             user_capabilites = self._owner.vip.auth.get_capabilities(user)
             _log.debug("**user caps is: {}".format(user_capabilites))
             if user_capabilites:
@@ -317,9 +331,9 @@ class RPC(SubsystemBase):
             else:
                 user_capabilities_names = set()
             if required_caps == {""}:
-                pass
-            elif not required_caps.issubset(user_capabilities_names):
-                msg = (
+                return []
+            if not required_caps.issubset(user_capabilities_names):
+                return (
                     "method '{}' requires capabilities {}, but capability {} "
                     "was provided for user {}"
                 ).format(
@@ -328,70 +342,91 @@ class RPC(SubsystemBase):
                     user_capabilites,
                     user
                 )
-                raise jsonrpc.exception_from_json(jsonrpc.UNAUTHORIZED, msg)
-            else:
-                # Now check if args passed to method are the ones allowed.
-
-                for cap_name, param_dict in user_capabilites.items():
-                    if (
-                            param_dict
-                            and required_caps
-                            and cap_name in required_caps
-                    ):
-                        # if the method has required capabilities and
-                        # if the user capability has argument restrictions,
-                        # check if the args passed to method match the
-                        # requirement
-                        _log.debug("args = {} kwargs= {}".format(args, kwargs))
-                        args_dict = inspect.getcallargs(method, *args, **kwargs)
-                        _log.debug("dict = {}".format(args_dict))
-                        _log.debug(
-                            "name= %r parameters allowed=%r",
-                            cap_name,
-                            param_dict
+            # Check if the args passed to the method are the ones allowed.
+            restrictions = []
+            for cap_name, param_dict in user_capabilites.items():
+                if (
+                        param_dict
+                        and required_caps
+                        and cap_name in required_caps
+                ):
+                    # The method has required capabilities and the user
+                    # capability has argument restrictions.
+                    _log.debug(
+                        "name= %r parameters allowed=%r",
+                        cap_name,
+                        param_dict
+                    )
+                    for name, value in param_dict.items():
+                        regex = re.compile("^" + value[1:-1] + "$") if _isregex(value) else None
+                        restrictions.append((name, regex, value))
+            return restrictions
+
+        def check_arguments(user, restrictions, args, kwargs):
+            if not signature:
+                signature.append(inspect.signature(method))
+            bound = signature[0].bind(*args, **kwargs)
+            bound.apply_defaults()
+            args_dict = bound.arguments
+            for name, regex, value in restrictions:
+                if name not in args_dict:
+                    raise jsonrpc.exception_from_json(
+                        jsonrpc.UNAUTHORIZED,
+                        "User {} capability is not defined "
+                        "properly. method {} does not have "
+                        "a parameter {}".format(
+                            user, method.__name__, name
+                        ),
+                    )
+                if regex is not None:
+                    if not regex.match(args_dict[name]):
+                        raise jsonrpc.exception_from_json(
+                            jsonrpc.UNAUTHORIZED,
+                            "User {} can call method {} only "
+                            "with {} matching pattern {} but "
+                            "called with {}={}".format(
+                                user,
+                                method.__name__,
+                                name,
+                                value,
+                                name,
+                                args_dict[name],
+                            ),
                         )
-                        for name, value in param_dict.items():
-                            _log.debug("name= {} value={}".format(name, value))
-                            if name not in args_dict:
-                                raise jsonrpc.exception_from_json(
-                                    jsonrpc.UNAUTHORIZED,
-                                    "User {} capability is not defined "
-                                    "properly. method {} does not have "
-                                    "a parameter {}".format(
-                                        user, method.__name__, name
-                                    ),
-                                )
-                            if _isregex(value):
-                                regex = re.compile("^" + value[1:-1] + "$")
-                                if not regex.match(args_dict[name]):
-                                    raise jsonrpc.exception_from_json(
-                                        jsonrpc.UNAUTHORIZED,
-                                        "User {} can call method {} only "
-                                        "with {} matching pattern {} but "
-                                        "called with {}={}".format(
-                                            user,
-                                            method.__name__,
-                                            name,
-                                            value,
-                                            name,
-                                            args_dict[name],
-                                        ),
-                                    )
-                            elif args_dict[name] != value:
-                                raise jsonrpc.exception_from_json(
-                                    jsonrpc.UNAUTHORIZED,
-                                    "User {} can call method {} only "
-                                    "with {}={} but called with "
-                                    "{}={}".format(
-                                        user,
-                                        method.__name__,
-                                        name,
-                                        value,
-                                        name,
-                                        args_dict[name],
-                                    ),
-                                )
+                elif args_dict[name] != value:
+                    raise jsonrpc.exception_from_json(
+                        jsonrpc.UNAUTHORIZED,
+                        "User {} can call method {} only "
+                        "with {}={} but called with "
+                        "{}={}".format(
+                            user,
+                            method.__name__,
+                            name,
+                            value,
+                            name,
+                            args_dict[name],
+                        ),
+                    )
 
+        def checked_method(*args, **kwargs):
+            user = str(self.context.vip_message.user)
+            if self._message_bus == "rmq":
+                # When we address issue #2107 external platform user should
+                # have instance name also included in username.
+                user = user.split(".")[1]
+            generation = self._auth_generation
+            cached = checks.get(user)
+            if cached is not None and cached[0] == generation:
+                check = cached[1]
+            else:
+                check = compile_check(user)
+                # Keep the decision unless the capabilities changed while it was made.
+                if generation == self._auth_generation:
+                    checks[user] = (generation, check)
+            if isinstance(check, str):
+                raise jsonrpc.exception_from_json(jsonrpc.UNAUTHORIZED, check)
+            if check:
+                check_arguments(user, check, args, kwargs)
             return method(*args, **kwargs)
 
         return checked_method
@@ -51,6 +51,7 @@ from collections import defaultdict
 # Create a context common to the green and non-green zmq modules.
 from volttron.platform.agent.utils import get_platform_instance_name
 from volttron.utils.frame_serialization import serialize_frames
+from volttron.utils.prefix_index import TopicPrefixIndex
 
 green.Context._instance = green.Context.shadow(zmq.Context.instance().underlying)
 from volttron.platform import get_home
@@ -75,7 +76,7 @@ class PubSubService:
             return defaultdict(subscriptions)
 
         def subscriptions():
-            return defaultdict(set)
+            return TopicPrefixIndex()
 
         self._peer_subscriptions = defaultdict(platform_subscriptions)
         self._vip_sock = socket
@@ -99,7 +100,11 @@ class PubSubService:
         :param prefix subscription prefix (peer is subscribing to all topics matching the prefix)
         :type str
         """
-        self._peer_subscriptions[platform][bus][prefix].add(peer)
+        subscriptions = self._peer_subscriptions[platform][bus]
+        try:
+            subscriptions[prefix].add(peer)
+        except KeyError:
+            subscriptions[prefix] = {peer}
 
     def peer_drop(self, peer, **kwargs):
         """
@@ -271,7 +276,9 @@ class PubSubService:
                         del subscriptions[topic]
                 else:
                     for prefix in prefix if isinstance(prefix, list) else [prefix]:
-                        subscribers = subscriptions[prefix]
+                        subscribers = subscriptions.get(prefix)
+                        if subscribers is None:
+                            continue
                         subscribers.discard(peer)
                         if not subscribers:
                             del subscriptions[prefix]
@@ -423,34 +430,27 @@ class PubSubService:
             self._logger.error("JSON decode error. Invalid character")
             return 0
 
-        all_subscriptions = dict()
-        subscriptions = dict()
-        subs = dict()
-        # Get subscriptions for all platforms
-        try:
-            all_subscriptions = self._peer_subscriptions['all'][bus]
-        except KeyError:
-            pass
-        try:
-            subscriptions = self._peer_subscriptions['internal'][bus]
-        except KeyError:
-            pass
-
-        subs.update(all_subscriptions)
-        subs.update(subscriptions)
         subscribers = set()
-        # Check for local subscribers
-        for prefix, subscription in subs.items():
-            if subscription and topic.startswith(prefix):
+        # Check for local subscribers of both internal and all platform subscriptions.
+        # The prefix index only visits prefixes the topic actually starts with.
+        for platform in ('all', 'internal'):
+            subscriptions = self._peer_subscriptions.get(platform, {}).get(bus)
+            if not subscriptions:
+                continue
+            for prefix, subscription in subscriptions.match(topic):
                 subscribers |= subscription
 
         if subscribers:
             # self._logger.debug("PUBSUBSERVICE: found subscribers: {}".format(subscribers))
+            # Serialize the message once. Only the recipient frame differs between subscribers, the other zmq frames
+            # are shared by every send.
+            shared = serialize_frames(frames)[1:]
             for subscriber in subscribers:
                 frames[0] = subscriber
+                serialized = serialize_frames([subscriber]) + shared
                 try:
                     # Send the message to the subscriber
-                    for sub in self._send(frames, publisher):
+                    for sub in self._send(frames, publisher, serialized):
                         # Drop the subscriber if unreachable
                         self.peer_drop(sub)
                 except ZMQError:
@@ -506,7 +506,7 @@ class PubSubService:
                         raise
         return len(external_subscribers)
 
-    def _send(self, frames, publisher):
+    def _send(self, frames, publisher, serialized=None):
         """
         Sends the message to the recipient. If the recipient is unreachable, it is dropped from list of peers (and
         associated subscriptions are removed. Any EAGAIN errors are reported back to the publisher.
@@ -514,6 +514,8 @@ class PubSubService:
         :type frames list
         :param publisher
         :type bytes
+        :param serialized: frames already serialized for sending, serialized from frames if not given
+        :type list
         :returns: List of dropped recipients, if any
         :rtype: list
 
@@ -530,7 +532,8 @@ class PubSubService:
             # Try sending the message to its recipient
             # Because we are sending directly on the socket we need
             # bytes
-            serialized = serialize_frames(frames)
+            if serialized is None:
+                serialized = serialize_frames(frames)
             self._vip_sock.send_multipart(serialized, flags=NOBLOCK, copy=False)
         except ZMQError as exc:
             try:
@@ -45,31 +45,133 @@
 
 
 
+from bisect import bisect_left
+from collections import OrderedDict, deque
+import math
+import time
+
 import gevent
+import zmq
+from zmq.sugar.frame import Frame
 
+from volttron.utils.frame_serialization import ENVELOPE_FRAMES, LazyFrames, serialize_frames
 from .router import UNROUTABLE, ERROR, INCOMING
 
-__all__ = ['Tracker']
+__all__ = ['Tracker', 'MessageTracer']
+
+# Rates are averaged over RATE_WINDOW seconds, updated every RATE_INTERVAL seconds.
+RATE_INTERVAL = 5.0
+RATE_WINDOW = 60.0
+# Upper bounds, in seconds, of the RPC latency histogram buckets. The last bucket counts everything slower.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Number of RPC requests waiting for a response that are remembered. The oldest are forgotten first, which drops
+# requests that never get a response.
+MAX_PENDING_REQUESTS = 10000
+
+
+def peer_name(frame):
+    '''Return a sender, recipient or message id frame as a string.'''
+    if isinstance(frame, str):
+        return frame
+    if isinstance(frame, (bytes, bytearray, memoryview, Frame)):
+        return bytes(frame).decode('utf-8', 'replace')
+    # Received frames are JSON decoded, so message ids such as "1.1402" arrive as numbers.
+    return str(frame)
 
 
 def pick(frames, index):
-    '''Return the frame at index, converted to bytes, or None.'''
+    '''Return the frame at index, converted to a string, or None.'''
     try:
-        return bytes(frames[index])
+        return peer_name(frames[index])
     except IndexError:
         return None
 
 
-def increment(prop, key):
-    '''Increment or set to 1 the value in prop[key].'''
+def increment(prop, key, count=1):
+    '''Increment or set to count the value in prop[key].'''
     try:
-        prop[key] += 1
+        prop[key] += count
     except KeyError:
-        prop[key] = 1
+        prop[key] = count
+
+
+def payload_size(frames):
+    '''Return the number of bytes in the frames following the envelope.'''
+    if isinstance(frames, LazyFrames):
+        frames = frames.raw()
+    size = 0
+    for frame in frames[ENVELOPE_FRAMES:]:
+        if isinstance(frame, (Frame, bytes, str)):
+            size += len(frame)
+    return size
+
+
+class Rate:
+    '''Exponentially weighted moving average of events per second.'''
+    __slots__ = ('rate', 'count', 'tick')
+
+    alpha = 1 - math.exp(-RATE_INTERVAL / RATE_WINDOW)
+
+    def __init__(self, now):
+        self.rate = None
+        self.count = 0
+        self.tick = now
+
+    def mark(self, now, count=1):
+        self._update(now)
+        self.count += count
+
+    def value(self, now):
+        self._update(now)
+        return self.rate or 0.0
+
+    def _update(self, now):
+        intervals = int((now - self.tick) // RATE_INTERVAL)
+        if intervals < 1:
+            return
+        if self.rate is None:
+            # Start from the rate of the first interval instead of 0.
+            self.rate = self.count / RATE_INTERVAL
+        else:
+            self.rate += self.alpha * (self.count / RATE_INTERVAL - self.rate)
+        # Nothing was counted in the remaining intervals.
+        self.rate *= (1 - self.alpha) ** (intervals - 1)
+        self.count = 0
+        self.tick += intervals * RATE_INTERVAL
+
+
+class Histogram:
+    '''Latency histogram with fixed buckets.'''
+    __slots__ = ('counts', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self):
+        count = sum(self.counts)
+        return {'buckets': list(LATENCY_BUCKETS) + ['inf'],
+                'counts': list(self.counts),
+                'count': count,
+                'mean': self.total / count if count else 0.0,
+                'max': self.max}
 
 
 class Tracker:
-    '''Object for sharing data between the router and control objects.'''
+    '''Object for sharing data between the router and control objects.
+
+    Besides counting messages per peer, user and subsystem the tracker keeps
+    payload byte counts, message rates per peer and subsystem and histograms
+    of the time between an RPC request and its response, per peer answering
+    the request.
+    '''
 
     def __init__(self):
         self._reset()
@@ -85,9 +187,13 @@ class Tracker:
         self.stats = {
             'error': {'error': {}, 'peer': {}, 'user': {}, 'subsystem': {}},
             'unroutable': {'error': {}, 'peer': {}},
-            'incoming': {'peer': {}, 'user': {}, 'subsystem': {}},
-            'outgoing': {'peer': {}, 'user': {}, 'subsystem': {}},
+            'incoming': {'peer': {}, 'user': {}, 'subsystem': {}, 'bytes': {'peer': {}, 'subsystem': {}}},
+            'outgoing': {'peer': {}, 'user': {}, 'subsystem': {}, 'bytes': {'peer': {}, 'subsystem': {}}},
         }
+        self._rates = {'incoming': {'peer': {}, 'subsystem': {}},
+                       'outgoing': {'peer': {}, 'subsystem': {}}}
+        self._latency = {}
+        self._pending = OrderedDict()
 
     def hit(self, topic, frames, extra):
         '''Increment counters for given topic and frames.'''
@@ -100,14 +206,61 @@ class Tracker:
                 subsystem = pick(frames, 5)
                 if topic == ERROR:
                     stat = self.stats['error']
-                    increment(stat['error'], bytes(extra[0]))
+                    increment(stat['error'], extra[0])
                 else:
-                    stat = self.stats[
-                        'incoming' if topic == INCOMING else 'outgoing']
+                    direction = 'incoming' if topic == INCOMING else 'outgoing'
+                    stat = self.stats[direction]
+                    self._measure(direction, frames, subsystem)
                 increment(stat['user'], user)
                 increment(stat['subsystem'], subsystem)
             increment(stat['peer'], pick(frames, 0))
 
+    def _measure(self, direction, frames, subsystem):
+        '''Update byte counts, rates and RPC latencies of a routed message.'''
+        now = time.monotonic()
+        peer = pick(frames, 0)
+        size = payload_size(frames)
+        stat = self.stats[direction]['bytes']
+        increment(stat['peer'], peer, size)
+        increment(stat['subsystem'], subsystem, size)
+        rates = self._rates[direction]
+        for kind, key in (('peer', peer), ('subsystem', subsystem)):
+            try:
+                rates[kind][key].mark(now)
+            except KeyError:
+                rate = rates[kind][key] = Rate(now)
+                rate.mark(now)
+        if direction == 'incoming' and subsystem == 'RPC':
+            self._match_rpc(peer, pick(frames, 1), pick(frames, 4))
+
+    def _match_rpc(self, sender, recipient, msg_id):
+        '''Time an RPC request or record the latency of the response to it.'''
+        if not msg_id or not recipient:
+            return
+        now = time.perf_counter()
+        started = self._pending.pop((recipient, sender, msg_id), None)
+        if started is not None:
+            try:
+                histogram = self._latency[sender]
+            except KeyError:
+                histogram = self._latency[sender] = Histogram()
+            histogram.add(now - started)
+            return
+        self._pending[(sender, recipient, msg_id)] = now
+        if len(self._pending) > MAX_PENDING_REQUESTS:
+            self._pending.popitem(last=False)
+
+    def get_stats(self):
+        '''Return the counters with the current rates and RPC latency histograms.'''
+        now = time.monotonic()
+        stats = dict(self.stats)
+        stats['rates'] = {direction: {kind: {key: rate.value(now) for key, rate in dict(rates).items()}
+                                      for kind, rates in kinds.items()}
+                          for direction, kinds in self._rates.items()}
+        stats['latency'] = {'rpc': {peer: histogram.as_dict()
+                                    for peer, histogram in dict(self._latency).items()}}
+        return stats
+
     def enable(self):
         '''Enable tracking.'''
         if not self.enabled:
@@ -119,3 +272,67 @@ class Tracker:
         if self.enabled:
             self.enabled = False
             self.stats['end'] = gevent.get_hub().loop.now()
+
+
+class MessageTracer:
+    '''Sample routed messages for the MessageDebuggerAgent.
+
+    One in every sample_rate messages is kept, optionally only messages
+    sent from or to one of peers. Sampled messages go into a ring buffer
+    of buffer_size messages, the oldest message is dropped when it is
+    full. The router publishes the buffered messages with flush() once
+    per poll loop instead of encoding and sending every message as it
+    is routed.
+    '''
+
+    def __init__(self, address, sample_rate=1, peers=None, buffer_size=1000):
+        if sample_rate < 1:
+            raise ValueError("sample_rate must be at least 1")
+        self.address = address
+        self.sample_rate = sample_rate
+        self.peers = set(peers) if peers else None
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self._count = 0
+        self._socket = None
+
+    def hit(self, topic, frames, extra=None):
+        '''Keep the message if it is sampled.'''
+        if self.peers is not None:
+            if len(frames) < 2 or (peer_name(frames[0]) not in self.peers and
+                                   peer_name(frames[1]) not in self.peers):
+                return
+        self._count += 1
+        if self._count < self.sample_rate:
+            return
+        self._count = 0
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        # Copy the frames, the router reuses the list for the reply.
+        self.buffer.append((topic, frames.raw() if isinstance(frames, LazyFrames) else list(frames)))
+
+    def connect(self):
+        '''Connect the socket the debugger agent subscribes to.'''
+        if self._socket is None:
+            self._socket = zmq.Context.instance().socket(zmq.PUB)
+            self._socket.connect(self.address)
+
+    def flush(self):
+        '''Publish the buffered messages and return how many were sent.'''
+        if not self.buffer:
+            return 0
+        self.connect()
+        sent = 0
+        while self.buffer:
+            topic, frames = self.buffer.popleft()
+            message = [topic]
+            message.extend(f.bytes if isinstance(f, Frame) else f for f in serialize_frames(frames))
+            self._socket.send_pyobj(message, flags=zmq.NOBLOCK)
+            sent += 1
+        return sent
+
+    def close(self):
+        '''Close the debugger socket.'''
+        if self._socket is not None:
+            self._socket.close(linger=0)
+            self._socket = None
@@ -60,6 +60,7 @@ from .admin_endpoints import AdminEndpoints
 from .vui_endpoints import VUIEndpoints
 from .authenticate_endpoint import AuthenticateEndpoints
 from .csr_endpoints import CSREndpoints
+from .routing import PeerBusyError, PeerLimiter, RouteTable
 from .webapp import WebApplicationWrapper
 from volttron.platform.agent.known_identities import \
     CONTROL, VOLTTRON_CENTRAL, AUTH
@@ -94,6 +95,15 @@ class DuplicateEndpointError(Exception):
     pass
 
 
+class RequestTooLargeError(Exception):
+    pass
+
+
+# Request bodies are read in chunks of this many bytes so max_request_size is
+# enforced when the client sends no (or a wrong) Content-Length.
+REQUEST_CHUNK_SIZE = 64 * 1024
+
+
 __PACKAGE_DIR__ = os.path.dirname(os.path.abspath(__file__))
 __TEMPLATE_DIR__ = os.path.join(__PACKAGE_DIR__, "templates")
 __STATIC_DIR__ = os.path.join(__PACKAGE_DIR__, "static")
@@ -117,10 +127,17 @@ class PlatformWebService(Agent):
 
     def __init__(self, serverkey, identity, address, bind_web_address,
                  volttron_central_address=None, volttron_central_rmq_address=None,
-                 web_ssl_key=None, web_ssl_cert=None, web_secret_key=None, **kwargs):
+                 web_ssl_key=None, web_ssl_cert=None, web_secret_key=None,
+                 web_max_request_size=None, web_peer_concurrency=10, web_peer_queue_size=100,
+                 web_pubsub_max_rate=None, web_pubsub_queue_size=100, **kwargs):
         """
         Initialize the configuration of the base web service integration within the platform.
 
+        :param web_max_request_size: Largest request body in bytes that is accepted, unlimited if None.
+        :param web_peer_concurrency: Number of requests each agent handles at the same time.
+        :param web_peer_queue_size: Number of further requests that wait for an agent before requests are refused.
+        :param web_pubsub_max_rate: Most messages per second sent to the VUI websockets of a topic, unlimited if None.
+        :param web_pubsub_queue_size: Number of messages that wait for a VUI websocket before the oldest are dropped.
         """
         super(PlatformWebService, self).__init__(identity, address, **kwargs)
 
@@ -131,7 +148,7 @@ class PlatformWebService(Agent):
         self.bind_web_address = bind_web_address
         self.serverkey = serverkey
         self.instance_name = None
-        self.registeredroutes = []
+        self.registeredroutes = RouteTable()
         self.peerroutes = defaultdict(list)
         self.pathroutes = defaultdict(list)
         # These will be used if set rather than the
@@ -139,6 +156,10 @@ class PlatformWebService(Agent):
         self.web_ssl_key = web_ssl_key
         self.web_ssl_cert = web_ssl_cert
         self._web_secret_key = web_secret_key
+        self.max_request_size = web_max_request_size
+        self._peer_limiter = PeerLimiter(concurrency=web_peer_concurrency, queue_size=web_peer_queue_size)
+        self.pubsub_max_rate = web_pubsub_max_rate
+        self.pubsub_queue_size = web_pubsub_queue_size
 
         # Maps from endpoint to peer.
         self.endpoints = {}
@@ -277,14 +298,10 @@ class PlatformWebService(Agent):
         identity = self.vip.rpc.context.vip_message.peer
 
         _log.info('Unregistering agent routes for: {}'.format(identity))
-        for regex in self.peerroutes[identity]:
-            out = [cp for cp in self.registeredroutes if cp[0] != regex]
-            self.registeredroutes = out
+        self.registeredroutes.remove_patterns(set(self.peerroutes[identity]) | set(self.pathroutes[identity]))
         del self.peerroutes[identity]
-        for regex in self.pathroutes[identity]:
-            out = [cp for cp in self.registeredroutes if cp[0] != regex]
-            self.registeredroutes = out
         del self.pathroutes[identity]
+        self._peer_limiter.remove(identity)
 
         _log.debug(self.endpoints)
         endpoints = self.endpoints.copy()
@@ -420,7 +437,8 @@ class PlatformWebService(Agent):
         The main routing function that maps the incoming request to a response.
 
         Depending on the registered routes map the request data onto an rpc
-        function or a specific named file.
+        function or a specific named file. The request body is only read for
+        routes that are passed the request data.
         """
         path_info = env['PATH_INFO']
 
@@ -434,18 +452,17 @@ class PlatformWebService(Agent):
                    'HTTP_ACCEPT_ENCODING', 'HTTP_COOKIE', 'CONTENT_TYPE',
                    'HTTP_AUTHORIZATION', 'SERVER_NAME', 'wsgi.url_scheme',
                    'HTTP_HOST']
-        data = env['wsgi.input'].read().decode('utf-8')
         passenv = dict(
             (envlist[i], env[envlist[i]]) for i in range(0, len(envlist)) if envlist[i] in env.keys())
 
-        _log.debug('path_info is: {}'.format(path_info))
+        data = None
+        body_read = False
+
+        _log.debug('path_info is: %s', path_info)
         # Get the peer responsible for dealing with the endpoint.  If there
         # isn't a peer then fall back on the other methods of routing.
         (peer, res_type) = self.endpoints.get(path_info, (None, None))
-        _log.debug('Peer path_info is associated with: {}'.format(peer))
-
-        if self.is_json_content(env):
-            data = jsonapi.loads(data)
+        _log.debug('Peer path_info is associated with: %s', peer)
 
         # Only if https available and rmq for the admin area.
         if env['wsgi.url_scheme'] == 'https' and self.core.messagebus == 'rmq':
@@ -458,11 +475,18 @@ class PlatformWebService(Agent):
         # if we have a peer then we expect to call that peer's web subsystem
         # callback to perform whatever is required of the method.
         if peer:
-            _log.debug('Calling peer {} back with env={} data={}'.format(
-                peer, passenv, data
-            ))
-            res = self.vip.rpc.call(peer, 'route.callback',
-                                    passenv, data).get(timeout=60)
+            try:
+                data = self._read_body(env)
+            except RequestTooLargeError:
+                return self._request_too_large(start_response)
+            body_read = True
+            _log.debug('Calling peer %s back with env=%s data=%s', peer, passenv, data)
+            try:
+                with self._peer_limiter.limit(peer):
+                    res = self.vip.rpc.call(peer, 'route.callback',
+                                            passenv, data).get(timeout=60)
+            except PeerBusyError:
+                return self._peer_busy(start_response)
 
             if res_type == "jsonrpc":
                 return self.create_response(res, start_response)
@@ -477,53 +501,110 @@ class PlatformWebService(Agent):
         if 'ws4py.socket' in env and 'vui' not in path_info:
             return env['ws4py.socket'](env, start_response)
 
-        for k, t, v in self.registeredroutes:
-            if k.match(path_info):
-                _log.debug("MATCHED:\npattern: {}, path_info: {}\n v: {}"
-                           .format(k.pattern, path_info, v))
-                _log.debug('registered route t is: {}'.format(t))
-                if t == 'callable':  # Generally for locally called items.
-                    # Changing signature of the "locally" called points to return
-                    # a Response object. Our response object then will in turn
-                    # be processed and the response will be written back to the
-                    # calling client.
-                    try:
-                        retvalue = v(env, start_response, data)
-                    except TypeError:
-                        response = v(env, data)
-                        _log.debug(f'VUI:  Response at app_routing is: {response.response}')
-                        return response(env, start_response)
-                        # retvalue = self.process_response(start_response, v(env, data))
-
-                    if isinstance(retvalue, werkzeug.Response):
-                        return retvalue(env, start_response)
-                    else:
-                        return retvalue[0]
-
-                elif t == 'peer_route':  # RPC calls from agents on the platform
-                    _log.debug('Matched peer_route with pattern {}'.format(
-                        k.pattern))
-                    peer, fn = (v[0], v[1])
-                    res = self.vip.rpc.call(peer, fn, passenv, data).get(
-                        timeout=120)
-                    _log.debug(res)
-                    return self.create_response(res, start_response)
-
-                elif t == 'path':  # File service from agents on the platform.
-                    if path_info == '/':
-                        return self._redirect_index(env, start_response)
-                    server_path = v + path_info  # os.path.join(v, path_info)
-                    server_path = str(Path(server_path).resolve())
-                    _log.debug('Serverpath: {}'.format(server_path))
-                    # protects against relative server traversal.
-                    if not server_path.startswith(v):
-                        start_response('403 Forbidden', [('Content-Type', 'text/html')])
-                        return [b'<h1>403 Forbidden</h1>']
-                    return self._sendfile(env, start_response, server_path)
+        route = self.registeredroutes.match(path_info)
+        if route is not None:
+            k, t, v = route
+            _log.debug("MATCHED:\npattern: %s, path_info: %s\n v: %s", k.pattern, path_info, v)
+            _log.debug('registered route t is: %s', t)
+            if t == 'callable':  # Generally for locally called items.
+                try:
+                    if not body_read:
+                        data = self._read_body(env)
+                except RequestTooLargeError:
+                    return self._request_too_large(start_response)
+                # Changing signature of the "locally" called points to return
+                # a Response object. Our response object then will in turn
+                # be processed and the response will be written back to the
+                # calling client.
+                try:
+                    retvalue = v(env, start_response, data)
+                except TypeError:
+                    response = v(env, data)
+                    _log.debug(f'VUI:  Response at app_routing is: {response.response}')
+                    return response(env, start_response)
+                    # retvalue = self.process_response(start_response, v(env, data))
+
+                if isinstance(retvalue, werkzeug.Response):
+                    return retvalue(env, start_response)
+                else:
+                    return retvalue[0]
+
+            elif t == 'peer_route':  # RPC calls from agents on the platform
+                _log.debug('Matched peer_route with pattern %s', k.pattern)
+                try:
+                    if not body_read:
+                        data = self._read_body(env)
+                except RequestTooLargeError:
+                    return self._request_too_large(start_response)
+                peer, fn = (v[0], v[1])
+                try:
+                    with self._peer_limiter.limit(peer):
+                        res = self.vip.rpc.call(peer, fn, passenv, data).get(
+                            timeout=120)
+                except PeerBusyError:
+                    return self._peer_busy(start_response)
+                _log.debug(res)
+                return self.create_response(res, start_response)
+
+            elif t == 'path':  # File service from agents on the platform.
+                if path_info == '/':
+                    return self._redirect_index(env, start_response)
+                server_path = v + path_info  # os.path.join(v, path_info)
+                server_path = str(Path(server_path).resolve())
+                _log.debug('Serverpath: {}'.format(server_path))
+                # protects against relative server traversal.
+                if not server_path.startswith(v):
+                    start_response('403 Forbidden', [('Content-Type', 'text/html')])
+                    return [b'<h1>403 Forbidden</h1>']
+                return self._sendfile(env, start_response, server_path)
 
         start_response('404 Not Found', [('Content-Type', 'text/html')])
         return [b'<h1>Not Found</h1>']
 
+    def _read_body(self, env):
+        """
+        Read the whole request body into memory.
+
+        The body is not streamed to the route, it is buffered and passed on
+        decoded. It is read in chunks of REQUEST_CHUNK_SIZE bytes only so
+        that a body larger than max_request_size is refused without being
+        buffered completely. Json content is returned decoded, anything
+        else as a string.
+
+        :raises RequestTooLargeError: if the body is larger than max_request_size.
+        """
+        max_size = self.max_request_size
+        if max_size:
+            try:
+                content_length = int(env.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                content_length = 0
+            if content_length > max_size:
+                raise RequestTooLargeError(content_length)
+        stream = env['wsgi.input']
+        body = bytearray()
+        while True:
+            chunk = stream.read(REQUEST_CHUNK_SIZE)
+            if not chunk:
+                break
+            body += chunk
+            if max_size and len(body) > max_size:
+                raise RequestTooLargeError(len(body))
+        data = body.decode('utf-8')
+        if self.is_json_content(env):
+            data = jsonapi.loads(data)
+        return data
+
+    @staticmethod
+    def _request_too_large(start_response):
+        start_response('413 Request Entity Too Large', [('Content-Type', 'text/html')])
+        return [b'<h1>Request Entity Too Large</h1>']
+
+    @staticmethod
+    def _peer_busy(start_response):
+        start_response('503 Service Unavailable', [('Content-Type', 'text/html'), ('Retry-After', '1')])
+        return [b'<h1>Service Unavailable</h1>']
+
     def is_json_content(self, env):
         ct = env.get('CONTENT_TYPE')
         if ct is not None and 'application/json' in ct:
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*- {{{
+# vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+#
+# Copyright 2020, Battelle Memorial Institute.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This material was prepared as an account of work sponsored by an agency of
+# the United States Government. Neither the United States Government nor the
+# United States Department of Energy, nor Battelle, nor any of their
+# employees, nor any jurisdiction or organization that has cooperated in the
+# development of these materials, makes any warranty, express or
+# implied, or assumes any legal liability or responsibility for the accuracy,
+# completeness, or usefulness or any information, apparatus, product,
+# software, or process disclosed, or represents that its use would not infringe
+# privately owned rights. Reference herein to any specific commercial product,
+# process, or service by trade name, trademark, manufacturer, or otherwise
+# does not necessarily constitute or imply its endorsement, recommendation, or
+# favoring by the United States Government or any agency thereof, or
+# Battelle Memorial Institute. The views and opinions of authors expressed
+# herein do not necessarily state or reflect those of the
+# United States Government or any agency thereof.
+#
+# PACIFIC NORTHWEST NATIONAL LABORATORY operated by
+# BATTELLE for the UNITED STATES DEPARTMENT OF ENERGY
+# under Contract DE-AC05-76RL01830
+# }}}
+
+import logging
+import re
+from collections import defaultdict
+from contextlib import contextmanager
+
+from gevent.lock import Semaphore
+
+_log = logging.getLogger(__name__)
+
+# Patterns that change meaning when their groups are renumbered inside the combined expression.
+_UNCOMBINABLE = re.compile(r'\\[1-9]|\(\?P[<=]|\(\?[aiLmsux]+\)')
+
+
+class RouteTable(list):
+    """
+    The registered routes of the web service as a list of (regex, type, value)
+    tuples.
+
+    Routes are matched in list order. Instead of trying every expression in
+    turn the table compiles all of them into a single alternation, which is
+    rebuilt the next time a path is matched after the list changes. Routes
+    whose expressions cannot be combined (back references, named groups or
+    flags) are matched one by one in their place in the list.
+    """
+
+    def __init__(self, routes=()):
+        super(RouteTable, self).__init__(routes)
+        self._compiled = None
+
+    def match(self, path):
+        """
+        Return the first route whose expression matches the start of path, or
+        None.
+        """
+        if self._compiled is None:
+            self._compiled = self._compile()
+        for combined, groups, routes in self._compiled:
+            if combined is None:
+                if routes[0][0].match(path):
+                    return routes[0]
+                continue
+            m = combined.match(path)
+            if m is not None:
+                return routes[groups[m.lastindex]]
+        return None
+
+    def remove_patterns(self, patterns):
+        """Remove every route whose expression is in patterns."""
+        self[:] = [route for route in self if route[0] not in patterns]
+
+    def _compile(self):
+        """
+        Split the routes into runs that can share one expression and compile
+        each run.
+        """
+        runs = []
+        run = []
+        for route in self:
+            if self._combinable(route[0]):
+                run.append(route)
+                continue
+            if run:
+                runs.append(self._combine(run))
+                run = []
+            runs.append((None, None, [route]))
+        if run:
+            runs.append(self._combine(run))
+        return runs
+
+    @staticmethod
+    def _combinable(regex):
+        return regex.flags == re.UNICODE and not _UNCOMBINABLE.search(regex.pattern)
+
+    @staticmethod
+    def _combine(routes):
+        combined = re.compile('|'.join('(?P<_route{}>{})'.format(index, route[0].pattern)
+                                       for index, route in enumerate(routes)))
+        groups = {combined.groupindex['_route{}'.format(index)]: index for index in range(len(routes))}
+        return combined, groups, routes
+
+    def _changed(self):
+        self._compiled = None
+
+    def append(self, route):
+        super(RouteTable, self).append(route)
+        self._changed()
+
+    def extend(self, routes):
+        super(RouteTable, self).extend(routes)
+        self._changed()
+
+    def insert(self, index, route):
+        super(RouteTable, self).insert(index, route)
+        self._changed()
+
+    def remove(self, route):
+        super(RouteTable, self).remove(route)
+        self._changed()
+
+    def pop(self, index=-1):
+        route = super(RouteTable, self).pop(index)
+        self._changed()
+        return route
+
+    def clear(self):
+        super(RouteTable, self).clear()
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        super(RouteTable, self).sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        super(RouteTable, self).reverse()
+        self._changed()
+
+    def __setitem__(self, index, value):
+        super(RouteTable, self).__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index):
+        super(RouteTable, self).__delitem__(index)
+        self._changed()
+
+    def __iadd__(self, routes):
+        super(RouteTable, self).__iadd__(routes)
+        self._changed()
+        return self
+
+
+class PeerBusyError(Exception):
+    """Raised when too many requests are waiting on the same peer."""
+    pass
+
+
+class PeerLimiter:
+    """
+    Limit the number of web requests that are handled by each agent at the
+    same time.
+
+    At most concurrency requests per peer are passed on to the agent, up to
+    queue_size more wait for one of them to finish. Further requests are
+    refused with PeerBusyError so a slow agent only holds on to a bounded
+    number of the web server's connections.
+    """
+
+    def __init__(self, concurrency=10, queue_size=100):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if queue_size < 0:
+            raise ValueError("queue_size must not be negative")
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self._semaphores = defaultdict(lambda: Semaphore(self.concurrency))
+        self._waiting = defaultdict(int)
+
+    @contextmanager
+    def limit(self, peer):
+        semaphore = self._semaphores[peer]
+        if semaphore.locked():
+            if self._waiting[peer] >= self.queue_size:
+                _log.warning("Refusing web request for {}, {} requests are waiting".format(
+                    peer, self._waiting[peer]))
+                raise PeerBusyError(peer)
+            self._waiting[peer] += 1
+            try:
+                semaphore.acquire()
+            finally:
+                self._waiting[peer] -= 1
+        else:
+            semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    def remove(self, peer):
+        """Forget the state of a peer that unregistered its routes."""
+        if not self._semaphores.get(peer, Semaphore()).locked():
+            self._semaphores.pop(peer, None)
+            self._waiting.pop(peer, None)
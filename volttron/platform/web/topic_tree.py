@@ -5,8 +5,10 @@ from treelib.exceptions import DuplicatedNodeIdError, NodeIDAbsentError
 from collections import defaultdict
 
 from volttron.platform.agent.known_identities import CONFIGURATION_STORE
+from volttron.platform.jsonrpc import MethodNotFound
 
 import re
+from time import monotonic
 from os.path import normpath
 
 import logging
@@ -151,6 +153,25 @@ class DeviceTree(TopicTree):
     def from_store(cls, platform, rpc_caller):
         # TODO: Duplicate logic for external_platform check from VUIEndpoints to remove reference to it from here.
         kwargs = {'external_platform': platform} if 'VUIEndpoints' in rpc_caller.__repr__() else {}
+        try:
+            # Fetch every configuration of the driver in one round trip.
+            configs = rpc_caller(CONFIGURATION_STORE, 'manage_get_many', 'platform.driver', raw=False, **kwargs)
+            configs = configs if kwargs else configs.get(timeout=5)
+        except MethodNotFound:
+            # The configuration store of the platform predates manage_get_many.
+            return cls._from_store_by_config(platform, rpc_caller, kwargs)
+        configs_lower = {name.lower(): config for name, config in configs.items()}
+        devices = sorted(d for d in configs if re.match('^devices/.*', d))
+        device_tree = cls(devices)
+        for d in devices:
+            dev_config = dict(configs[d])
+            reg_cfg_name = dev_config.pop('registry_config')[len('config://'):]
+            device_tree.update_node(d, data=dev_config, segment_type='DEVICE')
+            device_tree._add_points(d, configs_lower[reg_cfg_name.lower()])
+        return device_tree
+
+    @classmethod
+    def _from_store_by_config(cls, platform, rpc_caller, kwargs):
         devices = rpc_caller(CONFIGURATION_STORE, 'manage_list_configs', 'platform.driver', **kwargs)
         devices = devices if kwargs else devices.get(timeout=5)
         devices = [d for d in devices if re.match('^devices/.*', d)]
@@ -164,8 +185,48 @@ class DeviceTree(TopicTree):
             registry_config = rpc_caller('config.store', 'manage_get', 'platform.driver',
                                          f'{reg_cfg_name}', raw=False, **kwargs)
             registry_config = registry_config if kwargs else registry_config.get(timeout=5)
-            for pnt in registry_config:
-                point_name = pnt.pop('Volttron Point Name')
-                n = device_tree.create_node(point_name, f"{d}/{point_name}", parent=d, data=pnt)
-                n.segment_type = 'POINT'
+            device_tree._add_points(d, registry_config)
         return device_tree
+
+    def _add_points(self, device, registry_config):
+        for pnt in registry_config:
+            pnt = dict(pnt)
+            point_name = pnt.pop('Volttron Point Name')
+            n = self.create_node(point_name, f"{device}/{point_name}", parent=device, data=pnt)
+            n.segment_type = 'POINT'
+
+
+class DeviceTreeCache:
+    """
+    DeviceTrees of the platforms, built from their configuration stores.
+
+    A tree is built on first use and kept until the configuration of the
+    platform driver changes, which the configuration store announces on the
+    CONFIG_STORE_CHANGED topic, or until it is older than max_age seconds.
+    The age limit covers platforms whose announcements are not received.
+    Cached trees are shared and must not be modified by their users.
+    """
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._trees = {}
+        self._generations = defaultdict(int)
+
+    def get(self, platform, rpc_caller):
+        cached = self._trees.get(platform)
+        if cached is not None:
+            built, tree = cached
+            if self.max_age is None or monotonic() - built < self.max_age:
+                return tree
+        generation = self._generations[platform]
+        built = monotonic()
+        tree = DeviceTree.from_store(platform, rpc_caller)
+        # Do not keep a tree that was invalidated while it was being built.
+        if generation == self._generations[platform]:
+            self._trees[platform] = (built, tree)
+        return tree
+
+    def invalidate(self, platform=None):
+        platforms = list(self._generations) if platform is None else [platform]
+        for p in platforms:
+            self._trees.pop(p, None)
+            self._generations[p] += 1
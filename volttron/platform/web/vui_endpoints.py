@@ -12,7 +12,8 @@ from werkzeug.urls import url_decode
 
 from volttron.platform.vip.agent.subsystems.query import Query
 from volttron.platform.jsonrpc import MethodNotFound, RemoteError
-from volttron.platform.web.topic_tree import DeviceTree, TopicTree
+from volttron.platform.messaging.topics import CONFIG_STORE_CHANGED
+from volttron.platform.web.topic_tree import DeviceTree, DeviceTreeCache, TopicTree
 from volttron.platform.web.vui_pubsub import VUIPubsubManager
 
 
@@ -145,7 +146,14 @@ class VUIEndpoints:
             }
         }
         if self.active_routes['vui']['platforms']['pubsub']:
-            self.pubsub_manager = VUIPubsubManager(self._agent)
+            self.pubsub_manager = VUIPubsubManager(self._agent, max_rate=self._agent.pubsub_max_rate,
+                                                   queue_size=self._agent.pubsub_queue_size)
+        self.device_trees = DeviceTreeCache()
+        self._agent.vip.pubsub.subscribe('pubsub', CONFIG_STORE_CHANGED(identity='platform.driver'),
+                                         self._on_driver_config_change)
+
+    def _on_driver_config_change(self, peer, sender, bus, topic, headers, message):
+        self.device_trees.invalidate(self.local_instance_name)
 
     def get_routes(self):
         """
@@ -613,8 +621,7 @@ class VUIEndpoints:
             tag_list = None
         # Prune device tree and get nodes matching topic:
         try:
-            # TODO: Should we be storing this tree to use for faster requests later? How to keep it updated?
-            device_tree = DeviceTree.from_store(platform, self._rpc).prune(topic, regex, tag_list)
+            device_tree = self.device_trees.get(platform, self._rpc).prune(topic, regex, tag_list)
             topic_nodes = device_tree.get_matches(f'devices/{topic}' if topic else 'devices')
             if not topic_nodes:
                 return Response(json.dumps({f'error': f'Device topic {topic} not found on platform: {platform}.'}),
@@ -1,17 +1,26 @@
 import json
+from time import monotonic
 from weakref import WeakValueDictionary
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
 
+import gevent
+from gevent.event import Event
 from ws4py.server.geventserver import WebSocketWSGIApplication
 from ws4py.websocket import WebSocket
 import logging
 
 _log = logging.getLogger()
 
+# Messages that wait to be sent to one websocket before the oldest are dropped.
+DEFAULT_QUEUE_SIZE = 100
+
 
 class VUIPubsubManager:
-    def __init__(self, agent):
+    def __init__(self, agent, max_rate=None, queue_size=DEFAULT_QUEUE_SIZE):
         self._agent = agent
+        self.max_rate = max_rate  # Most messages per second sent to the websockets of a topic, unlimited if None.
+        self.queue_size = queue_size
+        self.subscription_groups = {}  # Shared bus subscription for each topic with open websockets.
         self.subscription_websockets = WeakValueDictionary() # Websockets for all topics with current subscriptions.
         self.publication_websockets = {}  # Websockets for all topics with current publication queue.
         self.user_websockets = defaultdict(dict)  # References to all websockets for each user access_token.
@@ -58,43 +67,131 @@ class VUIPubsubManager:
 
     def client_opened(self, ws, topic, access_token):
         _log.debug(f'VUIPubsubManager: Subscribing to {topic}')
-        self._agent.vip.pubsub.subscribe('pubsub', topic, ws.on_topic)
+        group = self.subscription_groups.get(topic)
+        if group is None:
+            group = SubscriptionGroup(self._agent.vip.pubsub, topic, max_rate=self.max_rate,
+                                      queue_size=self.queue_size)
+            self.subscription_groups[topic] = group
+        group.add(ws)
         self.user_websockets[access_token][topic] = ws
 
-        # if topic not in self.subscription_websockets:
-        #     err = f'Websocket opened for unintialized topic: {topic}'
-        #     _log.error(err)
-        #     ws.close(reason=err)
-        #     return
-
-        # TODO: Use this if we need to look over websockets connected to one subscription.
-        # if ws in  self.subscription_websockets[topic]:
-        #     _log.debug("IDENTITY,CLIENT: {} already in endpoint set".format(identity))
-        # else:
-        #     _log.debug("IDENTITY,CLIENT: {} added to endpoint set".format(identity))
-        #     self.subscription_websockets[endpoint].add((identity, ws))
-#
-# class SubscriptionGroup:
-#     def __init__(self, pubsub_interface, topic: str):
-#         self.topic = topic
-#         self.websockets = []
-#         self.pubsub = pubsub_interface
-#         self.pubsub.subscribe('pubsub', topic, self.on_publish)
-#
-#
-#     def add(self, ws: WebSocket):
-#         self.websockets.append(ws)
-#
-#     def on_publish(self, peer, sender, bus, topic, headers, message):
-#         for ws in self.websockets:
-#             if not ws.terminated:
-#                 try:
-#                     ws.send(message)
-#                 except Exception as e:
-#                     _log.warning(f'Error sending subscription data: {e}')
-#
-#     def remove(self, ):
-#         pass
+    def client_closed(self, ws, topic, access_token):
+        _log.debug(f'VUIPubsubManager: Websocket for {topic} closed')
+        group = self.subscription_groups.get(topic)
+        if group is not None and group.remove(ws):
+            # Nobody is listening anymore, drop the bus subscription.
+            group.close()
+            del self.subscription_groups[topic]
+        if self.user_websockets[access_token].get(topic) is ws:
+            del self.user_websockets[access_token][topic]
+
+
+class ClientQueue:
+    """
+    Messages waiting to be sent to one websocket.
+
+    Each client is sent its messages from its own greenlet so that a slow
+    client does not hold up the others. At most size messages wait for a
+    client, when it falls further behind the oldest are dropped so that it
+    still receives the latest values.
+    """
+    def __init__(self, ws, size=DEFAULT_QUEUE_SIZE):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.ws = ws
+        self.dropped = 0
+        self._queue = deque(maxlen=size)
+        self._ready = Event()
+        self._sender = gevent.spawn(self._send_loop)
+
+    def put(self, payload):
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(payload)
+        self._ready.set()
+
+    def close(self):
+        if self.dropped:
+            _log.debug(f'Dropped {self.dropped} messages for slow websocket {self.ws}')
+        self._sender.kill(block=False)
+
+    def _send_loop(self):
+        while not self.ws.terminated:
+            self._ready.wait()
+            self._ready.clear()
+            while self._queue and not self.ws.terminated:
+                try:
+                    self.ws.send(self._queue.popleft())
+                except Exception as e:
+                    _log.warning(f'Error sending subscription data: {e}')
+
+
+class SubscriptionGroup:
+    """
+    One bus subscription to a topic shared by all of the websockets watching it.
+
+    Every message is JSON encoded once and queued for each websocket. With a
+    max_rate the messages are sent at most max_rate times a second, only the
+    latest message of each topic received in between is sent.
+    """
+    def __init__(self, pubsub, topic, max_rate=None, queue_size=DEFAULT_QUEUE_SIZE):
+        self.pubsub = pubsub
+        self.topic = topic
+        self.queue_size = queue_size
+        self.clients = {}
+        self._interval = 1.0 / max_rate if max_rate else 0
+        self._last_flush = None
+        self._pending = OrderedDict()
+        self._flush_timer = None
+        self.pubsub.subscribe('pubsub', topic, self.on_publish)
+
+    def add(self, ws):
+        if ws not in self.clients:
+            self.clients[ws] = ClientQueue(ws, self.queue_size)
+
+    def remove(self, ws):
+        """Remove a websocket from the group, returns True when the group is empty."""
+        client = self.clients.pop(ws, None)
+        if client is not None:
+            client.close()
+        return not self.clients
+
+    def close(self):
+        self.pubsub.unsubscribe('pubsub', self.topic, self.on_publish)
+        if self._flush_timer is not None:
+            self._flush_timer.kill(block=False)
+            self._flush_timer = None
+        for client in self.clients.values():
+            client.close()
+        self.clients.clear()
+
+    def on_publish(self, peer, sender, bus, topic, headers, message):
+        payload = json.dumps(message)
+        if not self._interval:
+            self._broadcast(payload)
+            return
+        self._pending.pop(topic, None)
+        self._pending[topic] = payload
+        if self._flush_timer is None:
+            wait = self._last_flush + self._interval - monotonic() if self._last_flush is not None else 0
+            if wait <= 0:
+                self._flush()
+            else:
+                self._flush_timer = gevent.spawn_later(wait, self._flush)
+
+    def _flush(self):
+        self._flush_timer = None
+        self._last_flush = monotonic()
+        pending, self._pending = self._pending, OrderedDict()
+        for payload in pending.values():
+            self._broadcast(payload)
+
+    def _broadcast(self, payload):
+        for ws, client in list(self.clients.items()):
+            if ws.terminated:
+                self.remove(ws)
+            else:
+                client.put(payload)
 
 
 class VUIWebSocket(WebSocket):
@@ -126,18 +223,7 @@ class VUIWebSocket(WebSocket):
         pass
 
     def closed(self, code, reason="A client left the room without a proper explanation."):
-        # _log.info('Socket closed!')
-        # app = self.environ.pop('ws4py.app')
-        # identity, endpoint = self._get_identity_and_endpoint()
-        # app.client_closed(self, endpoint, identity, reason)
-        pass
-
-    def on_topic(self, peer, sender, bus, topic, headers, message):
-        _log.debug('VUIWebSocket: in _on_topic')
-        _log.debug(f'topic is: {topic}')
-        _log.debug(f'message is: {message}')
-        if not self.terminated:
-            try:
-                self.send(json.dumps(message))
-            except Exception as e:
-                _log.warning(f'Error sending subscription data: {e}')
+        _log.info('Socket closed')
+        app = self.environ['ws4py.app']
+        topic, access_token = self._get_topic()
+        app.client_closed(self, topic, access_token)
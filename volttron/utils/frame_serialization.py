@@ -51,41 +51,128 @@ _log = logging.getLogger(__name__)
 ENCODE_FORMAT = 'ISO-8859-1'
 
 
+# Number of leading frames needed to route a message:
+#   [SENDER, RECIPIENT, PROTO, USER_ID, MSG_ID, SUBSYS]
+ENVELOPE_FRAMES = 6
+
+
+def _deserialize_frame(x: Any) -> Any:
+    if isinstance(x, list):
+        return deserialize_frames(x)
+    elif isinstance(x, (int, float, str)):
+        return x
+    elif isinstance(x, bytes):
+        return x.decode(ENCODE_FORMAT)
+    if x == {}:
+        return x
+    try:
+        d = x.bytes.decode(ENCODE_FORMAT)
+    except UnicodeDecodeError as e:
+        _log.error(f"Unicode decode error: {e}")
+        return x
+    try:
+        return jsonapi.loads(d)
+    except JSONDecodeError:
+        return d
+
+
 def deserialize_frames(frames: List[Frame]) -> List:
     decoded = []
 
     for x in frames:
-        if isinstance(x, list):
-            decoded.append(deserialize_frames(x))
-        elif isinstance(x, int):
-            decoded.append(x)
-        elif isinstance(x, float):
-            decoded.append(x)
-        elif isinstance(x, bytes):
-            decoded.append(x.decode(ENCODE_FORMAT))
-        elif isinstance(x, str):
-            decoded.append(x)
-        elif x is not None:
-            # _log.debug(f'x is {x}')
-            if x == {}:
-                decoded.append(x)
-                continue
-            try:
-                d = x.bytes.decode(ENCODE_FORMAT)
-            except UnicodeDecodeError as e:
-                _log.error(f"Unicode decode error: {e}")
-                decoded.append(x)
-                continue
-            try:
-                decoded.append(jsonapi.loads(d))
-            except JSONDecodeError:
-                decoded.append(d)
+        if x is not None:
+            decoded.append(_deserialize_frame(x))
     return decoded
 
 
+class _PendingFrame:
+    """A received frame that has not been decoded yet."""
+    __slots__ = ('frame',)
+
+    def __init__(self, frame: Frame):
+        self.frame = frame
+
+
+class LazyFrames(list):
+    """
+    List of received frames that only decodes the frames that are used.
+
+    The envelope frames are decoded right away because every message is routed
+    on them. The payload frames are decoded on first access. Payload frames that
+    are never accessed are passed to serialize_frames as the original zmq frames,
+    so messages forwarded peer to peer are never decoded and encoded again.
+    """
+
+    def __init__(self, frames: List[Frame], eager: int = ENVELOPE_FRAMES):
+        super().__init__(deserialize_frames(frames[:eager]))
+        list.extend(self, (_PendingFrame(x) for x in frames[eager:] if x is not None))
+
+    def _decode(self, index: int) -> Any:
+        x = list.__getitem__(self, index)
+        if isinstance(x, _PendingFrame):
+            x = _deserialize_frame(x.frame)
+            list.__setitem__(self, index, x)
+        return x
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._decode(i) for i in range(*index.indices(len(self)))]
+        return self._decode(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._decode(i)
+
+    def __reversed__(self):
+        for i in reversed(range(len(self))):
+            yield self._decode(i)
+
+    def __contains__(self, value):
+        return any(x == value for x in self)
+
+    def __eq__(self, other):
+        return list(self) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def copy(self):
+        return list(self)
+
+    def pop(self, index: int = -1) -> Any:
+        x = self._decode(index)
+        list.pop(self, index)
+        return x
+
+    def index(self, value, *args):
+        return list(self).index(value, *args)
+
+    def count(self, value):
+        return list(self).count(value)
+
+    def raw(self) -> List:
+        """
+        Return the frames with every payload frame that was not decoded yet as
+        the received zmq frame.
+        """
+        return [x.frame if isinstance(x, _PendingFrame) else x for x in list.__iter__(self)]
+
+
 def serialize_frames(data: List[Any]) -> List[Frame]:
     frames = []
 
+    if isinstance(data, LazyFrames):
+        data = data.raw()
+
     for x in data:
         try:
             if isinstance(x, list) or isinstance(x, dict):
@@ -1,6 +1,7 @@
 # Module copied from
 # http://code.activestate.com/recipes/576642-persistent-dict-with-multiple-standard-file-format/
 import csv
+import hashlib
 import os
 import shutil
 import logging
@@ -8,12 +9,21 @@ import pickle
 
 from volttron.platform import jsonapi
 
-from threading import Thread
-from queue import Queue
+from gevent.monkey import get_original
+
+# The writes happen in a native thread, use native primitives even when the
+# queue or threading modules are patched by gevent.
+Event, Thread = get_original('threading', ['Event', 'Thread'])
+Queue = get_original('queue', 'Queue')
 from copy import deepcopy
+from collections import OrderedDict
 
 _log = logging.getLogger(__name__)
 
+# A journal is compacted into the file once it holds more entries than the
+# dict, but not before it holds this many.
+JOURNAL_COMPACT_MIN = 1000
+
 
 def load_create_store(filename):
     persist = PersistentDict(filename=filename, flag='c', format='json')
@@ -32,21 +42,51 @@ class PersistentDict(dict):
     Output file format is selectable between pickle, json, and csv.
     All three serialization formats are backed by fast C implementations.
 
+    With journal=True (json format only) async_sync does not rewrite the file
+    but appends the entries that changed since the last sync to a journal next
+    to it. The journal is replayed on load and compacted into the file once it
+    grows larger than the dict, so the file remains a plain json export of the
+    dict. Values must be replaced rather than modified in place for their
+    changes to be journaled.
+
+    A compaction moves the rewritten file into place before it removes the
+    journal. The first line of a journal holds the digest of the file it was
+    written against, so a journal left behind by a crash between the two steps
+    is not replayed over the newer file.
     """
 
     _event_queue = Queue()
     _process_thread = None
 
     def __init__(self, filename, flag='c', mode=None,
-                 format='pickle', *args, **kwds):
+                 format='pickle', journal=False, *args, **kwds):
+        if journal and format != 'json':
+            raise ValueError('Only the json format supports a journal')
         self.flag = flag                    # r=readonly, c=create, or n=new
         self.mode = mode                    # None or an octal triple like 0644
         self.format = format                # 'csv', 'json', or 'pickle'
         self.filename = filename
-        if flag != 'n' and os.access(filename, os.R_OK):
+        self.journal = journal
+        self.journal_filename = filename + '.journal'
+        self._journal_size = 0
+        self._dirty = set()
+        self._cleared = False
+        # Journal entries are only written once the file exists, so the file can be found without its journal.
+        self._file_written = flag != 'n' and os.access(filename, os.R_OK)
+        if self._file_written:
             fileobj = open(filename, 'rb' if format == 'pickle' else 'r')
             with fileobj:
                 self._load(fileobj)
+        if journal and os.access(self.journal_filename, os.R_OK):
+            if flag == 'n':
+                os.remove(self.journal_filename)
+            else:
+                digest = PersistentDict._file_digest(filename) if self._file_written else None
+                with open(self.journal_filename, 'r') as fileobj:
+                    replayed = self._replay(fileobj, digest)
+                if not replayed and flag != 'r':
+                    os.remove(self.journal_filename)
+        self._dirty.clear()
 
         if PersistentDict._process_thread is None:
             PersistentDict._process_thread = Thread(target=PersistentDict._process_loop)
@@ -58,23 +98,106 @@ class PersistentDict(dict):
     @staticmethod
     def _process_loop():
         while True:
-            filename, contents, format, mode = PersistentDict._event_queue.get()
-
-            PersistentDict._update_file(filename, contents, format, mode)
+            events = [PersistentDict._event_queue.get()]
+            while not PersistentDict._event_queue.empty():
+                events.append(PersistentDict._event_queue.get())
+            try:
+                PersistentDict._process_events(events)
+            except Exception:
+                _log.exception("Unable to write queued changes to disk")
+                # Do not leave sync() waiting on a flush the failed batch did not reach.
+                for filename, contents, format, mode in events:
+                    if format == 'flush':
+                        contents.set()
 
+    @staticmethod
+    def _process_events(events):
+        """
+        Write a batch of queued events, coalescing the writes to each file.
+
+        Journal entries queued for a file are appended with one write. They
+        are dropped when a later rewrite of the file already contains them.
+        """
+        entries = OrderedDict()
+        for filename, contents, format, mode in events:
+            if format == 'journal':
+                entries.setdefault(filename, []).extend(contents)
+            elif format == 'flush':
+                PersistentDict._append_journals(entries)
+                entries.clear()
+                contents.set()
+            else:
+                pending = entries.pop(filename + '.journal', None)
+                if not PersistentDict._update_file(filename, contents, format, mode) and pending:
+                    # The file was not rewritten, the entries still have to be journaled.
+                    entries[filename + '.journal'] = pending
+        PersistentDict._append_journals(entries)
 
     def sync(self):
         """ Write dict to disk """
         if self.flag == 'r':
             return
+        if self.journal:
+            # Write through the worker thread, journal entries it has not
+            # written yet must not be appended after the file is rewritten.
+            self._queue_rewrite()
+            PersistentDict.wait_for_writes()
+            return
         PersistentDict._update_file(self.filename, self, self.format, self.mode)
 
+    @staticmethod
+    def wait_for_writes():
+        """Wait until the worker thread has written everything queued so far."""
+        done = Event()
+        PersistentDict._event_queue.put((None, done, 'flush', None))
+        done.wait()
+
     def async_sync(self):
         """Write dict to disk via worker thread. Don't mix with sync if it can be helped"""
         if self.flag == 'r':
             return
+        if self.journal and self._file_written and not self._cleared and \
+                self._journal_size + len(self._dirty) <= max(JOURNAL_COMPACT_MIN, len(self)):
+            lines = [self._journal_line(key) for key in self._dirty]
+            self._dirty.clear()
+            if lines:
+                self._journal_size += len(lines)
+                PersistentDict._event_queue.put((self.journal_filename, lines, 'journal', self.mode))
+            return
+        self._queue_rewrite()
+
+    def _queue_rewrite(self):
+        self._dirty.clear()
+        self._cleared = False
+        self._journal_size = 0
+        self._file_written = bool(self)
         PersistentDict._event_queue.put((self.filename, deepcopy(self), self.format, self.mode))
 
+    def _journal_line(self, key):
+        if key in self:
+            entry = {'key': key, 'value': self[key]}
+        else:
+            entry = {'key': key, 'deleted': True}
+        return jsonapi.dumps(entry) + '\n'
+
+    @staticmethod
+    def _append_journals(entries):
+        for filename, lines in entries.items():
+            try:
+                with open(filename, 'a') as fileobj:
+                    if fileobj.tell() == 0:
+                        # Name the file the entries apply to, see _replay.
+                        digest = PersistentDict._file_digest(filename[:-len('.journal')])
+                        fileobj.write(jsonapi.dumps({'file_digest': digest}) + '\n')
+                    fileobj.write(''.join(lines))
+            except OSError as e:
+                _log.error("Unable to append to journal {}: {}".format(filename, e))
+
+    @staticmethod
+    def _file_digest(filename):
+        with open(filename, 'rb') as fileobj:
+            return hashlib.sha256(fileobj.read()).hexdigest()
+
     @staticmethod
     def _update_file(filename, contents, format, mode):
         #If we are empty delete the store if it exists.
@@ -83,20 +206,27 @@ class PersistentDict(dict):
                 os.remove(filename)
             except OSError:
                 pass
-            return
-
-        tempname = filename + '.tmp'
-        fileobj = open(tempname, 'wb' if format == 'pickle' else 'w')
+        else:
+            tempname = filename + '.tmp'
+            fileobj = open(tempname, 'wb' if format == 'pickle' else 'w')
+            try:
+                with fileobj:
+                    PersistentDict._dump(fileobj, contents, format)
+            except Exception:
+                # Keep the current file and its journal.
+                os.remove(tempname)
+                _log.exception("Unable to sync to file {}".format(filename))
+                return False
+            shutil.move(tempname, filename)  # atomic commit
+            if mode is not None:
+                os.chmod(filename, mode)
+        # The journal is only removed once the rewritten file, which contains
+        # everything in it, is in place.
         try:
-            PersistentDict._dump(fileobj, contents, format)
-        except Exception:
-            os.remove(tempname)
-            _log.error("Unable to sync to file {}".format(filename))
-        finally:
-            fileobj.close()
-        shutil.move(tempname, filename)  # atomic commit
-        if mode is not None:
-            os.chmod(filename, mode)
+            os.remove(filename + '.journal')
+        except OSError:
+            pass
+        return True
 
 
     def close(self):
@@ -119,6 +249,62 @@ class PersistentDict(dict):
         else:
             raise NotImplementedError('Unknown format: ' + repr(self.format))
 
+    def _replay(self, fileobj, digest):
+        """
+        Apply the journal entries to the dict. Returns False without applying
+        any entry if the journal was written against another version of the
+        file than the one loaded.
+        """
+        for line in fileobj:
+            try:
+                entry = jsonapi.loads(line)
+            except ValueError:
+                # The last entry is incomplete if the platform stopped while writing it.
+                _log.warning("Ignoring unreadable entry in journal {}".format(self.journal_filename))
+                continue
+            if 'file_digest' in entry:
+                if entry['file_digest'] != digest:
+                    # The file was rewritten but the journal was not removed.
+                    _log.warning("Ignoring journal {} older than its file".format(self.journal_filename))
+                    return False
+                continue
+            if entry.get('deleted'):
+                dict.pop(self, entry['key'], None)
+            else:
+                dict.__setitem__(self, entry['key'], entry['value'])
+            self._journal_size += 1
+        return True
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._dirty.add(key)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._dirty.add(key)
+
+    def pop(self, key, *default):
+        self._dirty.add(key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self._dirty.add(key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        self._dirty.add(key)
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **kwds):
+        for key, value in dict(*args, **kwds).items():
+            self[key] = value
+
+    def clear(self):
+        dict.clear(self)
+        self._dirty.clear()
+        self._cleared = True
+
     def _load(self, fileobj):
         # try formats from most restrictive to least restrictive
         for loader in (pickle.load, jsonapi.load, csv.reader):
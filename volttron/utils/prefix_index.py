@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*- {{{
+# vim: set fenc=utf-8 ft=python sw=4 ts=4 sts=4 et:
+#
+# Copyright 2020, Battelle Memorial Institute.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This material was prepared as an account of work sponsored by an agency of
+# the United States Government. Neither the United States Government nor the
+# United States Department of Energy, nor Battelle, nor any of their
+# employees, nor any jurisdiction or organization that has cooperated in the
+# development of these materials, makes any warranty, express or
+# implied, or assumes any legal liability or responsibility for the accuracy,
+# completeness, or usefulness or any information, apparatus, product,
+# software, or process disclosed, or represents that its use would not infringe
+# privately owned rights. Reference herein to any specific commercial product,
+# process, or service by trade name, trademark, manufacturer, or otherwise
+# does not necessarily constitute or imply its endorsement, recommendation, or
+# favoring by the United States Government or any agency thereof, or
+# Battelle Memorial Institute. The views and opinions of authors expressed
+# herein do not necessarily state or reflect those of the
+# United States Government or any agency thereof.
+#
+# PACIFIC NORTHWEST NATIONAL LABORATORY operated by
+# BATTELLE for the UNITED STATES DEPARTMENT OF ENERGY
+# under Contract DE-AC05-76RL01830
+# }}}
+
+from collections.abc import MutableMapping
+
+
+class _Node:
+    __slots__ = ('children', 'partials', 'lengths')
+
+    def __init__(self):
+        # Full topic segment -> child node
+        self.children = {}
+        # Trailing (partial) segment of a prefix -> the full prefix
+        self.partials = {}
+        # Length of partial segment -> number of partials with that length
+        self.lengths = {}
+
+
+class TopicPrefixIndex(MutableMapping):
+    """
+    A mapping of subscription prefixes to values that can quickly find every
+    prefix a topic starts with.
+
+    Prefixes are stored in a tree keyed on the '/' separated segments of the
+    prefix.  The last (possibly partial) segment of a prefix is kept on the
+    node it hangs from and is looked up by slicing the topic segment to each
+    distinct partial length at that node.  Matching a topic therefore costs
+    a few dictionary lookups per topic segment instead of a ``startswith``
+    for every subscription.
+
+    Matching uses plain string prefix semantics, exactly like
+    ``topic.startswith(prefix)``, so 'devices/camp' matches
+    'devices/campus/building'.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._prefixes = {}
+        self._root = _Node()
+        self.update(*args, **kwargs)
+
+    def __getitem__(self, prefix):
+        return self._prefixes[prefix]
+
+    def __setitem__(self, prefix, value):
+        if prefix not in self._prefixes:
+            segments = prefix.split('/')
+            node = self._root
+            for segment in segments[:-1]:
+                try:
+                    node = node.children[segment]
+                except KeyError:
+                    child = _Node()
+                    node.children[segment] = child
+                    node = child
+            partial = segments[-1]
+            node.partials[partial] = prefix
+            length = len(partial)
+            node.lengths[length] = node.lengths.get(length, 0) + 1
+        self._prefixes[prefix] = value
+
+    def __delitem__(self, prefix):
+        del self._prefixes[prefix]
+        segments = prefix.split('/')
+        path = [self._root]
+        for segment in segments[:-1]:
+            path.append(path[-1].children[segment])
+        node = path[-1]
+        partial = segments[-1]
+        del node.partials[partial]
+        length = len(partial)
+        count = node.lengths[length] - 1
+        if count:
+            node.lengths[length] = count
+        else:
+            del node.lengths[length]
+        # Prune nodes that no longer lead to any prefix.
+        for depth in range(len(segments) - 1, 0, -1):
+            node = path[depth]
+            if node.partials or node.children:
+                break
+            del path[depth - 1].children[segments[depth - 1]]
+
+    def __iter__(self):
+        return iter(self._prefixes)
+
+    def __len__(self):
+        return len(self._prefixes)
+
+    def __contains__(self, prefix):
+        return prefix in self._prefixes
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self._prefixes)
+
+    def match(self, topic):
+        """
+        Yield a (prefix, value) tuple for every stored prefix that the topic
+        starts with.
+
+        :param topic: topic to match against the stored prefixes
+        :type topic: str
+        """
+        prefixes = self._prefixes
+        node = self._root
+        segments = topic.split('/')
+        last = len(segments) - 1
+        for depth, segment in enumerate(segments):
+            if node.partials:
+                size = len(segment)
+                for length in node.lengths:
+                    if length <= size:
+                        prefix = node.partials.get(segment[:length])
+                        if prefix is not None:
+                            yield prefix, prefixes[prefix]
+            if depth == last:
+                break
+            node = node.children.get(segment)
+            if node is None:
+                break
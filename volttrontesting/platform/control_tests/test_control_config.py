@@ -0,0 +1,49 @@
+import tarfile
+import zipfile
+
+import pytest
+
+from volttron.platform.control.control_config import read_config_files
+
+FILES = {"devices/campus/building/device1": '{"registry_config": "config://registry_configs/device.csv"}',
+         "devices/campus/building/device2": '{"registry_config": "config://registry_configs/device.csv"}',
+         "registry_configs/device.csv": "Volttron Point Name,Units\nTemperature,F\n"}
+
+EXPECTED = [["devices/campus/building/device1", FILES["devices/campus/building/device1"], "json"],
+            ["devices/campus/building/device2", FILES["devices/campus/building/device2"], "json"],
+            ["registry_configs/device.csv", FILES["registry_configs/device.csv"], "csv"]]
+
+
+@pytest.fixture()
+def config_dir(tmp_path):
+    root = tmp_path / "configs"
+    for name, contents in FILES.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(contents)
+    return root
+
+
+def test_read_config_directory(config_dir):
+    assert read_config_files(str(config_dir), "/", "json") == EXPECTED
+
+
+def test_read_config_directory_with_prefix(config_dir):
+    configs = read_config_files(str(config_dir / "devices"), "devices", "raw")
+    assert [c[0] for c in configs] == ["devices/campus/building/device1", "devices/campus/building/device2"]
+    assert all(c[2] == "raw" for c in configs)
+
+
+def test_read_config_tar(config_dir, tmp_path):
+    path = str(tmp_path / "configs.tar.gz")
+    with tarfile.open(path, "w:gz") as archive:
+        archive.add(str(config_dir), arcname=".")
+    assert sorted(read_config_files(path, "/", "json")) == EXPECTED
+
+
+def test_read_config_zip(config_dir, tmp_path):
+    path = str(tmp_path / "configs.zip")
+    with zipfile.ZipFile(path, "w") as archive:
+        for name in FILES:
+            archive.write(str(config_dir / name), name)
+    assert sorted(read_config_files(path, "/", "json")) == EXPECTED
@@ -1,3 +1,4 @@
+import json
 import os
 import pytest
 from pathlib import Path
@@ -183,6 +184,74 @@ def test_get_outstanding_to_publish_should_return_unique_records_on_multiple_tra
     assert backup_database.get_outstanding_to_publish(SIZE_LIMIT) == []
 
 
+def test_get_outstanding_to_publish_should_reread_failed_records(
+    backup_database, new_publish_list_unique
+):
+    init_db(backup_database, new_publish_list_unique[:10])
+
+    first = backup_database.get_outstanding_to_publish(4)
+    assert [r["_id"] for r in first] == [1, 2, 3, 4]
+    # Only the first two records were published.
+    backup_database.remove_successfully_published({1, 2}, 4)
+
+    second = backup_database.get_outstanding_to_publish(4)
+    assert [r["_id"] for r in second] == [3, 4, 5, 6]
+    backup_database.remove_successfully_published({3, 4, 6}, 4)
+
+    third = backup_database.get_outstanding_to_publish(4)
+    assert [r["_id"] for r in third] == [5, 7, 8, 9]
+    backup_database.remove_successfully_published(set((None,)), 4)
+
+    fourth = backup_database.get_outstanding_to_publish(4)
+    assert [r["_id"] for r in fourth] == [10]
+    backup_database.remove_successfully_published(set((None,)), 4)
+
+    assert backup_database.get_outstanding_to_publish(4) == []
+    assert get_all_data("outstanding") == []
+    assert backup_database.get_backlog_count() == 0
+
+
+def test_remove_successfully_published_should_remove_only_fetched_key_range(backup_database):
+    # Late data is cached after newer data so id order differs from timestamp order.
+    records = [
+        {"source": "src", "topic": "topic_a", "meta": {}, "readings": [("2020-06-01 12:32:00", 1)], "headers": {}},
+        {"source": "src", "topic": "topic_b", "meta": {}, "readings": [("2020-06-01 12:33:00", 2)], "headers": {}},
+        {"source": "src", "topic": "topic_c", "meta": {}, "readings": [("2020-06-01 12:30:00", 3)], "headers": {}},
+        {"source": "src", "topic": "topic_d", "meta": {}, "readings": [("2020-06-01 12:31:00", 4)], "headers": {}},
+    ]
+    backup_database.backup_new_data(records)
+
+    published = backup_database.get_outstanding_to_publish(2)
+    assert [r["value"] for r in published] == [3, 4]
+    backup_database.remove_successfully_published(set((None,)), 2)
+
+    assert get_all_data("outstanding") == [
+        "1|2020-06-01 12:32:00|src|1|1|{}",
+        "2|2020-06-01 12:33:00|src|2|2|{}",
+    ]
+    assert backup_database.get_backlog_count() == 2
+
+
+def test_get_outstanding_to_publish_raw_should_not_decode(backup_database):
+    records = [{"source": "src", "topic": "topic_a", "meta": {"units": "F"},
+                "readings": [("2020-06-01 12:32:00", {"a": [1, 2]})], "headers": {"Date": "now"}}]
+    backup_database.backup_new_data(records)
+
+    published = backup_database.get_outstanding_to_publish(SIZE_LIMIT, raw=True)
+    assert len(published) == 1
+    record = published[0]
+    assert "value" not in record and "headers" not in record
+    assert json.loads(record.pop("value_string")) == {"a": [1, 2]}
+    assert json.loads(record.pop("header_string")) == {"Date": "now"}
+    assert record == {
+        "_id": 1,
+        "timestamp": datetime(2020, 6, 1, 12, 32, tzinfo=UTC),
+        "source": "src",
+        "topic": "topic_a",
+        "meta": {"units": "F"},
+    }
+
+
 def init_db_with_dupes(backup_database, new_publish_list_dupes):
     backup_database.backup_new_data(new_publish_list_dupes)
 
@@ -136,6 +136,9 @@ def test_setup_aggregate_historian_tables_should_create_aggregate_tables(get_con
         assert sqlfuncts.meta_table == META_TABLE
 
 
+# The query tests run the single statement multi-topic query against a PostgreSQL container. Like the rest of this
+# module they are skipped when psycopg2 or docker is not available, and there is no test of PostgreSqlFuncts.query
+# that runs without them.
 @pytest.mark.parametrize(
     "topic_ids, id_name_map, expected_values",
     [
@@ -145,6 +148,11 @@ def test_setup_aggregate_historian_tables_should_create_aggregate_tables(get_con
             {43: "topic43"},
             {"topic43": [("2020-06-01T12:30:59.000000+00:00", [2, 3])]},
         ),
+        (
+            [42, 43],
+            {42: "topic42", 43: "topic43"},
+            {"topic42": [], "topic43": [("2020-06-01T12:30:59.000000+00:00", [2, 3])]},
+        ),
     ],
 )
 def test_query_should_return_data(get_container_func, topic_ids, id_name_map, expected_values):
@@ -158,6 +166,21 @@ def test_query_should_return_data(get_container_func, topic_ids, id_name_map, ex
     assert actual_values == expected_values
 
 
+def test_query_should_apply_skip_and_count_per_topic(get_container_func):
+    container, sqlfuncts, connection_port, historian_version = get_container_func
+
+    query = f"""
+                INSERT INTO {DATA_TABLE} VALUES
+                ('2020-06-01 12:30:00', 42, '1'), ('2020-06-01 12:31:00', 42, '2'), ('2020-06-01 12:32:00', 42, '3'),
+                ('2020-06-01 12:30:00', 43, '4'), ('2020-06-01 12:31:00', 43, '5')
+            """
+    seed_database(container, query)
+    actual_values = sqlfuncts.query([42, 43], {42: "topic42", 43: "topic43"}, skip=1, count=1,
+                                    order="LAST_TO_FIRST")
+    assert actual_values == {"topic42": [("2020-06-01T12:31:00.000000+00:00", 2)],
+                             "topic43": [("2020-06-01T12:30:00.000000+00:00", 4)]}
+
+
 def test_insert_topic_should_return_topic_id(get_container_func):
     container, sqlfuncts, connection_port, historian_version = get_container_func
 
@@ -77,6 +77,69 @@ def test_query(get_sqlitefuncts, topic_ids, id_name_map, expected_values):
     assert actual_results == expected_values
 
 
+@pytest.mark.sqlitefuncts
+@pytest.mark.dbutils
+@pytest.mark.parametrize("window_functions", [True, False])
+@pytest.mark.parametrize(
+    "skip, count, order, expected_values",
+    [
+        (0, None, "FIRST_TO_LAST",
+         {"topic44": [("2020-06-01T12:30:00.000000", 1), ("2020-06-01T12:31:00.000000", 2),
+                      ("2020-06-01T12:32:00.000000", 3)],
+          "topic42": [],
+          "topic43": [("2020-06-01T12:30:00.000000", 10), ("2020-06-01T12:31:00.000000", 20)]}),
+        (0, 1, "FIRST_TO_LAST",
+         {"topic44": [("2020-06-01T12:30:00.000000", 1)],
+          "topic42": [],
+          "topic43": [("2020-06-01T12:30:00.000000", 10)]}),
+        (1, 1, "LAST_TO_FIRST",
+         {"topic44": [("2020-06-01T12:31:00.000000", 2)],
+          "topic42": [],
+          "topic43": [("2020-06-01T12:30:00.000000", 10)]}),
+        (1, None, "FIRST_TO_LAST",
+         {"topic44": [("2020-06-01T12:31:00.000000", 2), ("2020-06-01T12:32:00.000000", 3)],
+          "topic42": [],
+          "topic43": [("2020-06-01T12:31:00.000000", 20)]}),
+    ],
+)
+def test_query_multiple_topics_should_apply_skip_and_count_per_topic(get_sqlitefuncts, monkeypatch, window_functions,
+                                                                       skip, count, order, expected_values):
+    sqlitefuncts, historain_version = get_sqlitefuncts
+    monkeypatch.setattr(sqlitefuncts, "WINDOW_FUNCTIONS", window_functions)
+    query = (
+        "INSERT OR REPLACE INTO data VALUES('2020-06-01 12:30:00',44,'1');"
+        "INSERT OR REPLACE INTO data VALUES('2020-06-01 12:31:00',44,'2');"
+        "INSERT OR REPLACE INTO data VALUES('2020-06-01 12:32:00',44,'3');"
+        "INSERT OR REPLACE INTO data VALUES('2020-06-01 12:30:00',43,'10');"
+        "INSERT OR REPLACE INTO data VALUES('2020-06-01 12:31:00',43,'20');"
+    )
+    query_db(query)
+    id_name_map = {44: "topic44", 42: "topic42", 43: "topic43"}
+
+    actual_results = sqlitefuncts.query([44, 42, 43], id_name_map, skip=skip, count=count, order=order)
+
+    assert actual_results == expected_values
+    # results keep the order of the requested topics
+    assert list(actual_results) == ["topic44", "topic42", "topic43"]
+
+
+@pytest.mark.sqlitefuncts
+@pytest.mark.dbutils
+def test_query_should_return_data_in_topic_batches(get_sqlitefuncts, monkeypatch):
+    sqlitefuncts, historain_version = get_sqlitefuncts
+    monkeypatch.setattr(sqlitefuncts, "MAX_QUERY_TOPICS", 1)
+    query = (
+        "INSERT OR REPLACE INTO data VALUES('2020-06-01 12:30:59',43,'[2,3]');"
+        "INSERT OR REPLACE INTO data VALUES('2020-06-01 12:30:59',44,'{\"a\": 1}');"
+    )
+    query_db(query)
+
+    actual_results = sqlitefuncts.query([43, 44], {43: "topic43", 44: "topic44"})
+
+    assert actual_results == {"topic43": [("2020-06-01T12:30:59.000000", [2, 3])],
+                              "topic44": [("2020-06-01T12:30:59.000000", {"a": 1})]}
+
+
 @pytest.mark.sqlitefuncts
 @pytest.mark.dbutils
 @pytest.mark.parametrize(
@@ -144,6 +207,43 @@ def test_insert_data(get_sqlitefuncts):
     assert get_all_data(DATA_TABLE) == expected_data
 
 
+@pytest.mark.sqlitefuncts
+@pytest.mark.dbutils
+def test_bulk_insert_should_execute_in_chunks(get_sqlitefuncts, monkeypatch):
+    sqlitefuncts, historain_version = get_sqlitefuncts
+    sqlitefuncts.bulk_insert_chunk_size = 2
+    chunks = []
+    execute_many = sqlitefuncts.execute_many
+
+    def counting_execute_many(stmt, args, commit=False):
+        chunks.append(len(args))
+        return execute_many(stmt, args, commit=commit)
+
+    monkeypatch.setattr(sqlitefuncts, "execute_many", counting_execute_many)
+
+    with sqlitefuncts.bulk_insert() as insert_data:
+        for n in range(5):
+            assert insert_data(f"2001-09-11 08:4{n}:00", 11, n) is True
+    sqlitefuncts.commit()
+
+    assert chunks == [2, 2, 1]
+    assert get_all_data(DATA_TABLE) == [f'2001-09-11 08:4{n}:00|11|{n}' for n in range(5)]
+
+
+@pytest.mark.sqlitefuncts
+@pytest.mark.dbutils
+def test_bulk_insert_should_not_write_on_error(get_sqlitefuncts):
+    sqlitefuncts, historain_version = get_sqlitefuncts
+
+    with pytest.raises(RuntimeError):
+        with sqlitefuncts.bulk_insert() as insert_data:
+            insert_data("2001-09-11 08:46:00", 11, "1wtc")
+            raise RuntimeError("publish failed")
+    sqlitefuncts.commit()
+
+    assert get_all_data(DATA_TABLE) == []
+
+
 @pytest.mark.sqlitefuncts
 @pytest.mark.dbutils
 def test_insert_topic(get_sqlitefuncts):
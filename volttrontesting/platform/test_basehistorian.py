@@ -7,7 +7,9 @@ import mock
 from volttron.platform.agent import utils
 from volttron.platform.messaging import headers as header_mod
 from volttron.platform.vip.agent import Agent
-from volttron.platform.agent.base_historian import BaseHistorianAgent, BaseQueryHistorianAgent, BackupDatabase
+from volttron.platform import jsonapi
+from volttron.platform.agent.base_historian import BaseHistorianAgent, BaseQueryHistorianAgent, BackupDatabase, \
+    compress_records, decompress_records
 from volttron.platform.vip.agent.results import AsyncResult
 # need import so that we can mock it.
 from volttron.platform.vip.agent.subsystems.query import Query
@@ -91,6 +93,18 @@ def test_enable_and_disable_cache_only_through_config_store():
     assert not agent.is_cache_only_enabled()
 
 
+@mock.patch(target='volttron.platform.agent.base_historian.Query', new=QueryHelper)
+def test_raw_cache_values_through_config_store():
+    agent = BaseHistorianAgent()
+    assert not agent._raw_cache_values
+
+    agent._configure("config", "UPDATE", dict(raw_cache_values=True))
+    assert agent._raw_cache_values
+
+    agent._configure("config", "UPDATE", dict())
+    assert not agent._raw_cache_values
+
+
 def test_cache_enable():
     with create_vcfg_vhome() as vhome:
         assert os.path.isdir(vhome)
@@ -129,3 +143,23 @@ def test_cache_enable():
         # give a small amount of time so that the queue can get empty
         assert agent.has_published_items()
         assert len(agent.get_publish_list()) == 2
+
+
+def test_insert_compressed():
+    agent = BaseHistorianAgent()
+    agent._capture_device_data = mock.MagicMock()
+    agent._capture_record_data = mock.MagicMock()
+    records = [{"topic": "devices/testcampus/testbuilding/testdevice/all",
+                "headers": {header_mod.DATE: "2021-01-01T00:00:00"},
+                "message": [{"OutsideAirTemperature": 52.5}, {"OutsideAirTemperature": {"units": "F"}}]},
+               {"topic": "record/testcampus", "headers": {}, "message": "hello"}]
+
+    data = compress_records(jsonapi.dumps(records))
+    assert decompress_records(data) == records
+    assert agent.insert_compressed(data) == 2
+    agent._capture_device_data.assert_called_once_with(peer=None, sender=None, bus=None, **records[0])
+    agent._capture_record_data.assert_called_once_with(peer=None, sender=None, bus=None, **records[1])
+
+    agent.no_insert = True
+    with pytest.raises(RuntimeError):
+        agent.insert_compressed(data)
@@ -0,0 +1,121 @@
+import logging
+
+import pytest
+import zmq
+
+from volttron.platform import main
+from volttron.platform.vip.router import INCOMING, OUTGOING
+from volttron.platform.vip.tracking import MessageTracer, peer_name
+from volttron.utils.frame_serialization import LazyFrames, serialize_frames
+
+ADDRESS = 'inproc://test-messagedebug'
+
+
+def _frames(sender, recipient, payload='payload'):
+    return [sender, recipient, 'VIP1', '', 'msgid', 'RPC', payload]
+
+
+@pytest.fixture()
+def debugger():
+    sock = zmq.Context.instance().socket(zmq.SUB)
+    sock.setsockopt_string(zmq.SUBSCRIBE, "")
+    sock.bind(ADDRESS)
+    yield sock
+    sock.close(linger=0)
+
+
+def test_tracer_should_sample_one_in_n():
+    tracer = MessageTracer(ADDRESS, sample_rate=3)
+
+    for n in range(9):
+        tracer.hit(INCOMING, _frames('agent', 'peer', n))
+
+    assert [frames[6] for topic, frames in tracer.buffer] == [2, 5, 8]
+
+
+def test_tracer_should_sample_peers():
+    tracer = MessageTracer(ADDRESS, peers=['historian'])
+
+    tracer.hit(INCOMING, _frames('agent', 'peer'))
+    tracer.hit(INCOMING, _frames('agent', 'historian'))
+    tracer.hit(OUTGOING, serialize_frames(_frames('historian', 'agent')))
+
+    assert [(topic, peer_name(frames[0])) for topic, frames in tracer.buffer] == [(INCOMING, 'agent'),
+                                                                          (OUTGOING, 'historian')]
+
+
+def test_tracer_should_drop_oldest_when_full():
+    tracer = MessageTracer(ADDRESS, buffer_size=2)
+
+    for n in range(5):
+        tracer.hit(INCOMING, _frames('agent', 'peer', n))
+
+    assert [frames[6] for topic, frames in tracer.buffer] == [3, 4]
+    assert tracer.dropped == 3
+
+
+def test_tracer_should_not_decode_lazy_frames():
+    tracer = MessageTracer(ADDRESS)
+    frames = LazyFrames(serialize_frames(_frames('agent', 'peer', dict(method='ping'))))
+
+    tracer.hit(INCOMING, frames)
+    frames[:2] = ['peer', 'agent']
+
+    topic, sampled = tracer.buffer[0]
+    assert sampled[:2] == ['agent', 'peer']
+    assert isinstance(sampled[6], zmq.Frame)
+
+
+def test_tracer_should_publish_buffered_messages(debugger):
+    tracer = MessageTracer(ADDRESS)
+    # Publish until the subscription has reached the publisher.
+    for attempt in range(50):
+        tracer.hit(INCOMING, _frames('agent', 'peer', 'warm up'))
+        tracer.flush()
+        if debugger.poll(100):
+            break
+    while debugger.poll(100):
+        debugger.recv_pyobj()
+
+    tracer.hit(INCOMING, LazyFrames(serialize_frames(_frames('agent', 'peer', dict(method='ping')))))
+    tracer.hit(OUTGOING, serialize_frames(_frames('peer', 'agent')))
+
+    assert tracer.flush() == 2
+    assert tracer.flush() == 0
+
+    assert debugger.poll(1000)
+    assert debugger.recv_pyobj() == [INCOMING, b'agent', b'peer', b'VIP1', b'', b'msgid', b'RPC',
+                                     b'{"method": "ping"}']
+    assert debugger.recv_pyobj() == [OUTGOING, b'peer', b'agent', b'VIP1', b'', b'msgid', b'RPC', b'payload']
+    tracer.close()
+
+
+def test_tracer_should_require_positive_sample_rate():
+    with pytest.raises(ValueError):
+        MessageTracer(ADDRESS, sample_rate=0)
+
+
+def test_router_issue_should_do_nothing_when_disabled(monkeypatch):
+    router = main.Router('ipc://@test-router')
+    router.logger.setLevel(logging.WARNING)
+    formatted = []
+    monkeypatch.setattr(main, "FramesFormatter", formatted.append)
+
+    router.issue(INCOMING, _frames('agent', 'peer'))
+    assert formatted == []
+
+    router.logger.setLevel(logging.DEBUG)
+    router.issue(INCOMING, _frames('agent', 'peer'))
+    assert formatted == [_frames('agent', 'peer')]
+    router.logger.setLevel(logging.NOTSET)
+
+
+def test_router_issue_should_feed_tracer():
+    router = main.Router('ipc://@test-router', msgdebug=True, msgdebug_sample_rate=2)
+    router.logger.setLevel(logging.WARNING)
+
+    for n in range(4):
+        router.issue(INCOMING, _frames('agent', 'peer', n))
+
+    assert [frames[6] for topic, frames in router._tracer.buffer] == [1, 3]
+    router.logger.setLevel(logging.NOTSET)
@@ -0,0 +1,127 @@
+import pytest
+
+from volttron.platform.vip import tracking
+from volttron.platform.vip.router import ERROR, INCOMING, OUTGOING, UNROUTABLE
+from volttron.platform.vip.tracking import LATENCY_BUCKETS, Rate, Tracker
+from volttron.utils.frame_serialization import LazyFrames, serialize_frames
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tracking.time, "monotonic", clock)
+    monkeypatch.setattr(tracking.time, "perf_counter", clock)
+    return clock
+
+
+@pytest.fixture()
+def tracker():
+    tracker = Tracker()
+    tracker.enable()
+    return tracker
+
+
+def _incoming(sender, recipient, msg_id='msgid', subsystem='RPC', payload='{"method": "ping"}'):
+    return LazyFrames(serialize_frames([sender, recipient, 'VIP1', sender, msg_id, subsystem, payload]))
+
+
+def _outgoing(recipient, sender, msg_id='msgid', subsystem='RPC', payload='{"method": "ping"}'):
+    return serialize_frames([recipient, sender, 'VIP1', sender, msg_id, subsystem, payload])
+
+
+def test_tracker_should_count_messages_and_bytes(tracker, clock):
+    tracker.hit(INCOMING, _incoming('agent', 'historian'), None)
+    tracker.hit(OUTGOING, _outgoing('historian', 'agent'), None)
+    tracker.hit(INCOMING, _incoming('agent', '', subsystem='pubsub', payload='publish'), None)
+    tracker.hit(ERROR, _incoming('agent', 'gone'), (113, 'Host unreachable'))
+    tracker.hit(UNROUTABLE, ['probe'], 'router probe')
+
+    stats = tracker.get_stats()
+    assert stats['incoming']['peer'] == {'agent': 2}
+    assert stats['incoming']['subsystem'] == {'RPC': 1, 'pubsub': 1}
+    assert stats['incoming']['bytes'] == {'peer': {'agent': 25}, 'subsystem': {'RPC': 18, 'pubsub': 7}}
+    assert stats['outgoing']['peer'] == {'historian': 1}
+    assert stats['outgoing']['bytes']['peer'] == {'historian': 18}
+    assert stats['error']['error'] == {113: 1}
+    assert stats['unroutable']['error'] == {'router probe': 1}
+
+
+def test_tracker_should_average_rates(tracker, clock):
+    for second in range(60):
+        for n in range(10):
+            tracker.hit(INCOMING, _incoming('agent', 'historian', msg_id=str(n)), None)
+        clock.now += 1
+
+    rates = tracker.get_stats()['rates']['incoming']
+    assert rates['peer']['agent'] == pytest.approx(10.0)
+    assert rates['subsystem']['RPC'] == pytest.approx(10.0)
+
+    clock.now += 600
+    assert tracker.get_stats()['rates']['incoming']['peer']['agent'] < 0.01
+
+
+def test_rate_should_reach_steady_rate():
+    rate = Rate(0.0)
+    for tick in range(1000):
+        rate.mark(tick * 0.1)
+    assert rate.value(100.0) == pytest.approx(10.0, rel=0.05)
+
+
+def test_tracker_should_measure_rpc_latency(tracker, clock):
+    tracker.hit(INCOMING, _incoming('agent', 'historian', msg_id='1'), None)
+    tracker.hit(INCOMING, _incoming('agent', 'historian', msg_id='2'), None)
+    clock.now += 0.003
+    tracker.hit(INCOMING, _incoming('historian', 'agent', msg_id='1'), None)
+    clock.now += 2
+    tracker.hit(INCOMING, _incoming('historian', 'agent', msg_id='2'), None)
+    # A request from the historian is not a response.
+    tracker.hit(INCOMING, _incoming('historian', 'agent', msg_id='3'), None)
+
+    latency = tracker.get_stats()['latency']['rpc']
+    assert list(latency) == ['historian']
+    histogram = latency['historian']
+    assert histogram['count'] == 2
+    assert histogram['counts'][LATENCY_BUCKETS.index(0.005)] == 1
+    assert histogram['counts'][LATENCY_BUCKETS.index(2.5)] == 1
+    assert histogram['max'] == pytest.approx(2.003)
+    assert len(histogram['counts']) == len(histogram['buckets']) == len(LATENCY_BUCKETS) + 1
+
+
+def test_tracker_should_match_numeric_looking_msg_ids(tracker, clock):
+    # Agents send "<counter>.<id>" message ids, which LazyFrames decodes to numbers.
+    tracker.hit(INCOMING, _incoming('agent', 'historian', msg_id='1.140234234'), None)
+    tracker.hit(INCOMING, _incoming('agent', 'historian', msg_id='2'), None)
+    clock.now += 0.003
+    tracker.hit(INCOMING, _incoming('historian', 'agent', msg_id='1.140234234'), None)
+    clock.now += 2
+    tracker.hit(INCOMING, _incoming('historian', 'agent', msg_id='2'), None)
+
+    histogram = tracker.get_stats()['latency']['rpc']['historian']
+    assert histogram['count'] == 2
+    assert histogram['counts'][LATENCY_BUCKETS.index(0.005)] == 1
+    assert histogram['counts'][LATENCY_BUCKETS.index(2.5)] == 1
+    assert not tracker._pending
+
+
+def test_tracker_should_bound_pending_requests(tracker, clock, monkeypatch):
+    monkeypatch.setattr(tracking, "MAX_PENDING_REQUESTS", 10)
+    for n in range(100):
+        tracker.hit(INCOMING, _incoming('agent', 'historian', msg_id=str(n)), None)
+
+    assert len(tracker._pending) == 10
+    tracker.hit(INCOMING, _incoming('historian', 'agent', msg_id='99'), None)
+    assert tracker.get_stats()['latency']['rpc']['historian']['count'] == 1
+
+
+def test_tracker_should_not_count_when_disabled(clock):
+    tracker = Tracker()
+    tracker.hit(INCOMING, _incoming('agent', 'historian'), None)
+    assert tracker.get_stats()['incoming']['peer'] == {}
@@ -1,6 +1,7 @@
 import pytest
 from uuid import UUID
-from volttron.platform.web.topic_tree import TopicNode, TopicTree, DeviceNode, DeviceTree
+from volttron.platform.jsonrpc import MethodNotFound
+from volttron.platform.web.topic_tree import TopicNode, TopicTree, DeviceNode, DeviceTree, DeviceTreeCache
 
 
 TOPIC_LIST = ['Campus/Building1/Fake1/SampleWritableFloat1', 'Campus/Building1/Fake1/SampleBool1',
@@ -240,22 +241,36 @@ def test_devices(nid, expected):
     assert [n.identifier for n in t.devices(nid)] == expected
 
 
-def _mock_rpc_caller(peer, method, agent, file_name=None, raw=False, external_platform=None):
-    if method == 'manage_list_configs':
-        return ['config', 'devices/Campus/Building1/Fake1', 'devices/Campus/Building2/Fake1',
+REGISTRY_CONFIG = [{'Point Name': 'SampleBool1',  'Volttron Point Name': 'SampleBool1',  'Units': 'On / Off',
+                    'Units Details': 'on/off',  'Writable': 'FALSE',  'Starting Value': 'TRUE',  'Type': 'boolean',
+                    'Notes': 'Status indidcator of cooling stage 1'},
+                   {'Point Name': 'SampleWritableFloat1', 'Volttron Point Name': 'SampleWritableFloat1',
+                    'Units': 'PPM', 'Units Details': '1000.00 (default)',  'Writable': 'TRUE',
+                    'Starting Value': '10',  'Type': 'float',
+                    'Notes': 'Setpoint to enable demand control ventilation'}]
+
+DEVICE_CONFIG = {'driver_config': {},  'registry_config': 'config://registry_configs/fake.csv', 'interval': 60,
+                 'timezone': 'US/Pacific', 'driver_type': 'fakedriver', 'publish_breadth_first_all': False,
+                 'publish_depth_first': False, 'publish_breadth_first': False, 'campus': 'campus',
+                 'building': 'building', 'unit': 'fake_device'}
+
+CONFIG_NAMES = ['config', 'devices/Campus/Building1/Fake1', 'devices/Campus/Building2/Fake1',
                 'devices/Campus/Building3/Fake1', 'registry_configs/fake.csv']
+
+RPC_CALLS = []
+
+
+def _mock_rpc_caller(peer, method, agent, file_name=None, raw=False, external_platform=None):
+    RPC_CALLS.append(method)
+    if method == 'manage_get_many':
+        return {name: [dict(p) for p in REGISTRY_CONFIG] if '.csv' in name else dict(DEVICE_CONFIG)
+                for name in CONFIG_NAMES}
+    elif method == 'manage_list_configs':
+        return list(CONFIG_NAMES)
     elif method == 'manage_get' and '.csv' in file_name:
-        return [{'Point Name': 'SampleBool1',  'Volttron Point Name': 'SampleBool1',  'Units': 'On / Off',
-                 'Units Details': 'on/off',  'Writable': 'FALSE',  'Starting Value': 'TRUE',  'Type': 'boolean',
-                 'Notes': 'Status indidcator of cooling stage 1'},
-                {'Point Name': 'SampleWritableFloat1', 'Volttron Point Name': 'SampleWritableFloat1',  'Units': 'PPM',
-                 'Units Details': '1000.00 (default)',  'Writable': 'TRUE',  'Starting Value': '10',  'Type': 'float',
-                 'Notes': 'Setpoint to enable demand control ventilation'}]
+        return [dict(p) for p in REGISTRY_CONFIG]
     elif method == 'manage_get' and '.csv' not in file_name:
-        return {'driver_config': {},  'registry_config': 'config://registry_configs/fake.csv', 'interval': 60,
-                'timezone': 'US/Pacific', 'driver_type': 'fakedriver', 'publish_breadth_first_all': False,
-                'publish_depth_first': False, 'publish_breadth_first': False, 'campus': 'campus',
-                'building': 'building', 'unit': 'fake_device'}
+        return dict(DEVICE_CONFIG)
     else:
         return None
 
@@ -263,8 +278,23 @@ def _mock_rpc_caller(peer, method, agent, file_name=None, raw=False, external_pl
 _mock_rpc_caller.__repr__ = lambda: 'VUIEndpoints'
 
 
-def test_from_store():
-    t = DeviceTree.from_store('my_instance_name', _mock_rpc_caller)
+def _mock_legacy_rpc_caller(peer, method, *args, **kwargs):
+    if method == 'manage_get_many':
+        raise MethodNotFound(-32601, 'Method not found', method)
+    return _mock_rpc_caller(peer, method, *args, **kwargs)
+
+
+_mock_legacy_rpc_caller.__repr__ = lambda: 'VUIEndpoints'
+
+
+@pytest.mark.parametrize('rpc_caller, expected_calls', [
+    (_mock_rpc_caller, ['manage_get_many']),
+    (_mock_legacy_rpc_caller, ['manage_list_configs'] + ['manage_get'] * 6)
+])
+def test_from_store(rpc_caller, expected_calls):
+    RPC_CALLS.clear()
+    t = DeviceTree.from_store('my_instance_name', rpc_caller)
+    assert RPC_CALLS == expected_calls
     assert len(t) == 14
     assert len(t.leaves()) == 6
     assert all([isinstance(n, DeviceNode) for n in t.all_nodes()])
@@ -303,3 +333,36 @@ def test_from_store():
 def test_points(nid, expected):
     t = DeviceTree(topic_list=TOPIC_LIST, assume_full_topics=True)
     assert [n.identifier for n in t.points(nid)] == expected
+
+
+def test_device_tree_cache():
+    cache = DeviceTreeCache()
+    RPC_CALLS.clear()
+    t = cache.get('my_instance_name', _mock_rpc_caller)
+    assert len(t.leaves()) == 6
+    assert cache.get('my_instance_name', _mock_rpc_caller) is t
+    assert RPC_CALLS == ['manage_get_many']
+
+    cache.invalidate('my_instance_name')
+    assert cache.get('my_instance_name', _mock_rpc_caller) is not t
+    assert RPC_CALLS == ['manage_get_many', 'manage_get_many']
+
+
+def test_device_tree_cache_max_age():
+    cache = DeviceTreeCache(max_age=0)
+    t = cache.get('my_instance_name', _mock_rpc_caller)
+    assert cache.get('my_instance_name', _mock_rpc_caller) is not t
+
+
+def test_device_tree_cache_invalidated_while_building():
+    cache = DeviceTreeCache()
+
+    def rpc_caller(*args, **kwargs):
+        # A configuration change arrives while the store is being read.
+        cache.invalidate()
+        return _mock_rpc_caller(*args, **kwargs)
+    rpc_caller.__repr__ = lambda: 'VUIEndpoints'
+
+    t = cache.get('my_instance_name', rpc_caller)
+    assert len(t.leaves()) == 6
+    assert cache.get('my_instance_name', _mock_rpc_caller) is not t
@@ -1,3 +1,23 @@
+import json
+
+import gevent
+from mock import MagicMock
+
+from volttron.platform.web.vui_pubsub import ClientQueue, SubscriptionGroup, VUIPubsubManager
+
+
+class FakeWebSocket:
+    def __init__(self, send_time=0):
+        self.terminated = False
+        self.sent = []
+        self.send_time = send_time
+
+    def send(self, payload):
+        if self.send_time:
+            gevent.sleep(self.send_time)
+        self.sent.append(payload)
+
+
 def test_vui_pubsub_manager_init():
     # TODO: write_test
     pass
@@ -8,9 +28,41 @@ def test_create_websocket():
     pass
 
 
+def test_client_queue_drops_oldest_messages():
+    ws = FakeWebSocket()
+    queue = ClientQueue(ws, size=2)
+    # The sender greenlet has not run yet, so only the latest two messages are kept.
+    for n in range(5):
+        queue.put(f'message{n}')
+    assert queue.dropped == 3
+
+    gevent.sleep(0.01)
+    assert ws.sent == ['message3', 'message4']
+
+    queue.put('message5')
+    gevent.sleep(0.01)
+    assert ws.sent == ['message3', 'message4', 'message5']
+    assert queue.dropped == 3
+    queue.close()
+
+
 def test_client_opened():
-    # TODO: write_test
-    pass
+    agent = MagicMock()
+    manager = VUIPubsubManager(agent)
+    sockets = [FakeWebSocket() for _ in range(50)]
+    for n, ws in enumerate(sockets):
+        manager.client_opened(ws, 'devices/Campus/Building1', f'token{n}')
+
+    # All of the websockets share one bus subscription.
+    assert agent.vip.pubsub.subscribe.call_count == 1
+    group = manager.subscription_groups['devices/Campus/Building1']
+    assert len(group.clients) == 50
+
+    for n, ws in enumerate(sockets):
+        manager.client_closed(ws, 'devices/Campus/Building1', f'token{n}')
+    assert agent.vip.pubsub.unsubscribe.call_count == 1
+    assert 'devices/Campus/Building1' not in manager.subscription_groups
+    assert not manager.user_websockets['token0']
 
 
 def test_close_socket():
@@ -48,11 +100,6 @@ def test_closed():
     pass
 
 
-def test_on_topic():
-    # TODO: write_test
-    pass
-
-
 def test_opened():
     # TODO: write_test
     pass
@@ -61,3 +108,63 @@ def test_opened():
 def test_received_message():
     # TODO: write_test
     pass
+
+
+def test_subscription_group_encodes_once(monkeypatch):
+    encoded = []
+    monkeypatch.setattr(json, 'dumps', lambda message: encoded.append(message) or 'payload')
+    group = SubscriptionGroup(MagicMock(), 'devices')
+    sockets = [FakeWebSocket() for _ in range(10)]
+    for ws in sockets:
+        group.add(ws)
+
+    group.on_publish('pubsub', 'platform.driver', '', 'devices/Fake1/all', {}, {'point': 1})
+    gevent.sleep(0.01)
+
+    assert encoded == [{'point': 1}]
+    assert all(ws.sent == ['payload'] for ws in sockets)
+    group.close()
+
+
+def test_subscription_group_throttle_sends_latest():
+    group = SubscriptionGroup(MagicMock(), 'devices', max_rate=10)
+    ws = FakeWebSocket()
+    group.add(ws)
+
+    for value in range(5):
+        group.on_publish('pubsub', 'platform.driver', '', 'devices/Fake1/all', {}, value)
+        group.on_publish('pubsub', 'platform.driver', '', 'devices/Fake2/all', {}, value + 10)
+    gevent.sleep(0.01)
+    # The first message is sent right away, the rest wait for the next interval.
+    assert ws.sent == ['0']
+    gevent.sleep(0.15)
+    assert ws.sent == ['0', '4', '14']
+    group.close()
+
+
+def test_client_queue_drops_oldest_for_slow_client():
+    slow, fast = FakeWebSocket(send_time=0.05), FakeWebSocket()
+    group = SubscriptionGroup(MagicMock(), 'devices', queue_size=3)
+    group.add(slow)
+    group.add(fast)
+
+    for value in range(10):
+        group.on_publish('pubsub', 'platform.driver', '', 'devices/Fake1/all', {}, value)
+        gevent.sleep(0)
+    gevent.sleep(0.3)
+
+    assert fast.sent == [str(value) for value in range(10)]
+    # The slow client got the first message and then only the latest ones.
+    assert slow.sent == ['0', '7', '8', '9']
+    assert group.clients[slow].dropped == 6
+    group.close()
+
+
+def test_terminated_client_removed():
+    group = SubscriptionGroup(MagicMock(), 'devices')
+    ws = FakeWebSocket()
+    group.add(ws)
+    ws.terminated = True
+    group.on_publish('pubsub', 'platform.driver', '', 'devices/Fake1/all', {}, 1)
+    assert not group.clients
+    group.close()
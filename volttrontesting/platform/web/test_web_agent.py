@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+import re
 import shutil
 from unittest.mock import MagicMock
 
@@ -77,3 +78,79 @@ def test_register_routes(mock_platformweb_service):
 
     finally:
         shutil.rmtree(str(Path(html_root).parent), ignore_errors=True)
+
+
+def _peer_response(result):
+    async_result = MagicMock()
+    async_result.get.return_value = result
+    return MagicMock(return_value=async_result)
+
+
+def test_agent_routes_should_match_before_path_routes(mock_platformweb_service):
+    pws = mock_platformweb_service
+    pws.registeredroutes.append((re.compile('^/.*$'), 'path', '/tmp'))
+    pws.register_agent_route('^/api', 'handle_api')
+    identity = pws.vip.rpc.context.vip_message.peer
+
+    assert pws.registeredroutes.match('/api/devices')[1:] == ('peer_route', (identity, 'handle_api'))
+    assert pws.registeredroutes.match('/index.html')[1] == 'path'
+
+    pws.unregister_all_agent_routes()
+    assert pws.registeredroutes.match('/api/devices')[1] == 'path'
+
+
+def test_peer_route_should_pass_request_body(mock_platformweb_service):
+    pws = mock_platformweb_service
+    pws.register_agent_route('^/api', 'handle_api')
+    pws.vip.rpc.call = _peer_response({'result': 'ok'})
+    start_response = MagicMock()
+
+    env = get_test_web_env('/api/devices', input_data=b'{"point": 1}', method='POST', CONTENT_TYPE='application/json')
+    data = pws.app_routing(env, start_response)
+
+    assert "200 OK" in start_response.call_args[0]
+    assert data == [b'{"result": "ok"}']
+    peer, fn, passenv, body = pws.vip.rpc.call.call_args[0]
+    assert fn == 'handle_api'
+    assert body == {'point': 1}
+
+
+def test_peer_route_should_refuse_requests_when_peer_is_busy(mock_platformweb_service):
+    pws = mock_platformweb_service
+    pws._peer_limiter.concurrency = 1
+    pws._peer_limiter.queue_size = 0
+    pws.register_agent_route('^/api', 'handle_api')
+    identity = pws.vip.rpc.context.vip_message.peer
+    pws.vip.rpc.call = _peer_response({'result': 'ok'})
+    start_response = MagicMock()
+
+    with pws._peer_limiter.limit(identity):
+        data = pws.app_routing(get_test_web_env('/api/devices'), start_response)
+
+    assert "503 Service Unavailable" in start_response.call_args[0]
+    assert data == [b'<h1>Service Unavailable</h1>']
+    pws.vip.rpc.call.assert_not_called()
+
+
+def test_request_larger_than_max_request_size_should_be_refused(mock_platformweb_service):
+    pws = mock_platformweb_service
+    pws.max_request_size = 10
+    pws.register_agent_route('^/api', 'handle_api')
+    pws.vip.rpc.call = _peer_response({'result': 'ok'})
+    start_response = MagicMock()
+
+    pws.app_routing(get_test_web_env('/api/devices', input_data=b'x' * 100, method='POST'), start_response)
+
+    assert "413 Request Entity Too Large" in start_response.call_args[0]
+    pws.vip.rpc.call.assert_not_called()
+
+
+def test_path_route_should_not_read_request_body(mock_platformweb_service, tmp_path):
+    pws = mock_platformweb_service
+    (tmp_path / "index.html").write_text("index")
+    pws.register_path_route("/.*", str(tmp_path))
+    env = get_test_web_env('/index.html', input_data=b'x' * 100, method='POST')
+
+    pws.app_routing(env, MagicMock())
+
+    assert env['wsgi.input'].tell() == 0
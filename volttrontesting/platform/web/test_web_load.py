@@ -0,0 +1,103 @@
+"""
+Load test of the platform web service routing against stand-in agents.
+
+A real gevent WSGI server serves PlatformWebService.app_routing. The RPC
+calls to agent routes are answered by a slow and a fast stand-in agent
+instead of real agents. Run with::
+
+    pytest -s -m benchmark volttrontesting/platform/web/test_web_load.py
+"""
+import time
+from unittest.mock import MagicMock
+
+import gevent
+import pytest
+from gevent import socket
+from gevent.event import AsyncResult
+from gevent.pywsgi import WSGIServer
+
+from volttron.platform.vip.agent import Agent
+from volttron.platform.web import PlatformWebService
+from volttrontesting.utils.utils import AgentMock
+
+# Seconds each stand-in agent takes to answer a request.
+AGENT_DELAYS = {'slow.agent': 0.5, 'fast.agent': 0.001}
+REQUESTS = 200
+
+
+class StandInAgents:
+    """Answers route RPC calls after the delay of the called agent."""
+
+    def __init__(self):
+        self.calls = {peer: 0 for peer in AGENT_DELAYS}
+
+    def call(self, peer, fn, env, data):
+        self.calls[peer] += 1
+        result = AsyncResult()
+        gevent.spawn_later(AGENT_DELAYS[peer], result.set, {'peer': peer, 'path': env['PATH_INFO']})
+        return result
+
+
+@pytest.fixture()
+def web_server():
+    PlatformWebService.__bases__ = (AgentMock.imitate(Agent, Agent()),)
+    pws = PlatformWebService(serverkey=MagicMock(), identity=MagicMock(), address=MagicMock(),
+                             bind_web_address=MagicMock(), web_peer_concurrency=10, web_peer_queue_size=50)
+    agents = StandInAgents()
+    pws.vip.rpc.call = agents.call
+    for peer in AGENT_DELAYS:
+        pws.vip.rpc.context.vip_message.peer = peer
+        pws.register_agent_route('^/{}/'.format(peer), 'route')
+
+    server = WSGIServer(('127.0.0.1', 0), pws.app_routing, log=None)
+    server.start()
+    yield server, agents
+    server.stop()
+
+
+def _request(port, path):
+    """Send a GET request and return the status code and the seconds it took."""
+    start = time.perf_counter()
+    sock = socket.create_connection(('127.0.0.1', port))
+    try:
+        sock.sendall('GET {} HTTP/1.0\r\nHost: localhost\r\n\r\n'.format(path).encode('utf-8'))
+        response = b''
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            response += chunk
+    finally:
+        sock.close()
+    return int(response.split(b' ', 2)[1]), time.perf_counter() - start
+
+
+@pytest.mark.benchmark
+def test_benchmark_slow_agent_does_not_starve_fast_agent(web_server):
+    server, agents = web_server
+    port = server.server_port
+
+    start = time.perf_counter()
+    slow = [gevent.spawn(_request, port, '/slow.agent/{}'.format(n)) for n in range(REQUESTS)]
+    fast = [gevent.spawn(_request, port, '/fast.agent/{}'.format(n)) for n in range(REQUESTS)]
+    gevent.joinall(fast)
+    fast_elapsed = time.perf_counter() - start
+    gevent.joinall(slow)
+    elapsed = time.perf_counter() - start
+
+    fast_results = [g.value for g in fast]
+    slow_results = [g.value for g in slow]
+    fast_latency = sorted(latency for status, latency in fast_results)
+    slow_status = [status for status, latency in slow_results]
+
+    print()
+    print("fast agent: {} requests in {:.2f}s, {:.0f} requests/sec, p50 {:.3f}s, p95 {:.3f}s".format(
+        len(fast_results), fast_elapsed, len(fast_results) / fast_elapsed,
+        fast_latency[len(fast_latency) // 2], fast_latency[int(len(fast_latency) * 0.95)]))
+    print("slow agent: {} answered, {} refused with 503, done after {:.2f}s".format(
+        slow_status.count(200), slow_status.count(503), elapsed))
+
+    assert all(status == 200 for status, latency in fast_results)
+    assert set(slow_status) <= {200, 503}
+    # The slow agent is only called for the requests it has capacity and queue room for.
+    assert agents.calls['slow.agent'] == slow_status.count(200)
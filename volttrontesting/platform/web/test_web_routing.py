@@ -0,0 +1,93 @@
+import re
+
+import gevent
+import pytest
+
+from volttron.platform.web.routing import PeerBusyError, PeerLimiter, RouteTable
+
+
+def _route(pattern, name):
+    return re.compile(pattern), 'callable', name
+
+
+def _matched(table, path):
+    route = table.match(path)
+    return route[2] if route else None
+
+
+def test_route_table_should_match_first_route_in_order():
+    table = RouteTable([_route('^/discovery/$', 'discovery'),
+                        _route('/gs', 'jsonrpc'),
+                        _route('^/vui/platforms/[^/]+/?$', 'platform'),
+                        _route('^/.*$', 'static')])
+
+    assert _matched(table, '/discovery/') == 'discovery'
+    assert _matched(table, '/gs') == 'jsonrpc'
+    assert _matched(table, '/vui/platforms/volttron1') == 'platform'
+    assert _matched(table, '/vui/platforms/volttron1/agents') == 'static'
+    assert _matched(table, 'relative') is None
+
+
+def test_route_table_should_recompile_when_changed():
+    table = RouteTable([_route('^/.*$', 'static')])
+    assert _matched(table, '/api') == 'static'
+
+    api = _route('^/api', 'api')
+    table.insert(0, api)
+    assert _matched(table, '/api') == 'api'
+
+    table.remove_patterns({api[0]})
+    assert _matched(table, '/api') == 'static'
+
+    table[:] = [api]
+    assert _matched(table, '/other') is None
+
+
+def test_route_table_should_keep_order_of_uncombinable_routes():
+    table = RouteTable([_route(r'^/(\w)\1', 'double'),
+                        _route('(?i)^/CASE', 'case'),
+                        _route('^/.*$', 'static')])
+
+    assert _matched(table, '/aa') == 'double'
+    assert _matched(table, '/case') == 'case'
+    assert _matched(table, '/ab') == 'static'
+
+
+def test_route_table_should_support_groups_in_patterns():
+    table = RouteTable([_route('^/(a|b)/(c)?$', 'groups'),
+                        _route('^/(d)', 'd')])
+
+    assert _matched(table, '/a/') == 'groups'
+    assert _matched(table, '/b/c') == 'groups'
+    assert _matched(table, '/d') == 'd'
+
+
+def test_peer_limiter_should_limit_concurrent_requests():
+    limiter = PeerLimiter(concurrency=2, queue_size=1)
+    active = []
+    peak = []
+    refused = []
+
+    def request(peer):
+        try:
+            with limiter.limit(peer):
+                active.append(peer)
+                peak.append(active.count(peer))
+                gevent.sleep(0.05)
+                active.remove(peer)
+        except PeerBusyError:
+            refused.append(peer)
+
+    greenlets = [gevent.spawn(request, 'slow') for _ in range(5)]
+    greenlets.append(gevent.spawn(request, 'fast'))
+    gevent.joinall(greenlets)
+
+    assert max(peak) == 2
+    assert refused == ['slow', 'slow']
+
+
+def test_peer_limiter_should_validate_limits():
+    with pytest.raises(ValueError):
+        PeerLimiter(concurrency=0)
+    with pytest.raises(ValueError):
+        PeerLimiter(queue_size=-1)
@@ -0,0 +1,107 @@
+import re
+import time
+
+import pytest
+from mock import MagicMock
+
+from volttron.platform.agent.base_tagging import BaseTaggingService, MISS_REFRESH_INTERVAL, TopicPrefixTree
+
+TOPICS = ["campus1/building1/device1/p1",
+          "campus1/building1/device1/p2",
+          "campus1/building1/device11/p1",
+          "campus1/building1/ahu-1/p1",
+          "campus1/building2/device1/p1",
+          "campus2/building1/device1/p1",
+          "campus1/building1/device2/p1"]
+
+
+def _historian_match(topics, topic_pattern):
+    """How prefixes were matched against the topics returned by get_topics_by_pattern."""
+    topic_pattern = topic_pattern.replace("*", ".*")
+    prefixes = set()
+    for topic in topics:
+        if not re.search(topic_pattern, topic, re.IGNORECASE):
+            continue
+        result_prefix = '/'.join(topic.split("/")[:len(topic_pattern.split("/"))])
+        if re.match(topic_pattern + "$", result_prefix):
+            prefixes.add(result_prefix)
+    return prefixes
+
+
+@pytest.mark.parametrize("pattern", [
+    "campus1/building1/device1",
+    "campus1/building1/device1/p1",
+    "campus1/building1/device*",
+    "campus1/building1/device1*",
+    "campus*/building1",
+    "campus1/*/device1/p*",
+    "campus1/building1/ahu-1",
+    "campus1/building./device[12]",
+    "campus1/building1/(device1|ahu-1)",
+    "campus1|campus2",
+    "campus3/*",
+    "*",
+])
+def test_match_same_as_historian_query(pattern):
+    tree = TopicPrefixTree(TOPICS)
+    assert tree.match(pattern) == _historian_match(TOPICS, pattern)
+
+
+def test_update_adds_and_removes_topics():
+    tree = TopicPrefixTree(TOPICS[:2])
+    assert tree.update(TOPICS) == len(TOPICS) - 2
+    assert len(tree) == len(TOPICS)
+    assert tree.match("campus2/*") == {"campus2/building1"}
+
+    assert tree.update(TOPICS[:1]) == 0
+    assert "campus2/building1/device1/p1" not in tree
+    assert tree.match("campus*/*/*") == {"campus1/building1/device1"}
+
+
+def _tagging_service(topics):
+    service = BaseTaggingService.__new__(BaseTaggingService)
+    service.historian_vip_identity = "platform.historian"
+    service.topic_cache_max_age = 300
+    service._topic_tree = TopicPrefixTree()
+    service._topic_tree_loaded = None
+    service.vip = MagicMock()
+    service.vip.rpc.call.return_value.get.side_effect = lambda timeout: list(topics)
+    return service
+
+
+def test_topic_list_loaded_once():
+    service = _tagging_service(TOPICS)
+    for pattern in ["campus1/building1/device*", "campus1/building2/device1", "campus2/*"]:
+        assert service.get_matching_topic_prefixes(pattern) == _historian_match(TOPICS, pattern)
+    service.vip.rpc.call.assert_called_once_with("platform.historian", "get_topic_list")
+
+
+def test_topic_list_refreshed():
+    topics = list(TOPICS)
+    service = _tagging_service(topics)
+    assert service.get_matching_topic_prefixes("campus3/*") == set()
+    assert service.vip.rpc.call.call_count == 1
+
+    # Unknown topics are looked up again once the topic list is a few seconds old.
+    topics.append("campus3/building1/device1/p1")
+    assert service.get_matching_topic_prefixes("campus3/*") == set()
+    assert service.vip.rpc.call.call_count == 1
+    service._topic_tree_loaded -= MISS_REFRESH_INTERVAL + 1
+    assert service.get_matching_topic_prefixes("campus3/*") == {"campus3/building1"}
+    assert service.vip.rpc.call.call_count == 2
+
+    # Old topic lists are refreshed.
+    topics.append("campus1/building3/device1/p1")
+    service._topic_tree_loaded = time.time() - 301
+    assert service.get_matching_topic_prefixes("campus1/*") == {"campus1/building1", "campus1/building2",
+                                                                "campus1/building3"}
+    assert service.vip.rpc.call.call_count == 3
+
+
+def test_topic_list_refreshed_once_for_many_misses():
+    service = _tagging_service(TOPICS)
+    service._topic_tree.update(TOPICS)
+    service._topic_tree_loaded = time.time() - MISS_REFRESH_INTERVAL - 1
+    for n in range(20):
+        assert service.get_matching_topic_prefixes("campus9/building{}".format(n)) == set()
+    assert service.vip.rpc.call.call_count == 1
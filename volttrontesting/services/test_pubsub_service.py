@@ -2,6 +2,8 @@ from volttron.platform.vip.pubsubservice import PubSubService, ProtectedPubSubTo
 from mock import Mock, MagicMock
 import pytest
 
+from volttron.platform import jsonapi
+
 
 @pytest.fixture(params=[
                     dict(has_external_routing=True),
@@ -13,6 +15,8 @@ def pubsub_service(request):
     mock_routing_service = None
     if request.param['has_external_routing']:
         mock_routing_service = Mock()
+        mock_routing_service.my_instance_name.return_value = 'local'
+        mock_routing_service.get_connected_platforms.return_value = []
 
     service = PubSubService(socket=mock_socket,
                             protected_topics=mock_protected_topics,
@@ -53,3 +57,148 @@ def test_returns_empty_list_when_subsystem_not_specified(pubsub_service):
     frames[6] = "not_pubsub"
     result = service.handle_subsystem(frames)
     assert [] == result
+
+
+def _subscribe(service, peer, prefix, all_platforms=False):
+    frames = [peer, '', 'VIP1', '', 'msgid', 'pubsub', 'subscribe',
+              dict(prefix=prefix, bus='', all_platforms=all_platforms)]
+    assert service.handle_subsystem(frames)
+
+
+def _unsubscribe(service, peer, prefix):
+    frames = [peer, '', 'VIP1', '', 'msgid', 'pubsub', 'unsubscribe',
+              dict(prefix=prefix, bus='')]
+    assert service.handle_subsystem(frames)
+
+
+def _publish(service, topic, publisher='publisher'):
+    frames = [publisher, '', 'VIP1', '', 'msgid', 'pubsub', 'publish', topic,
+              dict(bus='', headers={}, message=1)]
+    return service._distribute_internal(frames)
+
+
+def _recipients(parameters):
+    sock = parameters['socket']
+    recipients = [call.args[0][0].bytes.decode('utf-8') for call in sock.send_multipart.call_args_list]
+    sock.send_multipart.reset_mock()
+    return sorted(recipients)
+
+
+def test_distribute_internal_sends_to_matching_prefixes(pubsub_service):
+    parameters, service = pubsub_service
+    parameters['socket'].reset_mock()
+
+    _subscribe(service, 'historian', 'devices')
+    _subscribe(service, 'watcher', 'devices/campus/building/meter/all')
+    _subscribe(service, 'other', 'analysis')
+    _subscribe(service, 'remote', 'devices/campus', all_platforms=True)
+
+    assert _publish(service, 'devices/campus/building/meter/all') == 3
+    assert _recipients(parameters) == ['historian', 'remote', 'watcher']
+
+    assert _publish(service, 'devices/campus/building/rtu/all') == 2
+    assert _recipients(parameters) == ['historian', 'remote']
+
+    _unsubscribe(service, 'historian', 'devices')
+    assert _publish(service, 'devices/campus/building/rtu/all') == 1
+    assert _recipients(parameters) == ['remote']
+
+    service.peer_drop('remote')
+    assert _publish(service, 'devices/campus/building/meter/all') == 1
+    assert _recipients(parameters) == ['watcher']
+
+
+def test_distribute_internal_merges_all_and_internal_subscribers(pubsub_service):
+    parameters, service = pubsub_service
+    parameters['socket'].reset_mock()
+
+    _subscribe(service, 'local', 'devices')
+    _subscribe(service, 'everywhere', 'devices', all_platforms=True)
+
+    assert _publish(service, 'devices/campus/building/meter/all') == 2
+    assert _recipients(parameters) == ['everywhere', 'local']
+
+
+def test_distribute_internal_serializes_message_once(pubsub_service):
+    parameters, service = pubsub_service
+    sock = parameters['socket']
+    sock.reset_mock()
+
+    for peer in ('historian', 'watcher', 'listener'):
+        _subscribe(service, peer, 'devices')
+    frames = ['publisher', '', 'VIP1', '', 'msgid', 'pubsub', 'publish', 'devices/campus/building/meter/all',
+              dict(bus='', headers={}, message=[{'Power': 1.0}, {'Power': {'units': 'kW'}}])]
+
+    assert service._distribute_internal(frames) == 3
+
+    sent = [call.args[0] for call in sock.send_multipart.call_args_list]
+    assert sorted(serialized[0].bytes.decode('utf-8') for serialized in sent) == ['historian', 'listener', 'watcher']
+    # Every send shares the same message frame instead of encoding it again.
+    assert len({id(serialized[8]) for serialized in sent}) == 1
+    assert jsonapi.loads(sent[0][8].bytes) == frames[8]
+
+
+@pytest.mark.benchmark
+def test_benchmark_distribute_internal_fan_out(pubsub_service):
+    import time
+
+    parameters, service = pubsub_service
+    if parameters['has_external_routing']:
+        pytest.skip("Fan-out benchmark only needs to run once.")
+
+    class NullSocket:
+        def send_multipart(self, frames, flags=0, copy=True):
+            pass
+
+    service._vip_sock = NullSocket()
+    topic = 'devices/campus/building/device0/all'
+    publishes = 2000
+    subscribed = 0
+    print()
+    for count in (10, 100, 1000, 5000):
+        # Mostly non-matching device subscriptions plus one matching subscriber.
+        for n in range(subscribed, count):
+            _subscribe(service, 'agent{}'.format(n % 50), 'devices/campus/building/device{}/'.format(n + 1))
+        subscribed = count
+        _subscribe(service, 'historian', 'devices')
+
+        start = time.perf_counter()
+        for _ in range(publishes):
+            assert _publish(service, topic) == 1
+        elapsed = time.perf_counter() - start
+        print("subscriptions: {:>5}  usec/publish: {:8.2f}".format(count, elapsed / publishes * 1e6))
+
+
+@pytest.mark.benchmark
+def test_benchmark_distribute_internal_subscribers(pubsub_service):
+    import time
+
+    parameters, service = pubsub_service
+    if parameters['has_external_routing']:
+        pytest.skip("Fan-out benchmark only needs to run once.")
+
+    class NullSocket:
+        def send_multipart(self, frames, flags=0, copy=True):
+            pass
+
+    service._vip_sock = NullSocket()
+    topic = 'devices/campus/building/device0/all'
+    # A device all publish with 50 points and their metadata.
+    message = [{'Point{}'.format(n): float(n) for n in range(50)},
+               {'Point{}'.format(n): {'type': 'float', 'tz': 'UTC', 'units': 'F'} for n in range(50)}]
+    publishes = 1000
+    subscribed = 0
+    print()
+    for count in (1, 8, 32, 128):
+        for n in range(subscribed, count):
+            _subscribe(service, 'agent{}'.format(n), 'devices')
+        subscribed = count
+
+        start = time.perf_counter()
+        for _ in range(publishes):
+            frames = ['publisher', '', 'VIP1', '', 'msgid', 'pubsub', 'publish', topic,
+                      dict(bus='', headers={}, message=message)]
+            assert service._distribute_internal(frames) == count
+        elapsed = time.perf_counter() - start
+        print("subscribers: {:>4}  publishes/sec: {:8.0f}  msgs/sec: {:9.0f}".format(
+            count, publishes / elapsed, publishes * count / elapsed))
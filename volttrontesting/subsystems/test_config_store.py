@@ -189,6 +189,63 @@ def test_manage_delete_store(default_config_test_agent):
     assert second == ("config", "DELETE", None)
 
 
+@pytest.mark.config_store
+def test_manage_store_many(default_config_test_agent):
+    configs = [["config", """{"value":1}""", "json"],
+               ["registry.csv", "value\n2", "csv"],
+               ["devices/device1", """{"registry": "config://registry.csv"}""", "json"]]
+    default_config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_store_many',
+                                           "config_test_agent", configs).get()
+
+    results = default_config_test_agent.callback_results
+    # "config" is always processed first.
+    assert results == [("config", "NEW", {"value": 1}),
+                       ("registry.csv", "NEW", [{"value": "2"}]),
+                       ("devices/device1", "NEW", {"registry": [{"value": "2"}]})]
+
+    config_list = default_config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_list_configs',
+                                                         "config_test_agent").get()
+    assert config_list == ["config", "devices/device1", "registry.csv"]
+
+
+@pytest.mark.config_store
+def test_manage_store_many_invalid(default_config_test_agent):
+    configs = [["config", """{"value":1}""", "json"],
+               ["broken", """{"value":""", "json"]]
+    with pytest.raises(jsonrpc.RemoteError):
+        default_config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_store_many',
+                                               "config_test_agent", configs).get()
+
+    # Nothing is stored when one of the configurations is invalid.
+    assert default_config_test_agent.callback_results == []
+    config_list = default_config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_list_configs',
+                                                         "config_test_agent").get()
+    assert config_list == []
+
+
+@pytest.mark.config_store
+def test_manage_delete_many(default_config_test_agent):
+    configs = [["config1", """{"value":1}""", "json"],
+               ["config2", """{"value":2}""", "json"],
+               ["config3", """{"value":3}""", "json"]]
+    default_config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_store_many',
+                                           "config_test_agent", configs).get()
+    default_config_test_agent.reset_results()
+
+    with pytest.raises(jsonrpc.RemoteError):
+        default_config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_delete_many',
+                                               "config_test_agent", ["config1", "missing"]).get()
+    assert default_config_test_agent.callback_results == []
+
+    default_config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_delete_many',
+                                           "config_test_agent", ["config1", "config3"]).get()
+    assert sorted(default_config_test_agent.callback_results) == [("config1", "DELETE", None),
+                                                                  ("config3", "DELETE", None)]
+    config_list = default_config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_list_configs',
+                                                         "config_test_agent").get()
+    assert config_list == ["config2"]
+
+
 @pytest.mark.config_store
 def test_manage_get_config(config_test_agent):
     json_config = """{"value":1}"""
@@ -213,6 +270,43 @@ def test_manage_get_raw_config(config_test_agent):
     assert config == json_config
 
 
+@pytest.mark.config_store
+def test_manage_get_many_configs(config_test_agent):
+    config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_store',
+                                   "config_test_agent", "config1", """{"value":1}""", config_type="json").get()
+    config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_store',
+                                   "config_test_agent", "config2", """{"value":2}""", config_type="json").get()
+
+    configs = config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_get_many',
+                                             "config_test_agent", raw=False).get()
+    assert configs == {"config1": {"value": 1}, "config2": {"value": 2}}
+
+    configs = config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_get_many',
+                                             "config_test_agent", ["CONFIG2"], raw=True).get()
+    assert configs == {"config2": """{"value":2}"""}
+
+    with pytest.raises(jsonrpc.RemoteError):
+        config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_get_many',
+                                       "config_test_agent", ["missing"]).get()
+
+
+@pytest.mark.config_store
+def test_config_change_published(config_test_agent):
+    messages = []
+    config_test_agent.vip.pubsub.subscribe('pubsub', 'platform/config_store/config_test_agent',
+                                           lambda *args: messages.append(args[5])).get()
+
+    config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_store',
+                                   "config_test_agent", "config", """{"value":1}""", config_type="json").get()
+    config_test_agent.vip.rpc.call(CONFIGURATION_STORE, 'manage_delete_config',
+                                   "config_test_agent", "config").get()
+    gevent.sleep(0.5)
+    config_test_agent.vip.pubsub.unsubscribe('pubsub', 'platform/config_store/config_test_agent', None).get()
+
+    assert messages == [{"action": "NEW", "config_name": "config"},
+                        {"action": "DELETE", "config_name": "config"}]
+
+
 @pytest.mark.config_store
 def test_manage_list_config(config_test_agent):
     json_config = """{"value":1}"""
@@ -0,0 +1,49 @@
+from mock import MagicMock
+
+from volttron.platform.vip.agent.subsystems.configstore import ConfigStore
+
+
+def _config_store():
+    store = ConfigStore(MagicMock(), MagicMock(), MagicMock())
+    store._initial_update({"config": {"value": 1}, "registry.csv": [{"value": "1"}],
+                           "devices/device1": {"registry": "config://registry.csv"}})
+    store._initial_callbacks_called = True
+    results = []
+    store.subscribe(lambda name, action, contents: results.append((name, action, contents)))
+    return store, results
+
+
+def test_update_many_processes_callbacks_once():
+    store, results = _config_store()
+    store._process_callbacks = MagicMock(wraps=store._process_callbacks)
+
+    store._update_many([("UPDATE", "registry.csv", [{"value": "2"}]),
+                        ("NEW", "devices/Device2", {"registry": "config://registry.csv"}),
+                        ("DELETE", "config", None)], trigger_callback=True)
+
+    assert store._process_callbacks.call_count == 1
+    assert results == [("config", "DELETE", None),
+                       ("registry.csv", "UPDATE", [{"value": "2"}]),
+                       ("devices/device1", "UPDATE", {"registry": [{"value": "2"}]}),
+                       ("devices/Device2", "NEW", {"registry": [{"value": "2"}]})]
+    assert "config" not in store._name_map
+    assert store._name_map["devices/device2"] == "devices/Device2"
+
+
+def test_update_many_delete_and_add_same_config():
+    store, results = _config_store()
+
+    store._update_many([("DELETE", "config", None), ("NEW", "config", {"value": 2})], trigger_callback=True)
+
+    assert results == [("config", "NEW", {"value": 2})]
+    assert store._name_map["config"] == "config"
+
+
+def test_update_config_single_change():
+    store, results = _config_store()
+
+    store._update_config("DELETE_ALL", None, trigger_callback=True)
+
+    assert sorted(results) == [("config", "DELETE", None), ("devices/device1", "DELETE", None),
+                               ("registry.csv", "DELETE", None)]
+    assert store._name_map == {}
@@ -119,3 +119,61 @@ def test_multi_unsubscribe(volttron_instance):
     gevent.sleep(1)
 
     assert subscriber_agent.subscription_callback.call_count == 0
+
+
+def _unit_pubsub():
+    core = MagicMock()
+    pubsub = PubSub(core=core, rpc_subsys=MagicMock(), peerlist_subsys=MagicMock(), owner=MagicMock())
+    pubsub.vip_socket = MagicMock()
+    return pubsub
+
+
+def test_process_callback_dispatches_matching_prefixes():
+    pubsub = _unit_pubsub()
+    devices, meter, analysis, remote = MagicMock(), MagicMock(), MagicMock(), MagicMock()
+    pubsub._add_subscription('devices', devices)
+    pubsub._add_subscription('devices/campus/building/meter', meter)
+    pubsub._add_subscription('analysis', analysis)
+    pubsub._add_subscription('devices/campus', remote, all_platforms=True)
+
+    pubsub._process_callback('sender', '', 'devices/campus/building/meter/all', {}, 1)
+    pubsub._process_callback('sender', '', 'devices/campus/building/meter/all', {}, 2)
+    pubsub._process_callback('sender', '', 'devices/campus/building/rtu/all', {}, 3)
+
+    assert devices.call_count == 3
+    assert meter.call_count == 2
+    assert remote.call_count == 3
+    assert not analysis.called
+    meter.assert_called_with('pubsub', 'sender', '', 'devices/campus/building/meter/all', {}, 2)
+    assert not pubsub.vip_socket.send_vip.called
+
+    assert pubsub.get_subscription_hits() == {
+        'internal': {'': {'devices': 3, 'devices/campus/building/meter': 2, 'analysis': 0}},
+        'all': {'': {'devices/campus': 3}}
+    }
+
+
+def test_process_callback_cache_invalidated_on_subscription_change():
+    pubsub = _unit_pubsub()
+    devices, meter = MagicMock(), MagicMock()
+    topic = 'devices/campus/building/meter/all'
+    pubsub._add_subscription('devices', devices)
+    pubsub._process_callback('sender', '', topic, {}, 1)
+    assert devices.call_count == 1
+
+    pubsub._add_subscription('devices/campus/building/meter', meter)
+    pubsub._process_callback('sender', '', topic, {}, 2)
+    assert devices.call_count == 2
+    assert meter.call_count == 1
+
+    pubsub._drop_subscription('devices', devices)
+    pubsub._process_callback('sender', '', topic, {}, 3)
+    assert devices.call_count == 2
+    assert meter.call_count == 2
+    assert pubsub.get_subscription_hits() == {'internal': {'': {'devices/campus/building/meter': 2}}}
+
+    pubsub._drop_subscription('devices/campus/building/meter', meter)
+    pubsub._process_callback('sender', '', topic, {}, 4)
+    assert meter.call_count == 2
+    # No subscriptions matched so the agent resynchronizes with the platform.
+    assert pubsub.vip_socket.send_vip.called
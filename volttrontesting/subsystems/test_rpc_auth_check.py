@@ -0,0 +1,87 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from mock import MagicMock
+
+from volttron.platform import jsonrpc
+from volttron.platform.vip.agent.subsystems.rpc import RPC
+
+
+class _Owner:
+    def __init__(self, capabilities):
+        self.vip = SimpleNamespace(auth=MagicMock())
+        self.vip.auth.get_capabilities.side_effect = lambda user: capabilities.get(user, [])
+
+    def set_point(self, requester_id, topic, value, point=None):
+        return value
+
+
+def _rpc(capabilities):
+    owner = _Owner(capabilities)
+    rpc = RPC(MagicMock(), owner, MagicMock())
+    rpc.context = MagicMock()
+    return rpc, owner
+
+
+def _call(rpc, method, user, *args, **kwargs):
+    rpc.context.vip_message.user = user
+    return method(*args, **kwargs)
+
+
+def test_auth_check_cached_per_user():
+    rpc, owner = _rpc({"agent1": {"can_set_point": None}})
+    method = rpc._add_auth_check(owner.set_point, {"can_set_point"})
+
+    for value in range(10):
+        assert _call(rpc, method, "agent1", "agent1", "campus/device/point", value) == value
+    assert owner.vip.auth.get_capabilities.call_count == 1
+
+    with pytest.raises(jsonrpc.Error):
+        _call(rpc, method, "agent2", "agent2", "campus/device/point", 1)
+    with pytest.raises(jsonrpc.Error):
+        _call(rpc, method, "agent2", "agent2", "campus/device/point", 1)
+    assert owner.vip.auth.get_capabilities.call_count == 2
+
+
+def test_auth_check_invalidated():
+    capabilities = {"agent1": {"can_set_point": None}}
+    rpc, owner = _rpc(capabilities)
+    method = rpc._add_auth_check(owner.set_point, {"can_set_point"})
+    assert _call(rpc, method, "agent1", "agent1", "campus/device/point", 1) == 1
+
+    capabilities["agent1"] = {}
+    rpc.invalidate_auth_checks()
+    with pytest.raises(jsonrpc.Error):
+        _call(rpc, method, "agent1", "agent1", "campus/device/point", 1)
+
+
+def test_auth_check_restricted_arguments():
+    rpc, owner = _rpc({"agent1": {"can_set_point": {"topic": "/campus/.*/point/", "requester_id": "agent1"}},
+                       "agent2": {"can_set_point": {"missing": "value"}}})
+    method = rpc._add_auth_check(owner.set_point, {"can_set_point"})
+
+    assert _call(rpc, method, "agent1", "agent1", "campus/device/point", 1) == 1
+    assert _call(rpc, method, "agent1", requester_id="agent1", topic="campus/other/point", value=2) == 2
+    with pytest.raises(jsonrpc.Error):
+        _call(rpc, method, "agent1", "agent1", "building/device/point", 1)
+    with pytest.raises(jsonrpc.Error):
+        _call(rpc, method, "agent1", "agent3", "campus/device/point", 1)
+    with pytest.raises(jsonrpc.Error):
+        _call(rpc, method, "agent2", "agent2", "campus/device/point", 1)
+    assert owner.vip.auth.get_capabilities.call_count == 2
+
+
+@pytest.mark.benchmark
+def test_benchmark_auth_check():
+    print()
+    for caps in ({"can_set_point": None}, {"can_set_point": {"topic": "/campus/.*/", "requester_id": "agent1"}}):
+        rpc, owner = _rpc({"agent1": caps})
+        method = rpc._add_auth_check(owner.set_point, {"can_set_point"})
+        rpc.context.vip_message.user = "agent1"
+        count = 20000
+        start = time.perf_counter()
+        for value in range(count):
+            method("agent1", "campus/device/point", value)
+        elapsed = time.perf_counter() - start
+        print("restricted: {:<5} calls/sec: {:10.0f}".format(str(bool(caps["can_set_point"])), count / elapsed))
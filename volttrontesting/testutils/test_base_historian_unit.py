@@ -7,7 +7,7 @@ import pytest
 from pytz import UTC
 
 from volttrontesting.utils.utils import AgentMock
-from volttron.platform.agent.base_historian import BaseHistorianAgent, Agent
+from volttron.platform.agent.base_historian import BaseHistorianAgent, Agent, BackupDatabase, DeviceBatch
 
 
 agent_data_dir = os.path.join(os.getcwd(), os.path.basename(os.getcwd()) + ".agent-data")
@@ -87,6 +87,65 @@ def test_base_historian_agent_should_filter_duplicates(base_historian_agent):
     assert base_historian_agent.last_to_publish_list == expected_to_publish_list
 
 
+class _CacheOwner:
+    pass
+
+
+def _device_batch(device, timestamp, values, headers):
+    return [{'source': 'scrape',
+             'topic': f"{device}/{point}",
+             'readings': [(timestamp, value)],
+             'meta': {'units': 'F'},
+             'headers': headers} for point, value in values.items()]
+
+
+@pytest.mark.parametrize("wal_mode", [False, True])
+def test_backup_new_data_caches_batch(tmp_path, monkeypatch, wal_mode):
+    monkeypatch.chdir(tmp_path)
+    owner = _CacheOwner()
+    backupdb = BackupDatabase(owner, None, 0.9, wal_mode=wal_mode)
+    journal_mode = backupdb._connection.execute("PRAGMA journal_mode").fetchone()[0]
+    assert journal_mode == ("wal" if wal_mode else "delete")
+
+    timestamp = datetime.datetime(2020, 11, 17, 21, 24, 10, tzinfo=UTC)
+    headers = {"Date": "2020-11-17T21:24:10+00:00", "time_error": False}
+    values = {f"point{n}": float(n) for n in range(200)}
+    batch = _device_batch("campus/building/device", timestamp, values, headers)
+    batch.append(None)
+
+    assert not backupdb.backup_new_data(batch)
+    assert backupdb.get_backlog_count() == 200
+
+    published = backupdb.get_outstanding_to_publish(1000)
+    assert len(published) == 200
+    assert {r['topic'].split('/')[-1]: r['value'] for r in published} == values
+    assert all(r['headers'] == headers for r in published)
+    assert all(r['timestamp'] == timestamp for r in published)
+    assert all(r['meta'] == {'units': 'F'} for r in published)
+
+    backupdb.remove_successfully_published({None}, 1000)
+    assert backupdb.get_backlog_count() == 0
+    backupdb.close()
+
+
+def test_backup_new_data_separates_time_errors(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    owner = _CacheOwner()
+    backupdb = BackupDatabase(owner, None, 0.9)
+
+    timestamp = datetime.datetime(2020, 11, 17, 21, 24, 10, tzinfo=UTC)
+    good = _device_batch("campus/building/good", timestamp, {"a": 1, "b": 2}, {"time_error": False})
+    bad = _device_batch("campus/building/bad", timestamp, {"a": 1}, {"time_error": True})
+
+    backupdb.backup_new_data(good + bad, time_tolerance_check=True)
+    assert backupdb.time_error_records
+    assert backupdb.get_backlog_count() == 2
+    assert sorted(r['topic'] for r in backupdb.get_outstanding_to_publish(10)) == \
+        ["campus/building/good/a", "campus/building/good/b"]
+    assert backupdb._connection.execute("SELECT count(*) FROM time_error").fetchone()[0] == 1
+    backupdb.close()
+
+
 BaseHistorianAgent.__bases__ = (AgentMock.imitate(Agent, Agent()),)
 
 
@@ -121,3 +180,106 @@ def base_historian_agent():
         os.remove(CACHE_NAME)
     if os.path.exists(agent_data_dir):
         os.rmdir(agent_data_dir)
+
+
+def test_capture_data_queues_one_batch_per_device(base_historian_agent, tmp_path, monkeypatch):
+    headers = {"Date": "2020-11-17T21:24:10.189393+00:00"}
+    message = [{"OutsideAirTemperature": 52.5, "MixedAirTemperature": 58.5},
+               {"OutsideAirTemperature": {"units": "F"}}]
+    base_historian_agent._capture_data(peer=None, sender=None, bus=None,
+                                       topic="devices/campus/building/device/all",
+                                       headers=headers, message=message,
+                                       device="campus/building/device")
+
+    assert base_historian_agent._event_queue.qsize() == 1
+    batch = base_historian_agent._event_queue.get_nowait()
+    assert isinstance(batch, DeviceBatch)
+    assert len(batch) == 2
+
+    timestamp = datetime.datetime(2020, 11, 17, 21, 24, 10, 189393, tzinfo=UTC)
+    assert batch.device == "campus/building/device"
+    assert batch.timestamp == timestamp
+    assert batch.points == ["OutsideAirTemperature", "MixedAirTemperature"]
+    assert batch.values == [52.5, 58.5]
+    assert list(batch.records()) == [
+        {'source': 'scrape', 'topic': 'campus/building/device/OutsideAirTemperature',
+         'readings': [(timestamp, 52.5)], 'meta': {'units': 'F'}, 'headers': headers},
+        {'source': 'scrape', 'topic': 'campus/building/device/MixedAirTemperature',
+         'readings': [(timestamp, 58.5)], 'meta': {}, 'headers': headers},
+    ]
+
+    monkeypatch.chdir(tmp_path)
+    backupdb = BackupDatabase(_CacheOwner(), None, 0.9)
+    backupdb.backup_new_data([batch])
+    published = backupdb.get_outstanding_to_publish(10)
+    backupdb.close()
+    assert published == [
+        dict(_id=1, timestamp=timestamp, source='scrape', topic='campus/building/device/OutsideAirTemperature',
+             value=52.5, headers=headers, meta={'units': 'F'}),
+        dict(_id=2, timestamp=timestamp, source='scrape', topic='campus/building/device/MixedAirTemperature',
+             value=58.5, headers=headers, meta={}),
+    ]
+
+
+def _capture_device_publishes(base_historian_agent, monkeypatch):
+    captured = []
+    monkeypatch.setattr(base_historian_agent, "_capture_data",
+                        lambda peer, sender, bus, topic, headers, message, device: captured.append(message))
+    return captured
+
+
+def test_device_data_filter_keeps_configured_points(base_historian_agent, monkeypatch):
+    captured = _capture_device_publishes(base_historian_agent, monkeypatch)
+    base_historian_agent._set_device_data_filter({"building/device": ["OutsideAirTemperature"],
+                                                  "device": ["MixedAirTemperature"],
+                                                  "other": ["DamperSignal"]})
+    headers = {"Date": "2020-11-17T21:24:10.189393+00:00"}
+    message = [{"OutsideAirTemperature": 52.5, "MixedAirTemperature": 58.5, "DamperSignal": 0},
+               {"OutsideAirTemperature": {"units": "F"}, "MixedAirTemperature": {"units": "F"},
+                "DamperSignal": {"units": "%"}}]
+
+    base_historian_agent._capture_device_data(None, None, None, "devices/campus/building/device/all",
+                                              headers, message)
+    base_historian_agent._capture_device_data(None, None, None, "devices/campus/building/meter/all",
+                                              headers, message)
+
+    assert captured == [[{"OutsideAirTemperature": 52.5, "MixedAirTemperature": 58.5},
+                         {"OutsideAirTemperature": {"units": "F"}, "MixedAirTemperature": {"units": "F"}}]]
+    assert base_historian_agent._device_filter_cache["campus/building/meter"] is None
+
+    # Reconfiguring the filter must drop the cached device lookups.
+    base_historian_agent._set_device_data_filter({"meter": ["DamperSignal"]})
+    base_historian_agent._capture_device_data(None, None, None, "devices/campus/building/meter/all",
+                                              headers, message)
+    assert captured[-1] == [{"DamperSignal": 0}, {"DamperSignal": {"units": "%"}}]
+
+
+def test_device_data_filter_non_list_message(base_historian_agent):
+    base_historian_agent._set_device_data_filter({"campus": ["device"]})
+    assert base_historian_agent._filter_device_data("campus/building/device", 52.5) == 52.5
+    assert base_historian_agent._filter_device_data("campus/building/meter", 52.5) is None
+
+
+@pytest.mark.benchmark
+def test_benchmark_device_data_filter(base_historian_agent, monkeypatch):
+    import time
+
+    captured = _capture_device_publishes(base_historian_agent, monkeypatch)
+    headers = {"Date": "2020-11-17T21:24:10.189393+00:00"}
+    message = [{"Point{}".format(n): float(n) for n in range(100)},
+               {"Point{}".format(n): {"units": "F"} for n in range(100)}]
+    devices = ["campus/building/device{}".format(n) for n in range(50)]
+    publishes = 5000
+    print()
+    for entries in (0, 10, 500):
+        base_historian_agent._set_device_data_filter(
+            {"device{}".format(n): ["Point{}".format(p) for p in range(n % 20)] for n in range(entries)})
+        del captured[:]
+        start = time.perf_counter()
+        for n in range(publishes):
+            base_historian_agent._capture_device_data(None, None, None,
+                                                      "devices/{}/all".format(devices[n % len(devices)]),
+                                                      headers, message)
+        elapsed = time.perf_counter() - start
+        print("filter entries: {:>3}  captured: {:>4}  publishes/sec: {:10.0f}".format(
+            entries, len(captured), publishes / elapsed))
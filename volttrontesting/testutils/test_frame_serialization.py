@@ -1,5 +1,5 @@
 from zmq.sugar.frame import Frame
-from volttron.utils.frame_serialization import deserialize_frames, serialize_frames
+from volttron.utils.frame_serialization import LazyFrames, deserialize_frames, serialize_frames
 
 
 def test_can_deserialize_homogeneous_string():
@@ -32,3 +32,51 @@ def test_mixed_array():
 
     for r in range(len(original)):
         assert original[r] == after_deserialize[r], f"Element {r} is not the same."
+
+
+def test_lazy_frames_decode_envelope_only():
+    original = ["sender", "recipient", "VIP1", "", "msgid", "RPC", dict(method="ping", params=[1, 2.0])]
+    frames = serialize_frames(original)
+
+    lazy = LazyFrames(frames)
+
+    assert list.__getitem__(lazy, 5) == "RPC"
+    assert list.__getitem__(lazy, 6) is not original[6]
+    assert lazy[:6] == original[:6]
+
+
+def test_lazy_frames_decode_payload_on_access():
+    original = ["sender", "", "VIP1", "", "msgid", "pubsub", "publish", "devices/all",
+                dict(bus='', headers={}, message=[{"Power": 1.0}])]
+    frames = serialize_frames(original)
+
+    lazy = LazyFrames(frames)
+
+    assert lazy[8] == original[8]
+    assert lazy == original
+    assert list(lazy) == original
+    assert lazy[5:] == original[5:]
+    sender, recipient, proto, user_id, msg_id, subsystem, op = lazy[:7]
+    assert op == "publish"
+
+
+def test_lazy_frames_forward_untouched_payload():
+    original = ["sender", "recipient", "VIP1", "", "msgid", "RPC", dict(method="ping", params=[1])]
+    frames = serialize_frames(original)
+
+    lazy = LazyFrames(frames)
+    lazy[:4] = ["recipient", "sender", "VIP1", "sender"]
+    forwarded = serialize_frames(lazy)
+
+    # The payload is sent as the received zmq frame, the envelope is encoded again.
+    assert forwarded[6] is frames[6]
+    assert deserialize_frames(forwarded) == ["recipient", "sender", "VIP1", "sender", "msgid", "RPC", original[6]]
+
+
+def test_lazy_frames_serialize_changed_payload():
+    original = ["sender", "", "VIP1", "", "msgid", "query", "serverkey"]
+    lazy = LazyFrames(serialize_frames(original))
+
+    lazy[6:] = ["", "key"]
+
+    assert deserialize_frames(serialize_frames(lazy)) == original[:6] + ["", "key"]
@@ -0,0 +1,198 @@
+import os
+import time
+
+import pytest
+
+from volttron.platform import jsonapi
+from volttron.utils import persistance
+from volttron.utils.persistance import PersistentDict
+
+
+def _config(n):
+    return {"type": "json", "modified": "2021-01-01T00:00:00", "data": jsonapi.dumps({"value": n})}
+
+
+def _file_contents(filename):
+    with open(filename) as f:
+        return jsonapi.load(f)
+
+
+def _journal_lines(store):
+    if not os.path.exists(store.journal_filename):
+        return 0
+    with open(store.journal_filename) as f:
+        # The first line names the file the journal applies to.
+        return len(f.readlines()[1:])
+
+
+def test_journal_appends_changes(tmp_path):
+    filename = str(tmp_path / "agent.store")
+    store = PersistentDict(filename=filename, flag='c', format='json', journal=True)
+    store["config1"] = _config(1)
+    store.async_sync()
+    PersistentDict.wait_for_writes()
+    # The first write creates the file, later changes are appended to the journal.
+    assert _file_contents(filename) == {"config1": _config(1)}
+    assert _journal_lines(store) == 0
+
+    store["config2"] = _config(2)
+    store.async_sync()
+    store["config1"] = _config(3)
+    store.pop("config2")
+    store.async_sync()
+    PersistentDict.wait_for_writes()
+    assert _file_contents(filename) == {"config1": _config(1)}
+    assert _journal_lines(store) == 3
+
+    reloaded = PersistentDict(filename=filename, flag='c', format='json', journal=True)
+    assert reloaded == {"config1": _config(3)}
+
+
+def test_journal_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistance, "JOURNAL_COMPACT_MIN", 5)
+    filename = str(tmp_path / "agent.store")
+    store = PersistentDict(filename=filename, flag='c', format='json', journal=True)
+    for n in range(20):
+        store["config{}".format(n % 3)] = _config(n)
+        store.async_sync()
+    PersistentDict.wait_for_writes()
+
+    assert _journal_lines(store) <= 5
+    reloaded = PersistentDict(filename=filename, flag='c', format='json', journal=True)
+    assert reloaded == {"config0": _config(18), "config1": _config(19), "config2": _config(17)}
+
+    store.sync()
+    assert not os.path.exists(store.journal_filename)
+    assert _file_contents(filename) == dict(store)
+
+
+def test_journal_clear_removes_files(tmp_path):
+    filename = str(tmp_path / "agent.store")
+    store = PersistentDict(filename=filename, flag='c', format='json', journal=True)
+    store["config1"] = _config(1)
+    store.async_sync()
+    store["config2"] = _config(2)
+    store.async_sync()
+    store.clear()
+    store.async_sync()
+    PersistentDict.wait_for_writes()
+
+    assert not os.path.exists(filename)
+    assert not os.path.exists(store.journal_filename)
+
+
+def test_journal_ignores_incomplete_entry(tmp_path):
+    filename = str(tmp_path / "agent.store")
+    store = PersistentDict(filename=filename, flag='c', format='json', journal=True)
+    store["config1"] = _config(1)
+    store.async_sync()
+    store["config2"] = _config(2)
+    store.async_sync()
+    PersistentDict.wait_for_writes()
+    with open(store.journal_filename, 'a') as f:
+        f.write('{"key": "config3", "val')
+
+    reloaded = PersistentDict(filename=filename, flag='c', format='json', journal=True)
+    assert reloaded == {"config1": _config(1), "config2": _config(2)}
+
+
+def test_journal_entries_before_rewrite_dropped(tmp_path):
+    filename = str(tmp_path / "agent.store")
+    journal = filename + '.journal'
+    line = jsonapi.dumps({"key": "config1", "value": _config(1)}) + '\n'
+    PersistentDict._process_events([(journal, [line], 'journal', None),
+                                    (filename, {"config1": _config(2)}, 'json', None),
+                                    (journal, [line, line], 'journal', None)])
+
+    assert _file_contents(filename) == {"config1": _config(2)}
+    with open(journal) as f:
+        assert f.readlines()[1:] == [line, line]
+
+
+def test_failed_rewrite_keeps_file_and_journal(tmp_path, monkeypatch):
+    filename = str(tmp_path / "agent.store")
+    store = PersistentDict(filename=filename, flag='c', format='json', journal=True)
+    store["config1"] = _config(1)
+    store.async_sync()
+    store["config2"] = _config(2)
+    store.async_sync()
+    PersistentDict.wait_for_writes()
+
+    def fail(fileobj, contents, format):
+        raise ValueError("not serializable")
+
+    monkeypatch.setattr(PersistentDict, "_dump", staticmethod(fail))
+    store["config3"] = _config(3)
+    store.sync()
+    monkeypatch.undo()
+
+    assert not os.path.exists(filename + '.tmp')
+    reloaded = PersistentDict(filename=filename, flag='c', format='json', journal=True)
+    assert reloaded == {"config1": _config(1), "config2": _config(2)}
+
+
+def test_journal_older_than_file_ignored(tmp_path):
+    filename = str(tmp_path / "agent.store")
+    store = PersistentDict(filename=filename, flag='c', format='json', journal=True)
+    store["config1"] = _config(1)
+    store.async_sync()
+    store["config1"] = _config(2)
+    store.async_sync()
+    PersistentDict.wait_for_writes()
+    with open(store.journal_filename) as f:
+        stale_journal = f.read()
+
+    # The platform stopped after the compacted file was moved into place but before the journal was removed.
+    store["config1"] = _config(3)
+    store.sync()
+    assert not os.path.exists(store.journal_filename)
+    with open(store.journal_filename, 'w') as f:
+        f.write(stale_journal)
+
+    reloaded = PersistentDict(filename=filename, flag='c', format='json', journal=True)
+    assert reloaded == {"config1": _config(3)}
+    assert not os.path.exists(store.journal_filename)
+
+    reloaded["config2"] = _config(4)
+    reloaded.async_sync()
+    PersistentDict.wait_for_writes()
+    assert PersistentDict(filename=filename, flag='c', format='json', journal=True) == \
+        {"config1": _config(3), "config2": _config(4)}
+
+
+def test_writer_thread_survives_errors(tmp_path, monkeypatch):
+    filename = str(tmp_path / "agent.store")
+    store = PersistentDict(filename=filename, flag='c', format='json', journal=True)
+
+    def fail(filename, contents, format, mode):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(PersistentDict, "_update_file", staticmethod(fail))
+    store["config1"] = _config(1)
+    # Returns instead of waiting forever on the failed write.
+    store.sync()
+    monkeypatch.undo()
+
+    store.sync()
+    assert _file_contents(filename) == {"config1": _config(1)}
+
+
+def test_journal_requires_json(tmp_path):
+    with pytest.raises(ValueError):
+        PersistentDict(filename=str(tmp_path / "agent.store"), format='pickle', journal=True)
+
+
+@pytest.mark.benchmark
+def test_benchmark_store_many_configs(tmp_path):
+    print()
+    for journal in (False, True):
+        filename = str(tmp_path / "{}.store".format(journal))
+        store = PersistentDict(filename=filename, flag='c', format='json', journal=journal)
+        start = time.perf_counter()
+        for n in range(2000):
+            store["devices/campus/building/device{}".format(n)] = _config(n)
+            store.async_sync()
+        PersistentDict.wait_for_writes()
+        elapsed = time.perf_counter() - start
+        print("journal: {:<5} configs/sec: {:10.0f}".format(str(journal), 2000 / elapsed))
+        assert PersistentDict(filename=filename, flag='c', format='json', journal=journal) == store
@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from volttron.utils.prefix_index import TopicPrefixIndex
+
+
+def _brute_force(prefixes, topic):
+    return {prefix for prefix in prefixes if topic.startswith(prefix)}
+
+
+@pytest.mark.parametrize("topic, expected", [
+    ("devices/campus/building/device/all", {"", "devices", "devices/", "devices/camp",
+                                            "devices/campus/building/",
+                                            "devices/campus/building/device/all"}),
+    ("devices/campus", {"", "devices", "devices/", "devices/camp"}),
+    ("devicesx", {"", "devices"}),
+    ("analysis/campus", {""}),
+    ("devices/campus/building/", {"", "devices", "devices/", "devices/camp",
+                                  "devices/campus/building/"}),
+])
+def test_match_uses_string_prefix_semantics(topic, expected):
+    index = TopicPrefixIndex()
+    for prefix in ["", "devices", "devices/", "devices/camp", "devices/campus/building/",
+                   "devices/campus/building/device/all", "devices/campus/building/other"]:
+        index[prefix] = prefix.upper()
+
+    matched = dict(index.match(topic))
+    assert set(matched) == expected
+    for prefix, value in matched.items():
+        assert value == prefix.upper()
+
+
+def test_delete_prunes_and_keeps_siblings():
+    index = TopicPrefixIndex()
+    index["devices/campus/a"] = 1
+    index["devices/campus/ab"] = 2
+    index["devices/campus/"] = 3
+
+    del index["devices/campus/a"]
+    assert "devices/campus/a" not in index
+    assert dict(index.match("devices/campus/abc")) == {"devices/campus/ab": 2, "devices/campus/": 3}
+
+    assert index.pop("devices/campus/ab") == 2
+    del index["devices/campus/"]
+    assert len(index) == 0
+    assert not index._root.children
+    assert list(index.match("devices/campus/abc")) == []
+
+    with pytest.raises(KeyError):
+        del index["devices/campus/"]
+
+
+def test_match_agrees_with_startswith():
+    rng = random.Random(0)
+    segments = ["devices", "campus", "building", "dev", "all", "a", "ab", ""]
+    prefixes = set()
+    for _ in range(300):
+        depth = rng.randint(0, 4)
+        prefix = "/".join(rng.choice(segments) for _ in range(depth))
+        if rng.random() < 0.5:
+            prefix = prefix[:rng.randint(0, len(prefix))]
+        prefixes.add(prefix)
+
+    index = TopicPrefixIndex((prefix, None) for prefix in prefixes)
+    assert set(index) == prefixes
+
+    for _ in range(500):
+        topic = "/".join(rng.choice(segments) for _ in range(rng.randint(1, 6)))
+        assert {prefix for prefix, _ in index.match(topic)} == _brute_force(prefixes, topic)
+
+    for prefix in list(prefixes)[::2]:
+        del index[prefix]
+        prefixes.discard(prefix)
+    for _ in range(500):
+        topic = "/".join(rng.choice(segments) for _ in range(rng.randint(1, 6)))
+        assert {prefix for prefix, _ in index.match(topic)} == _brute_force(prefixes, topic)